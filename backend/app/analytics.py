@@ -0,0 +1,172 @@
+import sqlite3
+from typing import Any
+
+from .database import YIELD_BINS_PER_T_HA, reader_connection
+from .metrics import DB_ERRORS
+
+PERCENTILES = (("p10", 0.10), ("p50", 0.50), ("p90", 0.90))
+BUCKET_EXPRESSIONS = {
+    "day": "bucket_day",
+    "month": "substr(bucket_day, 1, 7)",
+    "year": "substr(bucket_day, 1, 4)",
+}
+
+
+def _where(filters: dict[str, Any]) -> tuple[str, list[Any]]:
+    clauses: list[str] = []
+    params: list[Any] = []
+    for column, value in filters.items():
+        if value is None:
+            continue
+        if column == "date_from":
+            clauses.append("bucket_day >= ?")
+        elif column == "date_to":
+            clauses.append("bucket_day <= ?")
+        else:
+            clauses.append(f"{column} = ?")
+        params.append(value)
+    return (f"WHERE {' AND '.join(clauses)}" if clauses else ""), params
+
+
+def _summary(row: sqlite3.Row) -> dict[str, Any]:
+    count = int(row["prediction_count"] or 0)
+    return {
+        "prediction_count": count,
+        "mean_yield_t_ha": float(row["yield_t_ha_sum"] or 0.0) / count if count else 0.0,
+        "total_production_tons": float(row["production_tons_sum"] or 0.0),
+        "risk_levels": {
+            "Low": int(row["low_count"] or 0),
+            "Medium": int(row["medium_count"] or 0),
+            "High": int(row["high_count"] or 0),
+        },
+    }
+
+
+def _percentiles(bins: list[tuple[int, int]]) -> dict[str, float | None]:
+    total = sum(count for _, count in bins)
+    result: dict[str, float | None] = {name: None for name, _ in PERCENTILES}
+    if total <= 0:
+        return result
+
+    running = 0
+    targets = iter(PERCENTILES)
+    name, fraction = next(targets)
+    for yield_bin, count in bins:
+        running += count
+        while running >= fraction * total:
+            result[name] = (yield_bin + 0.5) / YIELD_BINS_PER_T_HA
+            try:
+                name, fraction = next(targets)
+            except StopIteration:
+                return result
+    return result
+
+
+def _grouped(
+    group_column: str, filter_column: str, filter_value: str | None, limit: int
+) -> list[dict[str, Any]]:
+    conn = reader_connection()
+    if conn is None:
+        return []
+
+    where, params = _where({filter_column: filter_value})
+    rows = conn.execute(
+        f"""
+        SELECT {group_column} AS group_key,
+               SUM(prediction_count) AS prediction_count,
+               SUM(yield_t_ha_sum) AS yield_t_ha_sum,
+               SUM(production_tons_sum) AS production_tons_sum,
+               SUM(low_count) AS low_count,
+               SUM(medium_count) AS medium_count,
+               SUM(high_count) AS high_count
+        FROM prediction_rollups
+        {where}
+        GROUP BY {group_column}
+        HAVING SUM(prediction_count) > 0
+        ORDER BY SUM(prediction_count) DESC, {group_column}
+        LIMIT ?
+        """,
+        (*params, limit),
+    ).fetchall()
+    keys = [row["group_key"] for row in rows]
+    if not keys:
+        return []
+
+    placeholders = ", ".join("?" for _ in keys)
+    histogram_rows = conn.execute(
+        f"""
+        SELECT {group_column} AS group_key, yield_bin, SUM(prediction_count) AS prediction_count
+        FROM prediction_yield_histogram
+        {where + " AND" if where else "WHERE"} {group_column} IN ({placeholders})
+        GROUP BY {group_column}, yield_bin
+        ORDER BY {group_column}, yield_bin
+        """,
+        (*params, *keys),
+    ).fetchall()
+    bins: dict[str, list[tuple[int, int]]] = {key: [] for key in keys}
+    for row in histogram_rows:
+        bins[row["group_key"]].append((int(row["yield_bin"]), int(row["prediction_count"])))
+
+    results: list[dict[str, Any]] = []
+    for row in rows:
+        percentiles = _percentiles(bins[row["group_key"]])
+        results.append(
+            {
+                "key": row["group_key"],
+                **_summary(row),
+                **{f"{name}_yield_t_ha": value for name, value in percentiles.items()},
+            }
+        )
+    return results
+
+
+def get_area_analytics(item: str | None = None, limit: int = 100) -> list[dict[str, Any]]:
+    try:
+        return _grouped("area", "item", item, limit)
+    except sqlite3.Error:
+        DB_ERRORS.inc(operation="analytics")
+        return []
+
+
+def get_crop_analytics(area: str | None = None, limit: int = 100) -> list[dict[str, Any]]:
+    try:
+        return _grouped("item", "area", area, limit)
+    except sqlite3.Error:
+        DB_ERRORS.inc(operation="analytics")
+        return []
+
+
+def get_timeseries(
+    bucket: str = "month",
+    area: str | None = None,
+    item: str | None = None,
+    date_from: str | None = None,
+    date_to: str | None = None,
+) -> list[dict[str, Any]]:
+    expression = BUCKET_EXPRESSIONS[bucket]
+    where, params = _where({"area": area, "item": item, "date_from": date_from, "date_to": date_to})
+    try:
+        conn = reader_connection()
+        if conn is None:
+            return []
+        rows = conn.execute(
+            f"""
+            SELECT {expression} AS bucket,
+                   SUM(prediction_count) AS prediction_count,
+                   SUM(yield_t_ha_sum) AS yield_t_ha_sum,
+                   SUM(production_tons_sum) AS production_tons_sum,
+                   SUM(low_count) AS low_count,
+                   SUM(medium_count) AS medium_count,
+                   SUM(high_count) AS high_count
+            FROM prediction_rollups
+            {where}
+            GROUP BY {expression}
+            HAVING SUM(prediction_count) > 0
+            ORDER BY {expression}
+            """,
+            params,
+        ).fetchall()
+    except sqlite3.Error:
+        DB_ERRORS.inc(operation="analytics")
+        return []
+    return [{"bucket": row["bucket"], **_summary(row)} for row in rows]
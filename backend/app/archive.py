@@ -0,0 +1,296 @@
+import argparse
+import csv
+import io
+import json
+import sqlite3
+import sys
+import tempfile
+from collections.abc import Iterable, Iterator
+from datetime import datetime, timezone
+from itertools import islice
+from typing import TYPE_CHECKING, Any
+
+from .database import import_predictions, init_db, iter_prediction_rows
+
+if TYPE_CHECKING:
+    from pydantic import ValidationError
+
+    from .schemas import ImportedPrediction
+
+EXPORT_FORMATS = ("ndjson", "csv", "parquet")
+EXPORT_MEDIA_TYPES = {
+    "ndjson": "application/x-ndjson",
+    "csv": "text/csv",
+    "parquet": "application/vnd.apache.parquet",
+}
+EXPORT_COLUMNS = [
+    "id",
+    "area",
+    "item",
+    "year",
+    "average_rain_fall_mm_per_year",
+    "pesticides_tonnes",
+    "avg_temp",
+    "farm_area_hectares",
+    "predicted_yield_hg_ha",
+    "predicted_yield_t_ha",
+    "risk_level",
+    "warnings",
+    "expected_production_tons",
+    "food_security_level",
+    "food_security_notes",
+    "planting_schedule",
+    "advisory",
+    "advisory_status",
+    "created_at",
+    "model_version",
+]
+NESTED_COLUMNS = {"warnings": list, "food_security_notes": list, "planting_schedule": dict}
+DEFAULT_CHUNK_SIZE = 5000
+
+
+def _decode_nested(value: Any, expected: type) -> Any:
+    try:
+        decoded = json.loads(value) if isinstance(value, str) else value
+    except ValueError:
+        decoded = None
+    return decoded if isinstance(decoded, expected) else expected()
+
+
+def decode_row(row: sqlite3.Row) -> dict[str, Any]:
+    record = {column: row[column] for column in EXPORT_COLUMNS}
+    for column, expected in NESTED_COLUMNS.items():
+        record[column] = _decode_nested(record[column], expected)
+    return record
+
+
+def ensure_format_available(export_format: str) -> None:
+    if export_format not in EXPORT_FORMATS:
+        raise ValueError(f"Unsupported export format: {export_format}")
+    if export_format == "parquet":
+        try:
+            import pyarrow  # noqa: F401
+        except ImportError as exc:
+            raise RuntimeError("Parquet export requires the optional pyarrow package") from exc
+
+
+def _ndjson_chunks(chunks: Iterable[list[sqlite3.Row]]) -> Iterator[bytes]:
+    for rows in chunks:
+        yield "".join(json.dumps(decode_row(row)) + "\n" for row in rows).encode("utf-8")
+
+
+def _csv_chunks(chunks: Iterable[list[sqlite3.Row]]) -> Iterator[bytes]:
+    buffer = io.StringIO()
+    writer = csv.DictWriter(buffer, fieldnames=EXPORT_COLUMNS)
+    writer.writeheader()
+    for rows in chunks:
+        for row in rows:
+            # CSV cannot nest, so list/dict columns stay JSON-encoded.
+            writer.writerow({column: row[column] for column in EXPORT_COLUMNS})
+        yield buffer.getvalue().encode("utf-8")
+        buffer.seek(0)
+        buffer.truncate()
+
+
+class _StreamSink:
+    def __init__(self) -> None:
+        self._chunks: list[bytes] = []
+        self._position = 0
+        self.closed = False
+
+    def write(self, data: bytes) -> int:
+        self._chunks.append(bytes(data))
+        self._position += len(data)
+        return len(data)
+
+    def tell(self) -> int:
+        return self._position
+
+    def flush(self) -> None:
+        pass
+
+    def close(self) -> None:
+        self.closed = True
+
+    def drain(self) -> bytes:
+        data = b"".join(self._chunks)
+        self._chunks.clear()
+        return data
+
+
+def _parquet_schema():
+    import pyarrow as pa
+
+    return pa.schema(
+        [
+            ("id", pa.int64()),
+            ("area", pa.string()),
+            ("item", pa.string()),
+            ("year", pa.int32()),
+            ("average_rain_fall_mm_per_year", pa.float64()),
+            ("pesticides_tonnes", pa.float64()),
+            ("avg_temp", pa.float64()),
+            ("farm_area_hectares", pa.float64()),
+            ("predicted_yield_hg_ha", pa.float64()),
+            ("predicted_yield_t_ha", pa.float64()),
+            ("risk_level", pa.string()),
+            ("warnings", pa.list_(pa.string())),
+            ("expected_production_tons", pa.float64()),
+            ("food_security_level", pa.string()),
+            ("food_security_notes", pa.list_(pa.string())),
+            (
+                "planting_schedule",
+                pa.struct(
+                    [
+                        ("recommended_window", pa.string()),
+                        ("irrigation_plan", pa.string()),
+                        ("actions", pa.list_(pa.string())),
+                    ]
+                ),
+            ),
+            ("advisory", pa.string()),
+            ("advisory_status", pa.string()),
+            ("created_at", pa.timestamp("us", tz="UTC")),
+            ("model_version", pa.string()),
+        ]
+    )
+
+
+def _parquet_chunks(chunks: Iterable[list[sqlite3.Row]]) -> Iterator[bytes]:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    schema = _parquet_schema()
+    sink = _StreamSink()
+    # Each chunk becomes one row group, so memory stays bounded by the chunk size.
+    with pq.ParquetWriter(pa.PythonFile(sink, mode="w"), schema, compression="zstd") as writer:
+        for rows in chunks:
+            records = [decode_row(row) for row in rows]
+            for record in records:
+                record["created_at"] = datetime.fromisoformat(record["created_at"]).astimezone(timezone.utc)
+                schedule = record["planting_schedule"]
+                record["planting_schedule"] = {
+                    "recommended_window": schedule.get("recommended_window"),
+                    "irrigation_plan": schedule.get("irrigation_plan"),
+                    "actions": schedule.get("actions") or [],
+                }
+            writer.write_table(pa.Table.from_pylist(records, schema=schema))
+            yield sink.drain()
+    yield sink.drain()
+
+
+def export_predictions(
+    export_format: str = "ndjson",
+    created_from: str | None = None,
+    created_to: str | None = None,
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+) -> Iterator[bytes]:
+    ensure_format_available(export_format)
+    chunks = iter_prediction_rows(chunk_size, created_from, created_to)
+    if export_format == "csv":
+        return _csv_chunks(chunks)
+    if export_format == "parquet":
+        return _parquet_chunks(chunks)
+    return _ndjson_chunks(chunks)
+
+
+def _describe_errors(exc: "ValidationError") -> str:
+    return "; ".join(
+        f"{'.'.join(str(part) for part in error['loc']) or 'record'}: {error['msg']}" for error in exc.errors()
+    )
+
+
+def parse_ndjson(lines: Iterable[str | bytes], first_line: int = 1) -> Iterator["ImportedPrediction"]:
+    # Deferred like pyarrow: building the pydantic models is most of this module's import
+    # cost, and exports never need them.
+    from pydantic import ValidationError
+
+    from .schemas import ImportedPrediction
+
+    for line_number, line in enumerate(lines, start=first_line):
+        if isinstance(line, bytes):
+            line = line.decode("utf-8")
+        if not line.strip():
+            continue
+        try:
+            record = json.loads(line)
+        except ValueError as exc:
+            raise ValueError(f"Line {line_number}: invalid JSON") from exc
+        if not isinstance(record, dict):
+            raise ValueError(f"Line {line_number}: expected a JSON object")
+        try:
+            yield ImportedPrediction.model_validate(record)
+        except ValidationError as exc:
+            raise ValueError(f"Line {line_number}: {_describe_errors(exc)}") from exc
+
+
+class ImportSpool:
+    # Validated records wait in a temporary file until the whole archive has parsed, so a
+    # bad line leaves the database untouched and large archives stay out of memory.
+    def __init__(self) -> None:
+        self._file = tempfile.TemporaryFile("w+", encoding="utf-8")
+        self.count = 0
+        self.imported = 0
+
+    def __enter__(self) -> "ImportSpool":
+        return self
+
+    def __exit__(self, *exc_info: Any) -> None:
+        self.close()
+
+    def add(self, records: Iterable["ImportedPrediction"]) -> None:
+        for record in records:
+            self._file.write(record.model_dump_json() + "\n")
+            self.count += 1
+
+    def commit(self, batch_size: int = DEFAULT_CHUNK_SIZE) -> int:
+        # One writer transaction per batch, so /predict writes interleave with a long
+        # import instead of timing out behind it. A database error stops the import;
+        # `imported` then tells how many records were written before it.
+        self._file.seek(0)
+        records = (json.loads(line) for line in self._file)
+        while batch := list(islice(records, batch_size)):
+            self.imported += import_predictions(batch)
+        return self.imported
+
+    def close(self) -> None:
+        self._file.close()
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Export or import predictions_v2 records.")
+    commands = parser.add_subparsers(dest="command", required=True)
+    export_parser = commands.add_parser("export")
+    export_parser.add_argument("--format", choices=EXPORT_FORMATS, default="ndjson")
+    export_parser.add_argument("--from", dest="created_from", default=None)
+    export_parser.add_argument("--to", dest="created_to", default=None)
+    export_parser.add_argument("--out", default="-")
+    import_parser = commands.add_parser("import")
+    import_parser.add_argument("path", help="NDJSON file produced by the export command, or - for stdin")
+    args = parser.parse_args()
+
+    init_db()
+    if args.command == "export":
+        out = sys.stdout.buffer if args.out == "-" else open(args.out, "wb")
+        try:
+            for chunk in export_predictions(args.format, args.created_from, args.created_to):
+                out.write(chunk)
+        finally:
+            if out is not sys.stdout.buffer:
+                out.close()
+        return 0
+
+    source = sys.stdin if args.path == "-" else open(args.path, encoding="utf-8")
+    try:
+        with ImportSpool() as spool:
+            spool.add(parse_ndjson(source))
+            imported = spool.commit()
+    finally:
+        if source is not sys.stdin:
+            source.close()
+    print(f"Imported {imported} records")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
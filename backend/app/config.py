@@ -1,5 +1,6 @@
 from functools import lru_cache
 from pathlib import Path
+from typing import Literal
 
 from pydantic import Field
 from pydantic_settings import BaseSettings, SettingsConfigDict
@@ -20,8 +21,30 @@ class Settings(BaseSettings):
     )
 
     sqlite_db_path: str = "app/data/agrismart.db"
+    sqlite_batch_size: int = Field(default=64, ge=1)
+    sqlite_batch_interval_ms: float = Field(default=1.0, ge=0)
+    sqlite_synchronous: Literal["OFF", "NORMAL", "FULL"] = "NORMAL"
 
     model_path: str = "app/ml/model.joblib"
+    # Versioned artifacts plus manifest.json; its active version takes precedence over model_path.
+    model_registry_dir: str = "app/ml/models"
+    model_watch_interval_seconds: float = Field(default=5.0, ge=0)
+    train_on_startup: bool = True
+    # Serve tree models from memory-mapped .npy arrays shared by all worker processes.
+    model_mmap: bool = True
+    # Semicolon-separated crop names ranked in the grain suggestion; "*" ranks every crop the model knows.
+    grain_candidates: str = "Maize;Rice, paddy;Sorghum;Wheat;Soybeans"
+    # p10/p50/p90 yield from the spread of a tree ensemble; the p10 bound drives food security.
+    prediction_intervals: bool = True
+    # Upper bound on the grid a single /predict/sweep request may expand to.
+    sweep_max_points: int = Field(default=50_000, ge=1)
+    # JSON rule table for risk, planting and food security; empty uses app/services/rules.json.
+    rules_path: str = ""
+    # Directory with yield_df.csv and the raw climate CSVs; empty uses app/ml/data.
+    reference_data_dir: str = ""
+
+    prediction_cache_size: int = Field(default=1024, ge=0)
+    prediction_cache_ttl_seconds: int = Field(default=600, ge=1)
 
     llm_provider: str = "groq"
     groq_api_key: str = ""
@@ -29,9 +52,35 @@ class Settings(BaseSettings):
     ollama_base_url: str = "http://localhost:11434"
     ollama_model: str = "llama3.1:8b"
     ollama_timeout_seconds: int = Field(default=30, ge=3, le=180)
+    llm_max_connections: int = Field(default=200, ge=1)
+    # Failover (and hedge) target tried after llm_provider, e.g. "ollama"; empty disables it.
+    llm_secondary_provider: str = ""
+    # Total time an advisory may wait on providers (first token for streams) before the fallback text.
+    llm_latency_budget_seconds: float = Field(default=15.0, gt=0)
+    # In-flight calls per provider; further requests wait for a slot within their budget.
+    llm_max_concurrency: int = Field(default=64, ge=1)
+    # Start the secondary provider when the primary has not answered within this delay; 0 disables hedging.
+    llm_hedge_delay_seconds: float = Field(default=0.0, ge=0)
+    # Consecutive failures that open a provider's circuit, and how long it stays open.
+    llm_breaker_failures: int = Field(default=5, ge=1)
+    llm_breaker_reset_seconds: float = Field(default=30.0, gt=0)
+    advisory_workers: int = Field(default=8, ge=1)
+    advisory_queue_size: int = Field(default=1000, ge=1)
+    advisory_cache_path: str = "app/data/advisory_cache.db"
+    advisory_cache_ttl_seconds: int = Field(default=86400, ge=1)
+    advisory_cache_max_entries: int = Field(default=5000, ge=0)
+    # Localized templates for the rule-based advisory; empty uses app/services/advisory_templates.json.
+    advisory_templates_path: str = ""
+    # Locale used when a request names none; empty uses the template file's default_locale.
+    advisory_locale: str = ""
+
+    # Shared secret for the export/import and /admin endpoints; they are disabled while it is empty.
+    admin_token: str = ""
 
     cors_origins: str = "http://localhost:5173"
     log_level: str = "INFO"
+    # Prometheus text exposition on /metrics.
+    metrics_enabled: bool = True
     hide_docs: bool = False
 
 
@@ -39,8 +88,10 @@ class Settings(BaseSettings):
 def get_settings() -> Settings:
     settings = Settings()
     settings.llm_provider = _strip_optional_quotes(settings.llm_provider).lower()
+    settings.llm_secondary_provider = _strip_optional_quotes(settings.llm_secondary_provider).lower()
     settings.groq_api_key = _strip_optional_quotes(settings.groq_api_key)
     settings.groq_model = _strip_optional_quotes(settings.groq_model)
     settings.ollama_base_url = _strip_optional_quotes(settings.ollama_base_url)
     settings.ollama_model = _strip_optional_quotes(settings.ollama_model)
+    settings.admin_token = _strip_optional_quotes(settings.admin_token)
     return settings
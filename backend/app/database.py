@@ -1,163 +1,537 @@
+import base64
+import binascii
 import json
 import sqlite3
+import threading
+from collections.abc import Iterator
 from datetime import datetime, timezone
+from functools import partial
 from pathlib import Path
 from typing import Any
 
 from .config import get_settings
+from .metrics import DB_ERRORS
+from .sqlite_writer import SQLiteWriter, WriteFn, connect
 
 settings = get_settings()
 TABLE_NAME = "predictions_v2"
+WRITE_TIMEOUT_SECONDS = 30
 
-_conn: sqlite3.Connection | None = None
+HISTORY_MAX_PAGE_SIZE = 1000
+HISTORY_INDEXES = {
+    "created_id": "created_at, id",
+    "area_created_id": "area, created_at, id",
+    "item_created_id": "item, created_at, id",
+    "area_item_created_id": "area, item, created_at, id",
+    "risk_created_id": "risk_level, created_at, id",
+}
+
+# Yield histogram resolution for analytics percentiles: 0.1 t/ha per bin.
+YIELD_BINS_PER_T_HA = 10
+MAX_YIELD_BIN = 2000
+
+_db_path: Path | None = None
+_writer: SQLiteWriter | None = None
 _db_ready = False
+_readers = threading.local()
 
 
-def _ensure_column(column_name: str, column_def: str) -> None:
-    if _conn is None:
-        return
-    existing = _conn.execute(f"PRAGMA table_info({TABLE_NAME})").fetchall()
+def _ensure_column(conn: sqlite3.Connection, column_name: str, column_def: str) -> None:
+    existing = conn.execute(f"PRAGMA table_info({TABLE_NAME})").fetchall()
     existing_names = {row["name"] for row in existing}
     if column_name not in existing_names:
-        _conn.execute(f"ALTER TABLE predictions ADD COLUMN {column_name} {column_def}")
+        conn.execute(f"ALTER TABLE {TABLE_NAME} ADD COLUMN {column_name} {column_def}")
+
+
+def _create_schema(conn: sqlite3.Connection) -> None:
+    conn.execute("PRAGMA journal_mode = WAL")
+    conn.execute(
+        """
+        CREATE TABLE IF NOT EXISTS predictions_v2 (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            area TEXT NOT NULL,
+            item TEXT NOT NULL,
+            year INTEGER NOT NULL,
+            average_rain_fall_mm_per_year REAL NOT NULL,
+            pesticides_tonnes REAL NOT NULL,
+            avg_temp REAL NOT NULL,
+            farm_area_hectares REAL NOT NULL,
+            predicted_yield_hg_ha REAL NOT NULL,
+            predicted_yield_t_ha REAL NOT NULL,
+            risk_level TEXT NOT NULL,
+            warnings TEXT NOT NULL,
+            expected_production_tons REAL DEFAULT 0,
+            food_security_level TEXT DEFAULT 'Watch',
+            food_security_notes TEXT DEFAULT '[]',
+            planting_schedule TEXT DEFAULT '{}',
+            advisory TEXT NOT NULL,
+            advisory_status TEXT DEFAULT 'ready',
+            created_at TEXT NOT NULL,
+            model_version TEXT
+        )
+        """
+    )
+    conn.execute(f"DROP INDEX IF EXISTS idx_{TABLE_NAME}_created_at")
+    _ensure_column(conn, "area", "TEXT DEFAULT ''")
+    _ensure_column(conn, "item", "TEXT DEFAULT ''")
+    _ensure_column(conn, "year", "INTEGER DEFAULT 2000")
+    _ensure_column(conn, "average_rain_fall_mm_per_year", "REAL DEFAULT 0")
+    _ensure_column(conn, "pesticides_tonnes", "REAL DEFAULT 0")
+    _ensure_column(conn, "avg_temp", "REAL DEFAULT 0")
+    _ensure_column(conn, "farm_area_hectares", "REAL DEFAULT 1")
+    _ensure_column(conn, "predicted_yield_hg_ha", "REAL DEFAULT 0")
+    _ensure_column(conn, "predicted_yield_t_ha", "REAL DEFAULT 0")
+    _ensure_column(conn, "expected_production_tons", "REAL DEFAULT 0")
+    _ensure_column(conn, "food_security_level", "TEXT DEFAULT 'Watch'")
+    _ensure_column(conn, "food_security_notes", "TEXT DEFAULT '[]'")
+    _ensure_column(conn, "planting_schedule", "TEXT DEFAULT '{}'")
+    _ensure_column(conn, "advisory_status", "TEXT DEFAULT 'ready'")
+    _ensure_column(conn, "model_version", "TEXT")
+    # History pages are keyset-paginated on (created_at, id), optionally filtered first.
+    # Year ranges are applied while walking the created_at order rather than via an index,
+    # which would force a sort of every matching row.
+    for name, columns in HISTORY_INDEXES.items():
+        conn.execute(f"CREATE INDEX IF NOT EXISTS idx_{TABLE_NAME}_{name} ON {TABLE_NAME} ({columns})")
+    _create_rollups(conn)
+    conn.commit()
+
+
+def _rollup_upsert_sql(row: str, sign: int) -> list[str]:
+    risk = {
+        level: f"(CASE WHEN {row}.risk_level = '{level}' THEN {sign} ELSE 0 END)"
+        for level in ("Low", "Medium", "High")
+    }
+    yield_bin = f"MIN(MAX(CAST({row}.predicted_yield_t_ha * {YIELD_BINS_PER_T_HA} AS INTEGER), 0), {MAX_YIELD_BIN})"
+    return [
+        f"""
+        INSERT INTO prediction_rollups (
+            bucket_day, area, item, prediction_count, yield_t_ha_sum, production_tons_sum,
+            low_count, medium_count, high_count
+        ) VALUES (
+            substr({row}.created_at, 1, 10), {row}.area, {row}.item, {sign},
+            {sign} * {row}.predicted_yield_t_ha, {sign} * {row}.expected_production_tons,
+            {risk["Low"]}, {risk["Medium"]}, {risk["High"]}
+        )
+        ON CONFLICT (bucket_day, area, item) DO UPDATE SET
+            prediction_count = prediction_count + excluded.prediction_count,
+            yield_t_ha_sum = yield_t_ha_sum + excluded.yield_t_ha_sum,
+            production_tons_sum = production_tons_sum + excluded.production_tons_sum,
+            low_count = low_count + excluded.low_count,
+            medium_count = medium_count + excluded.medium_count,
+            high_count = high_count + excluded.high_count;
+        """,
+        f"""
+        INSERT INTO prediction_yield_histogram (area, item, yield_bin, prediction_count)
+        VALUES ({row}.area, {row}.item, {yield_bin}, {sign})
+        ON CONFLICT (area, item, yield_bin) DO UPDATE SET
+            prediction_count = prediction_count + excluded.prediction_count;
+        """,
+    ]
+
+
+def _create_rollups(conn: sqlite3.Connection) -> None:
+    # Summary tables are maintained by triggers in the same transaction as each insert,
+    # so analytics never scan predictions_v2.
+    conn.execute(
+        """
+        CREATE TABLE IF NOT EXISTS prediction_rollups (
+            bucket_day TEXT NOT NULL,
+            area TEXT NOT NULL,
+            item TEXT NOT NULL,
+            prediction_count INTEGER NOT NULL DEFAULT 0,
+            yield_t_ha_sum REAL NOT NULL DEFAULT 0,
+            production_tons_sum REAL NOT NULL DEFAULT 0,
+            low_count INTEGER NOT NULL DEFAULT 0,
+            medium_count INTEGER NOT NULL DEFAULT 0,
+            high_count INTEGER NOT NULL DEFAULT 0,
+            PRIMARY KEY (bucket_day, area, item)
+        ) WITHOUT ROWID
+        """
+    )
+    conn.execute(
+        "CREATE INDEX IF NOT EXISTS idx_prediction_rollups_area_item ON prediction_rollups (area, item)"
+    )
+    conn.execute(
+        "CREATE INDEX IF NOT EXISTS idx_prediction_rollups_item ON prediction_rollups (item)"
+    )
+    conn.execute(
+        """
+        CREATE TABLE IF NOT EXISTS prediction_yield_histogram (
+            area TEXT NOT NULL,
+            item TEXT NOT NULL,
+            yield_bin INTEGER NOT NULL,
+            prediction_count INTEGER NOT NULL DEFAULT 0,
+            PRIMARY KEY (area, item, yield_bin)
+        ) WITHOUT ROWID
+        """
+    )
+    conn.execute(
+        f"""
+        CREATE TRIGGER IF NOT EXISTS trg_{TABLE_NAME}_rollup_insert AFTER INSERT ON {TABLE_NAME}
+        BEGIN {"".join(_rollup_upsert_sql("NEW", 1))} END
+        """
+    )
+    conn.execute(
+        f"""
+        CREATE TRIGGER IF NOT EXISTS trg_{TABLE_NAME}_rollup_delete AFTER DELETE ON {TABLE_NAME}
+        BEGIN {"".join(_rollup_upsert_sql("OLD", -1))} END
+        """
+    )
+
+    rollups_empty = conn.execute("SELECT 1 FROM prediction_rollups LIMIT 1").fetchone() is None
+    predictions_exist = conn.execute(f"SELECT 1 FROM {TABLE_NAME} LIMIT 1").fetchone() is not None
+    if rollups_empty and predictions_exist:
+        _rebuild_rollups(conn)
+
+
+def _rebuild_rollups(conn: sqlite3.Connection) -> None:
+    conn.execute("DELETE FROM prediction_rollups")
+    conn.execute("DELETE FROM prediction_yield_histogram")
+    conn.execute(
+        f"""
+        INSERT INTO prediction_rollups (
+            bucket_day, area, item, prediction_count, yield_t_ha_sum, production_tons_sum,
+            low_count, medium_count, high_count
+        )
+        SELECT
+            substr(created_at, 1, 10), area, item, COUNT(*), SUM(predicted_yield_t_ha),
+            SUM(expected_production_tons),
+            SUM(risk_level = 'Low'), SUM(risk_level = 'Medium'), SUM(risk_level = 'High')
+        FROM {TABLE_NAME}
+        GROUP BY substr(created_at, 1, 10), area, item
+        """
+    )
+    conn.execute(
+        f"""
+        INSERT INTO prediction_yield_histogram (area, item, yield_bin, prediction_count)
+        SELECT
+            area, item,
+            MIN(MAX(CAST(predicted_yield_t_ha * {YIELD_BINS_PER_T_HA} AS INTEGER), 0), {MAX_YIELD_BIN}),
+            COUNT(*)
+        FROM {TABLE_NAME}
+        GROUP BY 1, 2, 3
+        """
+    )
 
 
 def init_db() -> None:
-    global _conn, _db_ready
+    global _db_path, _writer, _db_ready
 
+    close_db()
     try:
         db_path = Path(settings.sqlite_db_path)
         db_path.parent.mkdir(parents=True, exist_ok=True)
 
-        _conn = sqlite3.connect(db_path, check_same_thread=False)
-        _conn.row_factory = sqlite3.Row
-        _conn.execute(
-            """
-            CREATE TABLE IF NOT EXISTS predictions_v2 (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                area TEXT NOT NULL,
-                item TEXT NOT NULL,
-                year INTEGER NOT NULL,
-                average_rain_fall_mm_per_year REAL NOT NULL,
-                pesticides_tonnes REAL NOT NULL,
-                avg_temp REAL NOT NULL,
-                farm_area_hectares REAL NOT NULL,
-                predicted_yield_hg_ha REAL NOT NULL,
-                predicted_yield_t_ha REAL NOT NULL,
-                risk_level TEXT NOT NULL,
-                warnings TEXT NOT NULL,
-                expected_production_tons REAL DEFAULT 0,
-                food_security_level TEXT DEFAULT 'Watch',
-                food_security_notes TEXT DEFAULT '[]',
-                planting_schedule TEXT DEFAULT '{}',
-                advisory TEXT NOT NULL,
-                created_at TEXT NOT NULL
-            )
-            """
-        )
-        _conn.execute(
-            f"CREATE INDEX IF NOT EXISTS idx_{TABLE_NAME}_created_at ON {TABLE_NAME} (created_at DESC)"
+        setup_conn = connect(db_path, settings.sqlite_synchronous)
+        try:
+            _create_schema(setup_conn)
+        finally:
+            setup_conn.close()
+
+        writer = SQLiteWriter(
+            db_path,
+            batch_size=settings.sqlite_batch_size,
+            batch_interval_ms=settings.sqlite_batch_interval_ms,
+            synchronous=settings.sqlite_synchronous,
         )
-        _ensure_column("area", "TEXT DEFAULT ''")
-        _ensure_column("item", "TEXT DEFAULT ''")
-        _ensure_column("year", "INTEGER DEFAULT 2000")
-        _ensure_column("average_rain_fall_mm_per_year", "REAL DEFAULT 0")
-        _ensure_column("pesticides_tonnes", "REAL DEFAULT 0")
-        _ensure_column("avg_temp", "REAL DEFAULT 0")
-        _ensure_column("farm_area_hectares", "REAL DEFAULT 1")
-        _ensure_column("predicted_yield_hg_ha", "REAL DEFAULT 0")
-        _ensure_column("predicted_yield_t_ha", "REAL DEFAULT 0")
-        _ensure_column("expected_production_tons", "REAL DEFAULT 0")
-        _ensure_column("food_security_level", "TEXT DEFAULT 'Watch'")
-        _ensure_column("food_security_notes", "TEXT DEFAULT '[]'")
-        _ensure_column("planting_schedule", "TEXT DEFAULT '{}'")
-        _conn.commit()
+        writer.start()
+        _db_path = db_path
+        _writer = writer
         _db_ready = True
     except sqlite3.Error:
+        DB_ERRORS.inc(operation="init")
         _db_ready = False
-        _conn = None
+        _db_path = None
+        _writer = None
+
+
+def close_db() -> None:
+    global _writer, _db_ready
+
+    if _writer is not None:
+        _writer.close()
+    _writer = None
+    _db_ready = False
+
+
+def reader_connection() -> sqlite3.Connection | None:
+    if _db_path is None:
+        return None
+    conn = getattr(_readers, "conn", None)
+    if conn is None or getattr(_readers, "path", None) != _db_path:
+        conn = connect(_db_path, settings.sqlite_synchronous)
+        conn.execute("PRAGMA query_only = ON")
+        _readers.conn = conn
+        _readers.path = _db_path
+    return conn
+
+
+def _write(fn: WriteFn) -> Any:
+    if _writer is None:
+        raise sqlite3.OperationalError("Database is not initialized")
+    future = _writer.submit(fn)
+    try:
+        return future.result(timeout=WRITE_TIMEOUT_SECONDS)
+    except TimeoutError:
+        # Still queued: drop it so it cannot commit after the caller gave up. A job the
+        # writer has already started cannot be cancelled and finishes on its own.
+        future.cancel()
+        raise
 
 
 def db_is_ready() -> bool:
     return _db_ready
 
 
+INSERT_PREDICTION_SQL = """
+    INSERT INTO predictions_v2 (
+        area, item, year, average_rain_fall_mm_per_year, pesticides_tonnes, avg_temp,
+        farm_area_hectares, predicted_yield_hg_ha, predicted_yield_t_ha, risk_level,
+        warnings, expected_production_tons, food_security_level, food_security_notes,
+        planting_schedule, advisory, advisory_status, created_at, model_version
+    ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+"""
+
+
+def _prediction_params(record: dict[str, Any], created_at: str) -> tuple:
+    return (
+        record["area"],
+        record["item"],
+        record["year"],
+        record["average_rain_fall_mm_per_year"],
+        record["pesticides_tonnes"],
+        record["avg_temp"],
+        record["farm_area_hectares"],
+        record["predicted_yield_hg_ha"],
+        record["predicted_yield_t_ha"],
+        record["risk_level"],
+        json.dumps(record.get("warnings", [])),
+        record.get("expected_production_tons", 0.0),
+        record.get("food_security_level", "Watch"),
+        json.dumps(record.get("food_security_notes", [])),
+        json.dumps(record.get("planting_schedule", {})),
+        record["advisory"],
+        record.get("advisory_status", "ready"),
+        created_at,
+        record.get("model_version"),
+    )
+
+
+def _insert_predictions(rows: list[tuple], conn: sqlite3.Connection) -> list[str]:
+    return [str(conn.execute(INSERT_PREDICTION_SQL, row).lastrowid) for row in rows]
+
+
+def _insert_prediction_rows(rows: list[tuple], conn: sqlite3.Connection) -> int:
+    conn.executemany(INSERT_PREDICTION_SQL, rows)
+    return len(rows)
+
+
+def _normalize_timestamp(value: str) -> str:
+    parsed = datetime.fromisoformat(value)
+    if parsed.tzinfo is None:
+        parsed = parsed.replace(tzinfo=timezone.utc)
+    return parsed.astimezone(timezone.utc).isoformat(timespec="microseconds")
+
+
+def _update_advisory_row(
+    prediction_id: int, advisory: str, status: str, conn: sqlite3.Connection
+) -> bool:
+    cursor = conn.execute(
+        f"UPDATE {TABLE_NAME} SET advisory = ?, advisory_status = ? WHERE id = ?",
+        (advisory, status, prediction_id),
+    )
+    return cursor.rowcount > 0
+
+
 def save_prediction(record: dict[str, Any]) -> str | None:
-    if _conn is None:
+    inserted_ids = save_predictions([record])
+    return inserted_ids[0] if inserted_ids else None
+
+
+def save_predictions(records: list[dict[str, Any]]) -> list[str] | None:
+    if _writer is None:
+        DB_ERRORS.inc(operation="save_predictions")
         return None
+    if not records:
+        return []
 
-    created_at = datetime.now(timezone.utc).isoformat()
-    warnings_json = json.dumps(record.get("warnings", []))
-    food_security_notes_json = json.dumps(record.get("food_security_notes", []))
-    planting_schedule_json = json.dumps(record.get("planting_schedule", {}))
+    # Fixed-width timestamps keep created_at lexicographically ordered for keyset paging.
+    created_at = datetime.now(timezone.utc).isoformat(timespec="microseconds")
 
     try:
-        cursor = _conn.execute(
-            """
-            INSERT INTO predictions_v2 (
-                area, item, year, average_rain_fall_mm_per_year, pesticides_tonnes, avg_temp,
-                farm_area_hectares, predicted_yield_hg_ha, predicted_yield_t_ha, risk_level,
-                warnings, expected_production_tons, food_security_level, food_security_notes,
-                planting_schedule, advisory, created_at
-            ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-            """,
-            (
-                record["area"],
-                record["item"],
-                record["year"],
-                record["average_rain_fall_mm_per_year"],
-                record["pesticides_tonnes"],
-                record["avg_temp"],
-                record["farm_area_hectares"],
-                record["predicted_yield_hg_ha"],
-                record["predicted_yield_t_ha"],
-                record["risk_level"],
-                warnings_json,
-                record.get("expected_production_tons", 0.0),
-                record.get("food_security_level", "Watch"),
-                food_security_notes_json,
-                planting_schedule_json,
-                record["advisory"],
-                created_at,
-            ),
-        )
-        _conn.commit()
-        return str(cursor.lastrowid)
-    except (sqlite3.Error, KeyError):
+        params = [_prediction_params(record, created_at) for record in records]
+        return _write(partial(_insert_predictions, params))
+    except (sqlite3.Error, KeyError, TimeoutError):
+        DB_ERRORS.inc(operation="save_predictions")
         return None
 
 
-def get_recent_predictions(limit: int = 20) -> list[dict[str, Any]]:
-    if _conn is None:
-        return []
+def import_predictions(records: list[dict[str, Any]]) -> int:
+    # One writer job per call. Callers import large archives in chunks, so other writes
+    # are queued behind one chunk at most, never the whole archive.
+    if _writer is None:
+        raise sqlite3.OperationalError("Database is not initialized")
+    if not records:
+        return 0
+
+    rows = [_prediction_params(record, _normalize_timestamp(record["created_at"])) for record in records]
+    return _write(partial(_insert_prediction_rows, rows))
+
+
+def iter_prediction_rows(
+    chunk_size: int = 5000,
+    created_from: str | None = None,
+    created_to: str | None = None,
+) -> Iterator[list[sqlite3.Row]]:
+    if _db_path is None:
+        return
+
+    clauses = ["id > ?"]
+    params: list[Any] = []
+    if created_from is not None:
+        clauses.append("created_at >= ?")
+        params.append(created_from)
+    if created_to is not None:
+        clauses.append("created_at < ?")
+        params.append(created_to)
+
+    # Own connection: streaming responses may resume the generator on another thread.
+    conn = connect(_db_path, settings.sqlite_synchronous, check_same_thread=False)
+    try:
+        last_id = 0
+        while True:
+            rows = conn.execute(
+                f"SELECT * FROM {TABLE_NAME} WHERE {' AND '.join(clauses)} ORDER BY id LIMIT ?",
+                (last_id, *params, chunk_size),
+            ).fetchall()
+            if not rows:
+                return
+            yield rows
+            last_id = rows[-1]["id"]
+    finally:
+        conn.close()
+
+
+def update_advisory(prediction_id: str, advisory: str, status: str = "ready") -> bool:
+    if _writer is None:
+        DB_ERRORS.inc(operation="update_advisory")
+        return False
 
-    safe_limit = min(max(limit, 1), 100)
     try:
-        rows = _conn.execute(
-            """
-            SELECT area, item, year, predicted_yield_hg_ha, predicted_yield_t_ha, risk_level, created_at
-            FROM predictions_v2
-            ORDER BY datetime(created_at) DESC
+        return _write(partial(_update_advisory_row, int(prediction_id), advisory, status))
+    except ValueError:
+        return False
+    except (sqlite3.Error, TimeoutError):
+        DB_ERRORS.inc(operation="update_advisory")
+        return False
+
+
+def get_advisory(prediction_id: str) -> dict[str, Any] | None:
+    try:
+        conn = reader_connection()
+        if conn is None:
+            return None
+        row = conn.execute(
+            f"SELECT id, advisory, advisory_status FROM {TABLE_NAME} WHERE id = ?",
+            (int(prediction_id),),
+        ).fetchone()
+    except ValueError:
+        return None
+    except sqlite3.Error:
+        DB_ERRORS.inc(operation="get_advisory")
+        return None
+    if row is None:
+        return None
+
+    return {
+        "prediction_id": str(row["id"]),
+        "status": str(row["advisory_status"] or "ready"),
+        "advisory": str(row["advisory"] or ""),
+    }
+
+
+def encode_history_cursor(created_at: str, prediction_id: int) -> str:
+    raw = json.dumps([created_at, prediction_id], separators=(",", ":")).encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii").rstrip("=")
+
+
+def decode_history_cursor(cursor: str) -> tuple[str, int]:
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        created_at, prediction_id = json.loads(base64.urlsafe_b64decode(padded.encode("ascii")))
+        return str(created_at), int(prediction_id)
+    except (binascii.Error, UnicodeError, TypeError, ValueError) as exc:
+        raise ValueError("Invalid history cursor") from exc
+
+
+def _history_item(row: sqlite3.Row) -> dict[str, Any]:
+    item = dict(row)
+    return {
+        "id": str(item["id"]),
+        "area": str(item.get("area", "")),
+        "item": str(item.get("item", "")),
+        "year": int(item.get("year") or 2000),
+        "predicted_yield_hg_ha": float(item.get("predicted_yield_hg_ha") or 0.0),
+        "predicted_yield_t_ha": float(item.get("predicted_yield_t_ha") or 0.0),
+        "risk_level": str(item.get("risk_level") or "Medium"),
+        "created_at": item.get("created_at"),
+        "model_version": item.get("model_version"),
+    }
+
+
+def get_predictions_page(
+    limit: int = 20,
+    cursor: str | None = None,
+    area: str | None = None,
+    item: str | None = None,
+    year_min: int | None = None,
+    year_max: int | None = None,
+    risk_level: str | None = None,
+) -> tuple[list[dict[str, Any]], str | None]:
+    safe_limit = min(max(limit, 1), HISTORY_MAX_PAGE_SIZE)
+    clauses: list[str] = []
+    params: list[Any] = []
+    for column, value in (("area", area), ("item", item), ("risk_level", risk_level)):
+        if value is not None:
+            clauses.append(f"{column} = ?")
+            params.append(value)
+    if year_min is not None:
+        clauses.append("year >= ?")
+        params.append(year_min)
+    if year_max is not None:
+        clauses.append("year <= ?")
+        params.append(year_max)
+    if cursor is not None:
+        clauses.append("(created_at, id) < (?, ?)")
+        params.extend(decode_history_cursor(cursor))
+
+    where = f"WHERE {' AND '.join(clauses)}" if clauses else ""
+    try:
+        conn = reader_connection()
+        if conn is None:
+            return [], None
+        rows = conn.execute(
+            f"""
+            SELECT id, area, item, year, predicted_yield_hg_ha, predicted_yield_t_ha, risk_level, created_at,
+                   model_version
+            FROM {TABLE_NAME}
+            {where}
+            ORDER BY created_at DESC, id DESC
             LIMIT ?
             """,
-            (safe_limit,),
+            (*params, safe_limit + 1),
         ).fetchall()
     except sqlite3.Error:
-        return []
+        DB_ERRORS.inc(operation="history")
+        return [], None
+
+    next_cursor = None
+    if len(rows) > safe_limit:
+        rows = rows[:safe_limit]
+        next_cursor = encode_history_cursor(rows[-1]["created_at"], rows[-1]["id"])
+    return [_history_item(row) for row in rows], next_cursor
 
-    normalized: list[dict[str, Any]] = []
-    for row in rows:
-        item = dict(row)
-        normalized.append(
-            {
-                "area": str(item.get("area", "")),
-                "item": str(item.get("item", "")),
-                "year": int(item.get("year") or 2000),
-                "predicted_yield_hg_ha": float(item.get("predicted_yield_hg_ha") or 0.0),
-                "predicted_yield_t_ha": float(item.get("predicted_yield_t_ha") or 0.0),
-                "risk_level": str(item.get("risk_level") or "Medium"),
-                "created_at": item.get("created_at"),
-            }
-        )
 
-    return normalized
+def get_recent_predictions(limit: int = 20, **filters: Any) -> list[dict[str, Any]]:
+    items, _ = get_predictions_page(limit=min(max(limit, 1), 100), **filters)
+    return items
@@ -1,65 +1,277 @@
+import asyncio
+import hmac
+import json
 import logging
+import math
+import sqlite3
+import time
+from collections.abc import AsyncIterator
 from contextlib import asynccontextmanager
+from datetime import date, timedelta
+from typing import Literal
 
-from fastapi import FastAPI, HTTPException, Query
+from fastapi import Depends, FastAPI, Header, HTTPException, Query, Request
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import PlainTextResponse, StreamingResponse
+from starlette.concurrency import run_in_threadpool
 
+from .analytics import get_area_analytics, get_crop_analytics, get_timeseries
+from .archive import EXPORT_MEDIA_TYPES, ImportSpool, export_predictions, parse_ndjson
+from .cache import TTLCache
 from .config import get_settings
-from .database import db_is_ready, get_recent_predictions, init_db, save_prediction
+from .database import (
+    close_db,
+    db_is_ready,
+    get_advisory,
+    get_predictions_page,
+    get_recent_predictions,
+    init_db,
+    save_prediction,
+    save_predictions,
+    update_advisory,
+)
 from .logging_config import configure_logging
-from .ml.predict import is_model_loaded, load_model, predict_yield
-from .schemas import HealthResponse, HistoryItem, PredictionInput, PredictionResponse
-from .services.food_security_service import assess_food_security
-from .services.llm_service import generate_advisory
-from .services.planning_service import build_planting_schedule
-from .services.risk_service import analyze_risk
+from .metrics import CONTENT_TYPE as METRICS_CONTENT_TYPE
+from .metrics import STAGE_SECONDS, MetricsMiddleware
+from .metrics import registry as metrics_registry
+from .ml.predict import (
+    active_model,
+    is_model_loaded,
+    model_version,
+    predict_columns,
+    predict_intervals,
+    predict_yields,
+    reload_if_changed,
+    reload_model,
+    supports_intervals,
+    train_in_background,
+)
+from .ml.reference import CLIMATE_FIELDS, get_reference_index
+from .ml.registry import activate as activate_model_version
+from .ml.registry import read_manifest
+from .schemas import (
+    AdvisoryStatusResponse,
+    AnalyticsBucket,
+    AnalyticsGroup,
+    BatchPredictionInput,
+    BatchPredictionResponse,
+    BulkImportResponse,
+    CacheStats,
+    CategoryList,
+    HealthResponse,
+    HistoryItem,
+    HistoryPage,
+    ModelRegistryResponse,
+    ModelReloadResponse,
+    PredictionContext,
+    PredictionInput,
+    PredictionResponse,
+    PredictionSweepInput,
+    PredictionSweepResponse,
+    SweepAxes,
+)
+from .services.advisory_jobs import AdvisoryJob, AdvisoryJobQueue
+from .services.advisory_templates import get_advisory_templates
+from .services.food_security_service import assess_food_security, assess_food_security_many
+from .services.llm_service import (
+    close_http_client,
+    generate_advisory,
+    score_with_grain_candidates,
+    stream_advisory,
+)
+from .services.planning_service import build_planting_schedule, build_planting_schedules
+from .services.risk_service import analyze_risk, analyze_risk_many
+from .services.rule_engine import get_rule_engine, payload_columns
+from .services.sweep_service import expand_grid, grid_shape, swept_fields, sweep_axes, sweep_risk_levels
 
 settings = get_settings()
 configure_logging(settings.log_level)
 logger = logging.getLogger(__name__)
+prediction_cache = TTLCache(settings.prediction_cache_size, settings.prediction_cache_ttl_seconds)
+advisory_jobs = AdvisoryJobQueue(settings.advisory_workers, settings.advisory_queue_size)
+IMPORT_BATCH_SIZE = 5000
 
 
 def _parsed_origins() -> list[str]:
     return [origin.strip() for origin in settings.cors_origins.split(",") if origin.strip()]
 
 
-def _build_prediction_context(payload: PredictionInput) -> dict:
+def _run_inference(predict_fn, *args):
     try:
-        predicted_yield_hg_ha = predict_yield(payload)
+        return predict_fn(*args)
     except (FileNotFoundError, RuntimeError, ValueError) as exc:
         raise HTTPException(status_code=503, detail=str(exc)) from exc
     except Exception as exc:
         logger.exception("Prediction failed: %s", exc)
         raise HTTPException(status_code=500, detail="Prediction failed unexpectedly") from exc
 
+
+def _interval_t_ha(interval_hg_ha: tuple[float, float, float] | None) -> dict[str, float] | None:
+    if interval_hg_ha is None:
+        return None
+    p10, p50, p90 = (value / 10000.0 for value in interval_hg_ha)
+    return {"p10": p10, "p50": p50, "p90": p90}
+
+
+def _context_from_prediction(
+    payload: PredictionInput,
+    predicted_yield_hg_ha: float,
+    version: str | None = None,
+    interval_hg_ha: tuple[float, float, float] | None = None,
+) -> dict:
     predicted_yield_t_ha = predicted_yield_hg_ha / 10000.0
+    interval_t_ha = _interval_t_ha(interval_hg_ha)
     risk_level, warnings = analyze_risk(payload)
     planting_schedule = build_planting_schedule(payload)
     food_security_level, expected_production_tons, food_security_notes = assess_food_security(
-        payload, predicted_yield_t_ha, risk_level
+        payload, predicted_yield_t_ha, risk_level, interval_t_ha["p10"] if interval_t_ha else None
     )
 
     return {
         "predicted_yield_hg_ha": predicted_yield_hg_ha,
         "predicted_yield_t_ha": predicted_yield_t_ha,
+        "yield_interval_t_ha": interval_t_ha,
         "risk_level": risk_level,
         "warnings": warnings,
         "expected_production_tons": expected_production_tons,
         "food_security_level": food_security_level,
         "food_security_notes": food_security_notes,
         "planting_schedule": planting_schedule,
+        "model_version": version,
     }
 
 
+def _contexts_from_predictions(
+    payloads: list[PredictionInput],
+    predictions_hg_ha: list[float],
+    version: str | None = None,
+    intervals_hg_ha: list[tuple[float, float, float]] | None = None,
+) -> list[dict]:
+    # Batch form of _context_from_prediction: each rule set runs once over all rows.
+    columns = payload_columns(payloads)
+    predicted_t_ha = [value / 10000.0 for value in predictions_hg_ha]
+    intervals = [_interval_t_ha(interval) for interval in intervals_hg_ha] if intervals_hg_ha else None
+    risk_levels, warnings = analyze_risk_many(columns)
+    schedules = build_planting_schedules(columns)
+    food_security_levels, production, food_security_notes = assess_food_security_many(
+        columns, predicted_t_ha, risk_levels, [interval["p10"] for interval in intervals] if intervals else None
+    )
+    return [
+        {
+            "predicted_yield_hg_ha": predictions_hg_ha[row],
+            "predicted_yield_t_ha": predicted_t_ha[row],
+            "yield_interval_t_ha": intervals[row] if intervals else None,
+            "risk_level": risk_levels[row],
+            "warnings": warnings[row],
+            "expected_production_tons": production[row],
+            "food_security_level": food_security_levels[row],
+            "food_security_notes": food_security_notes[row],
+            "planting_schedule": schedules[row],
+            "model_version": version,
+        }
+        for row in range(len(payloads))
+    ]
+
+
+def _complete_payload(
+    payload: PredictionInput, skip: set[str] | frozenset = frozenset()
+) -> tuple[PredictionInput, dict | None]:
+    # Fills omitted climate fields from the reference index and describes the historical
+    # record next to the prediction. Raises ValueError when a field cannot be filled.
+    missing = [field for field in CLIMATE_FIELDS if getattr(payload, field) is None and field not in skip]
+    index = get_reference_index()
+    if index is None:
+        if missing:
+            raise ValueError(f"Reference data is unavailable; {', '.join(missing)} must be provided")
+        return payload, None
+
+    filled = index.climate(payload.area, payload.year, missing) if missing else {}
+    if filled:
+        payload = payload.model_copy(update={field: value for field, (value, _) in filled.items()})
+    observed = index.observed_yield(payload.area, payload.item, payload.year)
+    return payload, {
+        "known_area": index.is_known_area(payload.area),
+        "known_item": index.is_known_item(payload.item),
+        "observed_yield_t_ha": observed[0] / 10000.0 if observed else None,
+        "observed_year": observed[1] if observed else None,
+        "filled": {field: {"value": value, "year": year} for field, (value, year) in filled.items()},
+    }
+
+
+def _build_prediction_context(payload: PredictionInput) -> dict:
+    # Contexts are shared between cache hits, so callers must treat them as read-only.
+    model = _run_inference(active_model)
+    cache_key = tuple(payload.model_dump().values())
+    context = prediction_cache.get(model.version, cache_key)
+    if context is not None:
+        return context
+
+    with STAGE_SECONDS.time(stage="predict_yield"):
+        predicted_yield_hg_ha, grain_rankings = _run_inference(score_with_grain_candidates, payload, model)
+    interval = None
+    if settings.prediction_intervals and supports_intervals(model):
+        with STAGE_SECONDS.time(stage="intervals"):
+            _, intervals = _run_inference(predict_intervals, [payload], model)
+        interval = intervals[0]
+    with STAGE_SECONDS.time(stage="rules"):
+        rule_context = _context_from_prediction(payload, predicted_yield_hg_ha, model.version, interval)
+    context = {**rule_context, "grain_rankings": grain_rankings}
+    prediction_cache.set(model.version, cache_key, context)
+    return context
+
+
+def _prediction_context(payload: PredictionInput) -> tuple[PredictionInput, dict]:
+    try:
+        with STAGE_SECONDS.time(stage="reference"):
+            payload, reference = _complete_payload(payload)
+    except ValueError as exc:
+        raise HTTPException(status_code=422, detail=str(exc)) from exc
+    # The reference block depends on which fields the request omitted, so it stays out of the cache.
+    return payload, {**_build_prediction_context(payload), "reference": reference}
+
+
+async def _watch_model_source() -> None:
+    # Every worker polls the registry manifest (or MODEL_PATH) so a version activated
+    # through one worker, or published from the CLI, reaches all of them.
+    while True:
+        await asyncio.sleep(settings.model_watch_interval_seconds)
+        try:
+            await asyncio.to_thread(reload_if_changed)
+        except (FileNotFoundError, ValueError) as exc:
+            logger.error("Model reload failed; keeping version %s: %s", model_version(), exc)
+        except Exception:
+            # Anything else (unreadable manifest, malformed registry) must not end the
+            # watcher, or this worker would never pick up another version.
+            logger.exception("Model watcher check failed; keeping version %s", model_version())
+
+
 @asynccontextmanager
 async def lifespan(_: FastAPI):
     init_db()
+    # A broken rule or advisory template table should stop startup, not fail every request later.
+    get_rule_engine()
+    get_advisory_templates()
+    # Built from the CSVs on first start, then read from its binary cache.
+    get_reference_index()
     try:
-        load_model()
+        reload_model()
         logger.info("Model loaded successfully")
     except (FileNotFoundError, RuntimeError, ValueError) as exc:
         logger.error("Model loading failed; API will run in degraded mode: %s", exc)
+        # Training never blocks startup; the trained version is swapped in when ready.
+        if settings.train_on_startup and train_in_background():
+            logger.info("Training a model in the background")
+    watcher = (
+        asyncio.create_task(_watch_model_source()) if settings.model_watch_interval_seconds > 0 else None
+    )
+    advisory_jobs.start()
     yield
+    if watcher is not None:
+        watcher.cancel()
+        await asyncio.gather(watcher, return_exceptions=True)
+    await advisory_jobs.stop()
+    await close_http_client()
+    close_db()
 
 
 app = FastAPI(
@@ -70,44 +282,458 @@ app = FastAPI(
     lifespan=lifespan,
 )
 
+app.add_middleware(MetricsMiddleware)
 app.add_middleware(
     CORSMiddleware,
     allow_origins=_parsed_origins(),
     allow_credentials=True,
     allow_methods=["GET", "POST", "OPTIONS"],
-    allow_headers=["Authorization", "Content-Type"],
+    allow_headers=["Authorization", "Content-Type", "X-Admin-Token"],
 )
 
 
 @app.get("/health", response_model=HealthResponse)
 def health() -> HealthResponse:
     status = "ok" if is_model_loaded() else "degraded"
-    return HealthResponse(status=status, model_loaded=is_model_loaded(), db_ready=db_is_ready())
+    return HealthResponse(
+        status=status,
+        model_loaded=is_model_loaded(),
+        db_ready=db_is_ready(),
+        reference_data_ready=get_reference_index() is not None,
+        model_version=model_version(),
+        prediction_cache=CacheStats(**prediction_cache.stats()),
+    )
 
 
-@app.post("/predict", response_model=PredictionResponse)
-def predict(payload: PredictionInput) -> PredictionResponse:
-    context = _build_prediction_context(payload)
-    advisory = generate_advisory(
+@app.get("/metrics", include_in_schema=False)
+def metrics() -> PlainTextResponse:
+    if not settings.metrics_enabled:
+        raise HTTPException(status_code=404, detail="Not Found")
+    return PlainTextResponse(metrics_registry.render(), media_type=METRICS_CONTENT_TYPE)
+
+
+def _observe_validation(request: Request) -> None:
+    # Body parsing and pydantic validation happen before the endpoint runs, so their cost
+    # is the time since the metrics middleware saw the request.
+    started_at = getattr(request.state, "started_at", None)
+    if started_at is not None:
+        STAGE_SECONDS.observe(time.perf_counter() - started_at, stage="validation")
+
+
+async def _save_prediction(record: dict) -> str | None:
+    with STAGE_SECONDS.time(stage="save_prediction"):
+        return await run_in_threadpool(save_prediction, record)
+
+
+def _advisory_locale(lang: str | None) -> str:
+    try:
+        return get_advisory_templates().resolve_locale(lang)
+    except ValueError as exc:
+        raise HTTPException(status_code=422, detail=str(exc)) from exc
+
+
+async def _generate_prediction_advisory(
+    payload: PredictionInput, context: dict, locale: str, use_llm: bool = True
+) -> str:
+    return await generate_advisory(
         payload,
         context["predicted_yield_t_ha"],
         context["risk_level"],
         context["planting_schedule"],
         context["food_security_level"],
+        context["grain_rankings"],
+        locale,
+        use_llm=use_llm,
     )
 
+
+async def _deferred_prediction(payload: PredictionInput, context: dict, locale: str) -> PredictionResponse | None:
+    record = {
+        **payload.model_dump(),
+        **context,
+        "advisory": "",
+        "advisory_status": "pending",
+    }
+    inserted_id = await _save_prediction(record)
+    if inserted_id is None:
+        return None
+
+    if advisory_jobs.submit(AdvisoryJob(inserted_id, payload, context, locale)):
+        return PredictionResponse(
+            **context, advisory="", prediction_id=inserted_id, advisory_status="pending"
+        )
+
+    # The queue is full: answer inline, but complete the row already saved rather than
+    # inserting a second one.
+    logger.warning("Advisory job could not be queued; generating the advisory inline")
+    advisory = await _generate_prediction_advisory(payload, context, locale)
+    if not await run_in_threadpool(update_advisory, inserted_id, advisory, "ready"):
+        logger.warning("Advisory for prediction %s could not be stored", inserted_id)
+    return PredictionResponse(**context, advisory=advisory, prediction_id=inserted_id)
+
+
+@app.post("/predict", response_model=PredictionResponse)
+async def predict(
+    request: Request,
+    payload: PredictionInput,
+    defer_advisory: bool = Query(default=False),
+    llm: bool = Query(default=True),
+    lang: str | None = Query(default=None, max_length=16),
+) -> PredictionResponse:
+    _observe_validation(request)
+    locale = _advisory_locale(lang)
+    payload, context = await run_in_threadpool(_prediction_context, payload)
+    # Template advisories render in microseconds, so only LLM advisories are worth deferring.
+    if defer_advisory and llm:
+        deferred = await _deferred_prediction(payload, context, locale)
+        if deferred is not None:
+            return deferred
+
+    advisory = await _generate_prediction_advisory(payload, context, locale, use_llm=llm)
+
     record = {
         **payload.model_dump(),
         **context,
         "advisory": advisory,
     }
-    inserted_id = save_prediction(record)
+    inserted_id = await _save_prediction(record)
     if inserted_id is None:
         logger.warning("Prediction was generated but could not be persisted to SQLite")
 
-    return PredictionResponse(**context, advisory=advisory)
+    return PredictionResponse(**context, advisory=advisory, prediction_id=inserted_id)
+
+
+def _sse_event(event: str, data) -> str:
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+
+async def _prediction_event_stream(payload: PredictionInput, context: dict, locale: str) -> AsyncIterator[str]:
+    yield _sse_event("context", PredictionContext(**context).model_dump())
+
+    advisory_parts: list[str] = []
+    grain_suggestions = ""
+    async for event, text in stream_advisory(
+        payload,
+        context["predicted_yield_t_ha"],
+        context["risk_level"],
+        context["planting_schedule"],
+        context["food_security_level"],
+        context["grain_rankings"],
+        locale,
+    ):
+        if event == "token":
+            advisory_parts.append(text)
+        elif event == "fallback":
+            advisory_parts = [text]
+        elif event == "grains":
+            grain_suggestions = text
+        yield _sse_event(event, text)
+
+    advisory = "".join(advisory_parts).strip()
+    if grain_suggestions:
+        advisory = f"{advisory}\n\n{grain_suggestions}"
+    record = {
+        **payload.model_dump(),
+        **context,
+        "advisory": advisory,
+    }
+    inserted_id = await _save_prediction(record)
+    if inserted_id is None:
+        logger.warning("Streamed prediction could not be persisted to SQLite")
+    yield _sse_event("done", {"prediction_id": inserted_id})
+
+
+@app.post("/predict/stream")
+async def predict_stream(
+    request: Request,
+    payload: PredictionInput,
+    lang: str | None = Query(default=None, max_length=16),
+) -> StreamingResponse:
+    _observe_validation(request)
+    locale = _advisory_locale(lang)
+    payload, context = await run_in_threadpool(_prediction_context, payload)
+    return StreamingResponse(
+        _prediction_event_stream(payload, context, locale),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+@app.get("/advisory/{prediction_id}", response_model=AdvisoryStatusResponse)
+def advisory_status(prediction_id: str) -> AdvisoryStatusResponse:
+    advisory = get_advisory(prediction_id)
+    if advisory is None:
+        raise HTTPException(status_code=404, detail="Prediction not found")
+    return AdvisoryStatusResponse(**advisory)
+
+
+@app.post("/predict/batch", response_model=BatchPredictionResponse)
+def predict_batch(payload: BatchPredictionInput) -> BatchPredictionResponse:
+    items: list[PredictionInput] = []
+    references: list[dict | None] = []
+    for position, item in enumerate(payload.items):
+        try:
+            item, reference = _complete_payload(item)
+        except ValueError as exc:
+            raise HTTPException(status_code=422, detail=f"items[{position}]: {exc}") from exc
+        items.append(item)
+        references.append(reference)
+
+    model = _run_inference(active_model)
+    intervals = None
+    if settings.prediction_intervals:
+        predictions, intervals = _run_inference(predict_intervals, items, model)
+    else:
+        predictions = _run_inference(predict_yields, items, model)
+    contexts = _contexts_from_predictions(items, predictions, model.version, intervals)
+    for context, reference in zip(contexts, references):
+        context["reference"] = reference
+
+    # Batch scenarios skip the LLM advisory; rows are stored with an empty advisory.
+    records = [
+        {**item.model_dump(), **context, "advisory": ""}
+        for item, context in zip(items, contexts)
+    ]
+    inserted_ids = save_predictions(records)
+    if inserted_ids is None:
+        logger.warning("Batch of %d predictions could not be persisted to SQLite", len(records))
+
+    return BatchPredictionResponse(
+        count=len(contexts),
+        persisted=inserted_ids is not None,
+        results=[PredictionContext(**context) for context in contexts],
+    )
+
+
+@app.post("/predict/sweep", response_model=PredictionSweepResponse)
+def predict_sweep(payload: PredictionSweepInput) -> PredictionSweepResponse:
+    # Only base values that no range replaces need filling.
+    try:
+        base, reference = _complete_payload(payload.base, skip=swept_fields(payload))
+    except ValueError as exc:
+        raise HTTPException(status_code=422, detail=str(exc)) from exc
+    payload = payload.model_copy(update={"base": base})
+    axes = sweep_axes(payload)
+    shape = grid_shape(axes)
+    count = math.prod(shape)
+    if count > settings.sweep_max_points:
+        raise HTTPException(
+            status_code=422,
+            detail=f"Sweep expands to {count} points; the limit is {settings.sweep_max_points}",
+        )
+
+    # The whole grid is scored in one model call; sweeps skip the advisory and are not stored.
+    model = _run_inference(active_model)
+    predictions = _run_inference(predict_columns, expand_grid(payload.base, axes), model)
+    return PredictionSweepResponse(
+        count=count,
+        model_version=model.version,
+        axes=SweepAxes(
+            year=axes["Year"].tolist(),
+            average_rain_fall_mm_per_year=axes["average_rain_fall_mm_per_year"].tolist(),
+            avg_temp=axes["avg_temp"].tolist(),
+            pesticides_tonnes=axes["pesticides_tonnes"].tolist(),
+        ),
+        shape=list(shape),
+        predicted_yield_t_ha=(predictions / 10000.0).tolist(),
+        risk_level=sweep_risk_levels(payload.base, axes),
+        reference=reference,
+    )
+
+
+def _category_list(values: list[str]) -> CategoryList:
+    return CategoryList(count=len(values), values=values)
+
+
+@app.get("/areas", response_model=CategoryList)
+def list_areas() -> CategoryList:
+    index = get_reference_index()
+    if index is None:
+        raise HTTPException(status_code=503, detail="Reference data is unavailable")
+    return _category_list(index.model_areas)
+
+
+@app.get("/items", response_model=CategoryList)
+def list_items() -> CategoryList:
+    index = get_reference_index()
+    if index is None:
+        raise HTTPException(status_code=503, detail="Reference data is unavailable")
+    return _category_list(index.items)
+
+
+def _history_filters(
+    area: str | None = Query(default=None, min_length=2, max_length=100),
+    item: str | None = Query(default=None, min_length=2, max_length=100),
+    year_min: int | None = Query(default=None, ge=1990, le=2100),
+    year_max: int | None = Query(default=None, ge=1990, le=2100),
+    risk_level: Literal["Low", "Medium", "High"] | None = Query(default=None),
+) -> dict:
+    return {
+        "area": area,
+        "item": item,
+        "year_min": year_min,
+        "year_max": year_max,
+        "risk_level": risk_level,
+    }
 
 
 @app.get("/history", response_model=list[HistoryItem])
-def history(limit: int = Query(default=20, ge=1, le=100)) -> list[HistoryItem]:
-    return [HistoryItem(**item) for item in get_recent_predictions(limit=limit)]
+def history(
+    limit: int = Query(default=20, ge=1, le=100),
+    filters: dict = Depends(_history_filters),
+) -> list[HistoryItem]:
+    return [HistoryItem(**item) for item in get_recent_predictions(limit=limit, **filters)]
+
+
+@app.get("/history/page", response_model=HistoryPage)
+def history_page(
+    limit: int = Query(default=50, ge=1, le=1000),
+    cursor: str | None = Query(default=None, max_length=200),
+    filters: dict = Depends(_history_filters),
+) -> HistoryPage:
+    try:
+        items, next_cursor = get_predictions_page(limit=limit, cursor=cursor, **filters)
+    except ValueError as exc:
+        raise HTTPException(status_code=400, detail=str(exc)) from exc
+    return HistoryPage(items=[HistoryItem(**item) for item in items], next_cursor=next_cursor)
+
+
+@app.get("/analytics/areas", response_model=list[AnalyticsGroup])
+def analytics_areas(
+    item: str | None = Query(default=None, min_length=2, max_length=100),
+    limit: int = Query(default=100, ge=1, le=1000),
+) -> list[AnalyticsGroup]:
+    return [AnalyticsGroup(**group) for group in get_area_analytics(item=item, limit=limit)]
+
+
+@app.get("/analytics/crops", response_model=list[AnalyticsGroup])
+def analytics_crops(
+    area: str | None = Query(default=None, min_length=2, max_length=100),
+    limit: int = Query(default=100, ge=1, le=1000),
+) -> list[AnalyticsGroup]:
+    return [AnalyticsGroup(**group) for group in get_crop_analytics(area=area, limit=limit)]
+
+
+@app.get("/analytics/timeseries", response_model=list[AnalyticsBucket])
+def analytics_timeseries(
+    bucket: Literal["day", "month", "year"] = Query(default="month"),
+    area: str | None = Query(default=None, min_length=2, max_length=100),
+    item: str | None = Query(default=None, min_length=2, max_length=100),
+    date_from: date | None = Query(default=None),
+    date_to: date | None = Query(default=None),
+) -> list[AnalyticsBucket]:
+    buckets = get_timeseries(
+        bucket=bucket,
+        area=area,
+        item=item,
+        date_from=date_from.isoformat() if date_from else None,
+        date_to=date_to.isoformat() if date_to else None,
+    )
+    return [AnalyticsBucket(**entry) for entry in buckets]
+
+
+def _require_admin(x_admin_token: str | None = Header(default=None)) -> None:
+    if not settings.admin_token:
+        raise HTTPException(status_code=403, detail="Admin endpoints are disabled; set ADMIN_TOKEN")
+    if x_admin_token is None or not hmac.compare_digest(x_admin_token, settings.admin_token):
+        raise HTTPException(status_code=401, detail="Invalid admin token")
+
+
+@app.get("/export/predictions", dependencies=[Depends(_require_admin)])
+def export_predictions_route(
+    export_format: Literal["ndjson", "csv", "parquet"] = Query(default="ndjson", alias="format"),
+    date_from: date | None = Query(default=None),
+    date_to: date | None = Query(default=None),
+) -> StreamingResponse:
+    # Parquet is an optional extra: pyarrow is not in requirements.txt, and without it the
+    # format answers 501 while ndjson and csv keep working.
+    try:
+        chunks = export_predictions(
+            export_format,
+            created_from=date_from.isoformat() if date_from else None,
+            created_to=(date_to + timedelta(days=1)).isoformat() if date_to else None,
+        )
+    except RuntimeError as exc:
+        raise HTTPException(status_code=501, detail=str(exc)) from exc
+    filename = f"predictions.{export_format}"
+    return StreamingResponse(
+        chunks,
+        media_type=EXPORT_MEDIA_TYPES[export_format],
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'},
+    )
+
+
+async def _request_lines(request: Request) -> AsyncIterator[bytes]:
+    pending = b""
+    async for chunk in request.stream():
+        pending += chunk
+        *lines, pending = pending.split(b"\n")
+        for line in lines:
+            yield line
+    if pending:
+        yield pending
+
+
+@app.post("/import/predictions", response_model=BulkImportResponse, dependencies=[Depends(_require_admin)])
+async def import_predictions_route(request: Request) -> BulkImportResponse:
+    # The NDJSON body is read incrementally and validated in batches into a spool file;
+    # only a fully valid archive is written, one transaction per batch.
+    line_number = 1
+    batch: list[bytes] = []
+    spool = ImportSpool()
+    try:
+        async for line in _request_lines(request):
+            batch.append(line)
+            if len(batch) >= IMPORT_BATCH_SIZE:
+                await run_in_threadpool(spool.add, parse_ndjson(batch, line_number))
+                line_number += len(batch)
+                batch = []
+        if batch:
+            await run_in_threadpool(spool.add, parse_ndjson(batch, line_number))
+        imported = await run_in_threadpool(spool.commit, IMPORT_BATCH_SIZE)
+    except ValueError as exc:
+        raise HTTPException(status_code=400, detail=f"{exc}; nothing was imported") from exc
+    except sqlite3.IntegrityError as exc:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Rejected by the database: {exc}; {spool.imported} of {spool.count} records imported before the error",
+        ) from exc
+    except (sqlite3.OperationalError, TimeoutError) as exc:
+        logger.error("Bulk import failed after %d of %d records: %s", spool.imported, spool.count, exc)
+        raise HTTPException(
+            status_code=503,
+            detail=f"Database is unavailable; {spool.imported} of {spool.count} records imported before the error",
+        ) from exc
+    finally:
+        spool.close()
+    return BulkImportResponse(imported=imported)
+
+
+@app.get("/admin/models", response_model=ModelRegistryResponse, dependencies=[Depends(_require_admin)])
+def list_models() -> ModelRegistryResponse:
+    try:
+        manifest = read_manifest()
+    except ValueError as exc:
+        raise HTTPException(status_code=500, detail=str(exc)) from exc
+    return ModelRegistryResponse(
+        active_version=manifest["active"],
+        loaded_version=model_version(),
+        versions=manifest["versions"],
+    )
+
+
+@app.post("/admin/model/reload", response_model=ModelReloadResponse, dependencies=[Depends(_require_admin)])
+def reload_model_route(version: str | None = Query(default=None, max_length=64)) -> ModelReloadResponse:
+    previous_version = model_version()
+    if version is not None:
+        try:
+            activate_model_version(version)
+        except (KeyError, FileNotFoundError) as exc:
+            raise HTTPException(status_code=404, detail=f"Unknown model version {version}") from exc
+        except TimeoutError as exc:
+            raise HTTPException(status_code=503, detail="Model registry is busy; retry shortly") from exc
+    try:
+        loaded = reload_model()
+    except (FileNotFoundError, ValueError) as exc:
+        raise HTTPException(status_code=409, detail=f"Model reload failed; still serving {previous_version}: {exc}") from exc
+    return ModelReloadResponse(previous_version=previous_version, model_version=loaded.version)
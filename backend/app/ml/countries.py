@@ -0,0 +1,43 @@
+# FAO names (yield.csv, pesticides.csv) are canonical. Rainfall uses World Bank names and
+# temperature uses Berkeley Earth names; both are mapped onto the FAO spelling.
+COUNTRY_ALIASES = {
+    "Bolivia": "Bolivia (Plurinational State of)",
+    "Bosnia And Herzegovina": "Bosnia and Herzegovina",
+    "Congo (Democratic Republic Of The)": "Democratic Republic of the Congo",
+    "Congo, Dem. Rep.": "Democratic Republic of the Congo",
+    "Congo, Rep.": "Congo",
+    "Cote d'Ivoire": "Côte d'Ivoire",
+    "Côte D'Ivoire": "Côte d'Ivoire",
+    "Czech Republic": "Czechia",
+    "Guinea Bissau": "Guinea-Bissau",
+    "Hong Kong": "China, Hong Kong SAR",
+    "Hong Kong SAR, China": "China, Hong Kong SAR",
+    "Iran": "Iran (Islamic Republic of)",
+    "Kyrgyz Republic": "Kyrgyzstan",
+    "Lao PDR": "Lao People's Democratic Republic",
+    "Laos": "Lao People's Democratic Republic",
+    "Macao SAR, China": "China, Macao SAR",
+    "Macedonia": "The former Yugoslav Republic of Macedonia",
+    "Micronesia": "Micronesia (Federated States of)",
+    "Moldova": "Republic of Moldova",
+    "North Korea": "Democratic People's Republic of Korea",
+    "Russia": "Russian Federation",
+    "Slovak Republic": "Slovakia",
+    "South Korea": "Republic of Korea",
+    "St. Kitts and Nevis": "Saint Kitts and Nevis",
+    "St. Lucia": "Saint Lucia",
+    "St. Vincent and the Grenadines": "Saint Vincent and the Grenadines",
+    "Syria": "Syrian Arab Republic",
+    "Taiwan": "China, Taiwan Province of",
+    "Tanzania": "United Republic of Tanzania",
+    "United States": "United States of America",
+    "Venezuela": "Venezuela (Bolivarian Republic of)",
+    "Venezuela, RB": "Venezuela (Bolivarian Republic of)",
+    "Vietnam": "Viet Nam",
+    "West Bank and Gaza": "Occupied Palestinian Territory",
+}
+
+
+def normalize_country(name: str) -> str:
+    cleaned = " ".join(str(name).split())
+    return COUNTRY_ALIASES.get(cleaned, cleaned)
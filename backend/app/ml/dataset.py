@@ -0,0 +1,186 @@
+import argparse
+import hashlib
+import logging
+import time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from .countries import normalize_country
+
+logger = logging.getLogger(__name__)
+
+RAW_DIR = Path(__file__).resolve().parent / "data"
+CACHE_DIR_NAME = ".cache"
+RAW_SOURCES = {
+    "yield": "yield.csv",
+    "rainfall": "rainfall.csv",
+    "temperature": "temp.csv",
+    "pesticides": "pesticides.csv",
+}
+# Bump when the join logic changes so cached frames built by older code are ignored.
+BUILD_VERSION = 1
+CHUNK_ROWS = 20_000
+KEYS = ["Area", "Year"]
+COLUMNS = [
+    "Area",
+    "Item",
+    "Year",
+    "hg/ha_yield",
+    "average_rain_fall_mm_per_year",
+    "pesticides_tonnes",
+    "avg_temp",
+]
+
+
+def _normalize_areas(frame: pd.DataFrame) -> pd.DataFrame:
+    # Map each distinct name once instead of per row.
+    names = frame["Area"].unique()
+    frame["Area"] = frame["Area"].map({name: normalize_country(name) for name in names})
+    return frame
+
+
+def source_fingerprint(raw_dir: Path) -> str:
+    digest = hashlib.sha256(f"build-v{BUILD_VERSION}".encode())
+    for name in sorted(RAW_SOURCES.values()):
+        digest.update(name.encode())
+        with open(raw_dir / name, "rb") as handle:
+            for block in iter(lambda: handle.read(1 << 20), b""):
+                digest.update(block)
+    return digest.hexdigest()
+
+
+def _chunks(path: Path, **kwargs):
+    return pd.read_csv(path, chunksize=CHUNK_ROWS, **kwargs)
+
+
+def _read_yield(path: Path) -> pd.DataFrame:
+    frames = []
+    for chunk in _chunks(path, usecols=["Area", "Element", "Item", "Year", "Value"]):
+        chunk = chunk[chunk["Element"] == "Yield"].drop(columns="Element")
+        frames.append(chunk.rename(columns={"Value": "hg/ha_yield"}))
+    frame = _normalize_areas(pd.concat(frames, ignore_index=True))
+    frame["hg/ha_yield"] = pd.to_numeric(frame["hg/ha_yield"], errors="coerce")
+    return frame.dropna(subset=["hg/ha_yield"])
+
+
+def _read_rainfall(path: Path) -> pd.DataFrame:
+    frames = []
+    for chunk in _chunks(path):
+        chunk.columns = [column.strip() for column in chunk.columns]
+        chunk["average_rain_fall_mm_per_year"] = pd.to_numeric(
+            chunk["average_rain_fall_mm_per_year"], errors="coerce"
+        )
+        frames.append(chunk.dropna(subset=["average_rain_fall_mm_per_year"]))
+    frame = _normalize_areas(pd.concat(frames, ignore_index=True))
+    return frame.groupby(KEYS, as_index=False)["average_rain_fall_mm_per_year"].mean()
+
+
+def _read_pesticides(path: Path) -> pd.DataFrame:
+    frames = []
+    for chunk in _chunks(path, usecols=["Area", "Element", "Year", "Value"]):
+        chunk = chunk[chunk["Element"] == "Use"].drop(columns="Element")
+        frames.append(chunk.rename(columns={"Value": "pesticides_tonnes"}))
+    frame = _normalize_areas(pd.concat(frames, ignore_index=True))
+    frame["pesticides_tonnes"] = pd.to_numeric(frame["pesticides_tonnes"], errors="coerce")
+    return frame.dropna(subset=["pesticides_tonnes"]).groupby(KEYS, as_index=False)["pesticides_tonnes"].mean()
+
+
+def _read_temperature(path: Path) -> pd.DataFrame:
+    # Several stations report per country-year; keep running sums/counts per chunk so the
+    # mean is exact without holding every reading at once.
+    partials = []
+    for chunk in _chunks(path):
+        chunk = chunk.rename(columns={"year": "Year", "country": "Area"}).dropna(subset=["avg_temp"])
+        partials.append(chunk.groupby(KEYS)["avg_temp"].agg(["sum", "count"]))
+    totals = pd.concat(partials).reset_index()
+    totals = _normalize_areas(totals).groupby(KEYS, as_index=False)[["sum", "count"]].sum()
+    totals["avg_temp"] = totals["sum"] / totals["count"]
+    return totals[[*KEYS, "avg_temp"]]
+
+
+def join_raw_sources(raw_dir: Path) -> pd.DataFrame:
+    frame = (
+        _read_yield(raw_dir / RAW_SOURCES["yield"])
+        .merge(_read_rainfall(raw_dir / RAW_SOURCES["rainfall"]), on=KEYS)
+        .merge(_read_pesticides(raw_dir / RAW_SOURCES["pesticides"]), on=KEYS)
+        .merge(_read_temperature(raw_dir / RAW_SOURCES["temperature"]), on=KEYS)
+    )
+    frame = frame[COLUMNS].sort_values(["Area", "Item", "Year"], kind="stable").reset_index(drop=True)
+    frame["Year"] = frame["Year"].astype(np.int64)
+    return frame
+
+
+def _has_pyarrow() -> bool:
+    try:
+        import pyarrow  # noqa: F401
+    except ImportError:
+        return False
+    return True
+
+
+def _cache_path(cache_dir: Path, fingerprint: str) -> Path:
+    # Parquet when pyarrow is installed, otherwise one uncompressed numpy array per column.
+    suffix = "parquet" if _has_pyarrow() else "npz"
+    return cache_dir / f"training_{fingerprint[:16]}.{suffix}"
+
+
+def _write_cache(frame: pd.DataFrame, path: Path) -> None:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = path.with_name(f"{path.name}.tmp")
+    if path.suffix == ".parquet":
+        frame.to_parquet(tmp_path, index=False)
+    else:
+        arrays = {column: frame[column].to_numpy() for column in COLUMNS}
+        for column in ("Area", "Item"):
+            arrays[column] = arrays[column].astype(str)
+        with open(tmp_path, "wb") as handle:
+            np.savez(handle, **arrays)
+    tmp_path.replace(path)
+
+
+def _read_cache(path: Path) -> pd.DataFrame:
+    if path.suffix == ".parquet":
+        return pd.read_parquet(path)
+    with np.load(path, allow_pickle=False) as arrays:
+        return pd.DataFrame({column: arrays[column] for column in COLUMNS}).astype({"Area": object, "Item": object})
+
+
+def build_training_frame(
+    raw_dir: str | Path | None = None,
+    cache_dir: str | Path | None = None,
+    use_cache: bool = True,
+) -> tuple[pd.DataFrame, str]:
+    source_dir = Path(raw_dir) if raw_dir else RAW_DIR
+    fingerprint = source_fingerprint(source_dir)
+    cache_file = _cache_path(Path(cache_dir) if cache_dir else source_dir / CACHE_DIR_NAME, fingerprint)
+
+    if use_cache and cache_file.exists():
+        try:
+            return _read_cache(cache_file), fingerprint
+        except (OSError, ValueError, KeyError) as exc:
+            logger.warning("Ignoring unreadable training cache %s: %s", cache_file, exc)
+
+    frame = join_raw_sources(source_dir)
+    if use_cache:
+        _write_cache(frame, cache_file)
+    return frame, fingerprint
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Join the raw FAO CSVs into a training frame.")
+    parser.add_argument("--raw-dir", default=None, help="Directory with the raw CSVs (default: app/ml/data)")
+    parser.add_argument("--no-cache", action="store_true", help="Rebuild without reading or writing the cache")
+    parser.add_argument("--out", default=None, help="Also write the joined frame as CSV")
+    args = parser.parse_args()
+
+    started = time.perf_counter()
+    training_frame, source_hash = build_training_frame(args.raw_dir, use_cache=not args.no_cache)
+    elapsed = time.perf_counter() - started
+    print(
+        f"{len(training_frame)} rows, {training_frame['Area'].nunique()} areas, "
+        f"{training_frame['Item'].nunique()} crops in {elapsed:.2f}s (sources {source_hash[:16]})"
+    )
+    if args.out:
+        training_frame.to_csv(args.out, index=False)
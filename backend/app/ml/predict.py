@@ -1,17 +1,22 @@
+import logging
+import tempfile
+import time
+from collections.abc import Sequence
+from dataclasses import dataclass
 from pathlib import Path
-from threading import Lock
+from threading import Lock, Thread
 import warnings
 
-import joblib
-import pandas as pd
+import numpy as np
 
 from ..config import get_settings
+from ..metrics import MODEL_LOAD_FAILURES
 from ..schemas import PredictionInput
-from .train_model import train_model
+from . import registry
+from .compiled import CompiledPipeline
 
+logger = logging.getLogger(__name__)
 _settings = get_settings()
-_model = None
-_model_lock = Lock()
 EXPECTED_COLUMNS = {
     "Area",
     "Item",
@@ -20,54 +25,290 @@ EXPECTED_COLUMNS = {
     "pesticides_tonnes",
     "avg_temp",
 }
+INTERVAL_QUANTILES = (0.1, 0.5, 0.9)
 
 
-def load_model(model_path: str | None = None):
-    global _model
-    model_file = model_path or _settings.model_path
+# Everything a request needs from one model version. Requests take a reference to the
+# active instance once, so a reload swapping _active mid-request cannot mix versions.
+# pipeline is None when the model was served from the memory-mapped compiled layout;
+# load_model() reads the sklearn pipeline from disk on demand in that case.
+@dataclass(frozen=True)
+class LoadedModel:
+    pipeline: object | None
+    compiled: CompiledPipeline | None
+    version: str
+    path: Path
+    signature: tuple
+    loaded_at: float
 
-    if _model is not None:
-        return _model
 
-    with _model_lock:
-        if _model is None:
-            path = Path(model_file)
-            if not path.exists():
-                # Auto-recover in local deployments: train if model artifact is missing.
-                train_model(model_path=path)
-            _model = joblib.load(path)
-            feature_names = set(getattr(_model, "feature_names_in_", []))
-            if feature_names and feature_names != EXPECTED_COLUMNS:
-                # Auto-recover when an old schema model exists.
-                train_model(model_path=path)
-                _model = joblib.load(path)
+_active: LoadedModel | None = None
+_load_error: tuple[tuple, Exception] | None = None
+_load_lock = Lock()
+_training_lock = Lock()
+_training_thread: Thread | None = None
 
-    return _model
 
+def _compile(model) -> CompiledPipeline | None:
+    try:
+        return CompiledPipeline.from_pipeline(model)
+    except (AttributeError, TypeError, ValueError) as exc:
+        logger.info("Using sklearn inference; pipeline could not be compiled: %s", exc)
+        return None
 
-def is_model_loaded() -> bool:
-    return _model is not None
 
+def source_signature() -> tuple:
+    # Changes whenever the manifest or the artifact it points to is replaced.
+    path, version = registry.resolve_artifact()
+    try:
+        stat = path.stat()
+    except FileNotFoundError:
+        return (str(path), version, None, None)
+    return (str(path), version, stat.st_mtime_ns, stat.st_size)
 
-def predict_yield(payload: PredictionInput) -> float:
-    model = load_model()
-    row = pd.DataFrame(
-        [
-            {
-                "Area": payload.area,
-                "Item": payload.item,
-                "Year": payload.year,
-                "average_rain_fall_mm_per_year": payload.average_rain_fall_mm_per_year,
-                "pesticides_tonnes": payload.pesticides_tonnes,
-                "avg_temp": payload.avg_temp,
-            }
-        ]
+
+def _read_pipeline(path: Path):
+    # joblib (and sklearn, while unpickling) load only on this path; serving from the
+    # compiled layout never imports them.
+    import joblib
+
+    try:
+        model = joblib.load(path)
+    except Exception as exc:
+        # Covers truncated or half-copied files as well as unpickling errors.
+        raise ValueError(f"Model artifact {path} could not be read: {exc}") from exc
+    feature_names = set(getattr(model, "feature_names_in_", []))
+    if feature_names and feature_names != EXPECTED_COLUMNS:
+        raise ValueError(f"Model artifact {path} was trained on an incompatible feature schema")
+    return model
+
+
+def _mapped_layout(path: Path, version: str) -> CompiledPipeline | None:
+    try:
+        compiled = CompiledPipeline.load(registry.compiled_layout_dir(path), version)
+    except ValueError:
+        return None
+    if {*compiled.numeric_columns, *compiled.categorical_columns} != EXPECTED_COLUMNS:
+        return None
+    return compiled
+
+
+def _export_layout(compiled: CompiledPipeline, path: Path, version: str) -> CompiledPipeline | None:
+    try:
+        compiled.save(registry.compiled_layout_dir(path), version)
+    except OSError as exc:
+        logger.warning("Could not write the compiled layout next to %s; serving from memory: %s", path, exc)
+        return None
+    return _mapped_layout(path, version)
+
+
+def _load_artifact() -> LoadedModel:
+    signature = source_signature()
+    path, version = registry.resolve_artifact()
+    if not path.exists():
+        raise FileNotFoundError(f"Model artifact not found at {path}")
+    version = version or registry.artifact_version(path)
+
+    # With model_mmap, tree models are served from .npy node arrays mapped read-only, so
+    # all workers share one physical copy and none of them keeps the unpickled pipeline.
+    # The first process to load an artifact writes that layout next to it.
+    pipeline = None
+    compiled = _mapped_layout(path, version) if _settings.model_mmap else None
+    if compiled is None:
+        pipeline = _read_pipeline(path)
+        compiled = _compile(pipeline)
+        if compiled is not None and _settings.model_mmap:
+            mapped = _export_layout(compiled, path, version)
+            if mapped is not None:
+                compiled, pipeline = mapped, None
+    return LoadedModel(
+        pipeline=pipeline,
+        compiled=compiled,
+        version=version,
+        path=path,
+        signature=signature,
+        loaded_at=time.time(),
     )
+
+
+def _swap(loaded: LoadedModel) -> None:
+    global _active
+    previous = _active
+    _active = loaded
+    if previous is None or previous.version != loaded.version:
+        logger.info(
+            "Model version %s is active (was %s)",
+            loaded.version,
+            previous.version if previous else None,
+        )
+
+
+def reload_model(missing_only: bool = False) -> LoadedModel:
+    global _load_error
+    # Loading and compiling finish before the swap; in-flight requests keep the model
+    # they already hold and new requests see the new one.
+    with _load_lock:
+        if missing_only and _active is not None:
+            return _active
+        try:
+            loaded = _load_artifact()
+        except (FileNotFoundError, ValueError) as exc:
+            MODEL_LOAD_FAILURES.inc()
+            _load_error = (source_signature(), exc)
+            raise
+        _load_error = None
+        _swap(loaded)
+    return loaded
+
+
+def active_model() -> LoadedModel:
+    loaded = _active
+    if loaded is not None:
+        return loaded
+    # Degraded mode: retry loading, but not while the same broken artifact is on disk.
+    failure = _load_error
+    if failure is not None and failure[0] == source_signature():
+        raise failure[1]
+    return reload_model(missing_only=True)
+
+
+def load_model():
+    loaded = active_model()
+    if loaded.pipeline is not None:
+        return loaded.pipeline
+    return _read_pipeline(loaded.path)
+
+
+def reload_if_changed() -> bool:
+    loaded = _active
+    signature = source_signature()
+    if loaded is not None and loaded.signature == signature:
+        return False
+    failure = _load_error
+    if failure is not None and failure[0] == signature:
+        return False
+    reload_model()
+    return True
+
+
+def _train_and_publish() -> None:
+    global _training_thread
+    try:
+        if not registry.acquire_training_lock():
+            logger.info("Another process is training the model; waiting for it to be published")
+            return
+        try:
+            # Lazy import: serving processes only pay for the training stack when they train.
+            from .train_model import train_model
+
+            with tempfile.TemporaryDirectory() as tmp_dir:
+                artifact = Path(tmp_dir) / registry.ARTIFACT_NAME
+                metrics = train_model(model_path=artifact)
+                version = registry.publish(artifact, activate=True, note="trained at startup")
+            logger.info("Trained and published model %s: %s", version, metrics)
+        finally:
+            registry.release_training_lock()
+        reload_model()
+    except Exception as exc:
+        logger.exception("Background model training failed: %s", exc)
+    finally:
+        _training_thread = None
+
+
+def train_in_background() -> bool:
+    global _training_thread
+    with _training_lock:
+        if _training_thread is not None:
+            return False
+        _training_thread = Thread(target=_train_and_publish, name="model-training", daemon=True)
+        _training_thread.start()
+    return True
+
+
+def is_model_loaded() -> bool:
+    return _active is not None
+
+
+def model_version() -> str | None:
+    loaded = _active
+    return loaded.version if loaded else None
+
+
+def known_items(model: LoadedModel | None = None) -> list[str]:
+    loaded = model or active_model()
+    if loaded.compiled is not None:
+        return loaded.compiled.categories("Item")
+    try:
+        encoder = loaded.pipeline.named_steps["preprocessor"].named_transformers_["ohe"]
+        return [str(value) for value in encoder.categories_[1]]
+    except (AttributeError, KeyError, IndexError):
+        return []
+
+
+def _feature_row(payload: PredictionInput) -> dict:
+    return {
+        "Area": payload.area,
+        "Item": payload.item,
+        "Year": payload.year,
+        "average_rain_fall_mm_per_year": payload.average_rain_fall_mm_per_year,
+        "pesticides_tonnes": payload.pesticides_tonnes,
+        "avg_temp": payload.avg_temp,
+    }
+
+
+def _feature_columns(payloads: list[PredictionInput]) -> dict[str, list]:
+    columns: dict[str, list] = {column: [] for column in EXPECTED_COLUMNS}
+    for payload in payloads:
+        for column, value in _feature_row(payload).items():
+            columns[column].append(value)
+    return columns
+
+
+def predict_columns(columns: dict[str, Sequence], model: LoadedModel | None = None) -> np.ndarray:
+    # Scores column-oriented feature data (one sequence per EXPECTED_COLUMNS entry) in one call.
+    loaded = model or active_model()
+    if loaded.compiled is not None:
+        return loaded.compiled.predict_many(columns)
+
+    import pandas as pd
+
     with warnings.catch_warnings():
         warnings.filterwarnings(
             "ignore",
             message="Found unknown categories in columns .* will be encoded as all zeros",
             category=UserWarning,
         )
-        prediction = model.predict(row)[0]
-    return float(prediction)
+        return np.asarray(loaded.pipeline.predict(pd.DataFrame(columns)), dtype=np.float64)
+
+
+def predict_yields(payloads: list[PredictionInput], model: LoadedModel | None = None) -> list[float]:
+    if not payloads:
+        return []
+
+    loaded = model or active_model()
+    if loaded.compiled is not None and len(payloads) == 1:
+        return [loaded.compiled.predict_one(_feature_row(payloads[0]))]
+    return predict_columns(_feature_columns(payloads), loaded).tolist()
+
+
+def supports_intervals(model: LoadedModel | None = None) -> bool:
+    # A single tree has no spread to report; intervals need a compiled tree ensemble.
+    loaded = model or active_model()
+    return loaded.compiled is not None and loaded.compiled.tree_count > 1
+
+
+def predict_intervals(
+    payloads: list[PredictionInput], model: LoadedModel | None = None
+) -> tuple[list[float], list[tuple[float, float, float]] | None]:
+    # Point predictions plus p10/p50/p90 of the per-tree predictions in hg/ha. The
+    # intervals are None for models without a tree ensemble to spread over.
+    loaded = model or active_model()
+    if not payloads or not supports_intervals(loaded):
+        return predict_yields(payloads, loaded), None
+
+    means, quantiles = loaded.compiled.predict_quantiles(_feature_columns(payloads), INTERVAL_QUANTILES)
+    return means.tolist(), [tuple(row) for row in quantiles.tolist()]
+
+
+def predict_yield(payload: PredictionInput) -> float:
+    return predict_yields([payload])[0]
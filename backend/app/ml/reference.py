@@ -0,0 +1,250 @@
+import argparse
+import csv
+import hashlib
+import logging
+import os
+import time
+from bisect import bisect_right
+from functools import lru_cache
+from pathlib import Path
+
+import numpy as np
+
+from ..config import get_settings
+from .countries import normalize_country
+
+logger = logging.getLogger(__name__)
+_settings = get_settings()
+
+DATA_DIR = Path(__file__).resolve().parent / "data"
+CACHE_DIR_NAME = ".cache"
+SOURCES = {
+    "observed": "yield_df.csv",
+    "rainfall": "rainfall.csv",
+    "temperature": "temp.csv",
+    "pesticides": "pesticides.csv",
+}
+# Bump when the parsing logic changes so caches built by older code are ignored.
+INDEX_VERSION = 1
+CLIMATE_FIELDS = ("average_rain_fall_mm_per_year", "pesticides_tonnes", "avg_temp")
+
+
+def _float(value: str) -> float | None:
+    try:
+        number = float(value)
+    except ValueError:
+        return None
+    return number if np.isfinite(number) else None
+
+
+def _accumulate(totals: dict[tuple, list[float]], key: tuple, value: float | None) -> None:
+    if value is None:
+        return
+    entry = totals.get(key)
+    if entry is None:
+        totals[key] = [value, 1.0]
+    else:
+        entry[0] += value
+        entry[1] += 1.0
+
+
+def _rows(path: Path):
+    with open(path, newline="", encoding="utf-8") as handle:
+        reader = csv.reader(handle)
+        header = [column.strip() for column in next(reader)]
+        for row in reader:
+            yield dict(zip(header, row))
+
+
+def _read_sources(data_dir: Path) -> tuple[dict[str, dict], dict]:
+    # Per (area, year) sums and counts; several readings per key are averaged, as dataset.py does.
+    climate: dict[str, dict] = {field: {} for field in CLIMATE_FIELDS}
+    areas: dict[str, str] = {}
+
+    def area(name: str) -> str:
+        canonical = areas.get(name)
+        if canonical is None:
+            canonical = areas[name] = normalize_country(name)
+        return canonical
+
+    for row in _rows(data_dir / SOURCES["rainfall"]):
+        value = _float(row["average_rain_fall_mm_per_year"])
+        _accumulate(climate["average_rain_fall_mm_per_year"], (area(row["Area"]), int(row["Year"])), value)
+    for row in _rows(data_dir / SOURCES["pesticides"]):
+        if row["Element"] == "Use":
+            _accumulate(climate["pesticides_tonnes"], (area(row["Area"]), int(row["Year"])), _float(row["Value"]))
+    for row in _rows(data_dir / SOURCES["temperature"]):
+        _accumulate(climate["avg_temp"], (area(row["country"]), int(float(row["year"]))), _float(row["avg_temp"]))
+
+    observed: dict[tuple, list[float]] = {}
+    for row in _rows(data_dir / SOURCES["observed"]):
+        _accumulate(observed, (area(row["Area"]), row["Item"], int(row["Year"])), _float(row["hg/ha_yield"]))
+    return climate, observed
+
+
+def _series(totals: dict[tuple, list[float]], group_codes: dict[tuple, int], n_groups: int) -> dict[str, np.ndarray]:
+    # One sorted run of (year, value) per group; offsets[g]:offsets[g + 1] slices group g.
+    keys = sorted(totals, key=lambda key: (group_codes[key[:-1]], key[-1]))
+    counts = np.bincount([group_codes[key[:-1]] for key in keys], minlength=n_groups)
+    offsets = np.zeros(n_groups + 1, dtype=np.int64)
+    np.cumsum(counts, out=offsets[1:])
+    return {
+        "offsets": offsets,
+        "years": np.array([key[-1] for key in keys], dtype=np.int32),
+        "values": np.array([totals[key][0] / totals[key][1] for key in keys], dtype=np.float64),
+    }
+
+
+def build_arrays(data_dir: Path) -> dict[str, np.ndarray]:
+    climate, observed = _read_sources(data_dir)
+    # Categories valid for the model are the ones it was trained on, i.e. the observed yields.
+    model_areas = sorted({key[0] for key in observed})
+    items = sorted({key[1] for key in observed})
+    other_areas = {key[0] for totals in climate.values() for key in totals} - set(model_areas)
+    areas = model_areas + sorted(other_areas)
+
+    # Model areas come first, so their codes are the same in both lookups.
+    area_codes = {(name,): code for code, name in enumerate(areas)}
+    pair_codes = {
+        (area_name, item_name): area_code * len(items) + item_code
+        for area_code, area_name in enumerate(model_areas)
+        for item_code, item_name in enumerate(items)
+    }
+
+    arrays = {
+        "areas": np.array(areas, dtype=str),
+        "items": np.array(items, dtype=str),
+        "model_area_count": np.array(len(model_areas), dtype=np.int64),
+    }
+    for field, totals in climate.items():
+        for name, array in _series(totals, area_codes, len(areas)).items():
+            arrays[f"{field}.{name}"] = array
+    for name, array in _series(observed, pair_codes, len(model_areas) * len(items)).items():
+        arrays[f"observed.{name}"] = array
+    return arrays
+
+
+def source_fingerprint(data_dir: Path) -> str:
+    digest = hashlib.sha256(f"reference-v{INDEX_VERSION}".encode())
+    for name in sorted(SOURCES.values()):
+        digest.update(name.encode())
+        with open(data_dir / name, "rb") as handle:
+            for block in iter(lambda: handle.read(1 << 20), b""):
+                digest.update(block)
+    return digest.hexdigest()
+
+
+def _write_cache(arrays: dict[str, np.ndarray], path: Path) -> None:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    # Workers may build the cache concurrently; each writes its own file and the last rename wins.
+    tmp_path = path.with_name(f"{path.name}.{os.getpid()}.tmp")
+    with open(tmp_path, "wb") as handle:
+        np.savez(handle, **arrays)
+    tmp_path.replace(path)
+
+
+def _read_cache(path: Path) -> dict[str, np.ndarray]:
+    with np.load(path, allow_pickle=False) as cached:
+        return {name: cached[name] for name in cached.files}
+
+
+class ReferenceIndex:
+    def __init__(self, arrays: dict[str, np.ndarray]):
+        self.areas: list[str] = arrays["areas"].tolist()
+        self.items: list[str] = arrays["items"].tolist()
+        self.model_areas = self.areas[: int(arrays["model_area_count"])]
+        self._area_codes = {name: code for code, name in enumerate(self.areas)}
+        self._model_area_codes = {name: code for code, name in enumerate(self.model_areas)}
+        self._item_codes = {name: code for code, name in enumerate(self.items)}
+        # Lookups bisect plain lists: for a single key that is far cheaper than a numpy call.
+        self._climate = {field: self._lists(arrays, field) for field in CLIMATE_FIELDS}
+        self._observed = self._lists(arrays, "observed")
+
+    @staticmethod
+    def _lists(arrays: dict[str, np.ndarray], prefix: str) -> tuple[list[int], list[int], list[float]]:
+        return tuple(arrays[f"{prefix}.{name}"].tolist() for name in ("offsets", "years", "values"))
+
+    @staticmethod
+    def _nearest(series: tuple[list[int], list[int], list[float]], group: int, year: int) -> tuple[float, int] | None:
+        # Latest value at or before the year, else the earliest one after it.
+        offsets, years, values = series
+        start, stop = offsets[group], offsets[group + 1]
+        if start == stop:
+            return None
+        position = max(bisect_right(years, year, start, stop) - 1, start)
+        return values[position], years[position]
+
+    def is_known_area(self, area: str) -> bool:
+        return area in self._model_area_codes
+
+    def is_known_item(self, item: str) -> bool:
+        return item in self._item_codes
+
+    def climate(self, area: str, year: int, fields=CLIMATE_FIELDS) -> dict[str, tuple[float, int]]:
+        code = self._area_codes.get(area)
+        found = {}
+        for field in fields:
+            value = None if code is None else self._nearest(self._climate[field], code, year)
+            if value is None:
+                raise ValueError(f"No historical {field} is available for area '{area}'")
+            found[field] = value
+        return found
+
+    def observed_yield(self, area: str, item: str, year: int) -> tuple[float, int] | None:
+        area_code = self._model_area_codes.get(area)
+        item_code = self._item_codes.get(item)
+        if area_code is None or item_code is None:
+            return None
+        return self._nearest(self._observed, area_code * len(self.items) + item_code, year)
+
+
+def load_reference_index(
+    data_dir: str | Path | None = None,
+    cache_dir: str | Path | None = None,
+    use_cache: bool = True,
+) -> ReferenceIndex:
+    source_dir = Path(data_dir) if data_dir else DATA_DIR
+    fingerprint = source_fingerprint(source_dir)
+    cache_file = (Path(cache_dir) if cache_dir else source_dir / CACHE_DIR_NAME) / f"reference_{fingerprint[:16]}.npz"
+
+    if use_cache and cache_file.exists():
+        try:
+            return ReferenceIndex(_read_cache(cache_file))
+        except (OSError, ValueError, KeyError) as exc:
+            logger.warning("Ignoring unreadable reference cache %s: %s", cache_file, exc)
+
+    try:
+        arrays = build_arrays(source_dir)
+    except (KeyError, ValueError, StopIteration) as exc:
+        raise ValueError(f"Reference data in {source_dir} could not be parsed: {exc}") from exc
+    if use_cache:
+        try:
+            _write_cache(arrays, cache_file)
+        except OSError as exc:
+            logger.warning("Reference cache %s could not be written: %s", cache_file, exc)
+    return ReferenceIndex(arrays)
+
+
+@lru_cache
+def get_reference_index() -> ReferenceIndex | None:
+    # Missing or unreadable reference data disables auto-fill instead of failing startup.
+    try:
+        return load_reference_index(_settings.reference_data_dir or None)
+    except (OSError, ValueError) as exc:
+        logger.error("Reference data unavailable; climate auto-fill is disabled: %s", exc)
+        return None
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Build the historical reference index from the raw CSVs.")
+    parser.add_argument("--data-dir", default=None, help="Directory with the CSVs (default: app/ml/data)")
+    parser.add_argument("--no-cache", action="store_true", help="Rebuild without reading or writing the cache")
+    args = parser.parse_args()
+
+    started = time.perf_counter()
+    index = load_reference_index(args.data_dir, use_cache=not args.no_cache)
+    elapsed = time.perf_counter() - started
+    print(
+        f"{len(index.model_areas)} model areas ({len(index.areas)} with climate data), "
+        f"{len(index.items)} crops in {elapsed * 1000:.1f}ms"
+    )
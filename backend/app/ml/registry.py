@@ -0,0 +1,228 @@
+import argparse
+import hashlib
+import json
+import os
+import shutil
+import sys
+import time
+from collections.abc import Iterator
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any
+
+from ..config import get_settings
+from .compiled import CompiledPipeline
+
+settings = get_settings()
+MANIFEST_NAME = "manifest.json"
+ARTIFACT_NAME = "model.joblib"
+METRICS_NAME = "model.metrics.json"
+TRAINING_LOCK_NAME = ".training.lock"
+TRAINING_LOCK_STALE_SECONDS = 3600
+MANIFEST_LOCK_NAME = ".manifest.lock"
+MANIFEST_LOCK_STALE_SECONDS = 60
+MANIFEST_LOCK_TIMEOUT_SECONDS = 30
+COMPILED_LAYOUT_SUFFIX = ".compiled"
+
+
+# Layout: <registry>/<version>/model.joblib (+ model.metrics.json) and <registry>/manifest.json
+# naming the active version. Versions are the first 12 hex digits of the artifact sha256,
+# the same id model_version() reports for a standalone MODEL_PATH artifact.
+def registry_dir() -> Path:
+    return Path(settings.model_registry_dir)
+
+
+def artifact_version(path: Path) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as handle:
+        for block in iter(lambda: handle.read(1 << 20), b""):
+            digest.update(block)
+    return digest.hexdigest()[:12]
+
+
+def compiled_layout_dir(path: Path) -> Path:
+    return path.with_suffix(COMPILED_LAYOUT_SUFFIX)
+
+
+def write_compiled_layout(path: Path, version: str | None = None) -> bool:
+    # Pre-builds the memory-mappable layout serving workers load, so none of them has to
+    # unpickle the pipeline. Returns False for models the compiled evaluator cannot run.
+    import joblib
+
+    try:
+        compiled = CompiledPipeline.from_pipeline(joblib.load(path))
+    except (AttributeError, TypeError, ValueError):
+        return False
+    compiled.save(compiled_layout_dir(path), version or artifact_version(path))
+    return True
+
+
+def manifest_path() -> Path:
+    return registry_dir() / MANIFEST_NAME
+
+
+def read_manifest() -> dict[str, Any]:
+    try:
+        manifest = json.loads(manifest_path().read_text(encoding="utf-8"))
+    except FileNotFoundError:
+        return {"active": None, "versions": []}
+    except ValueError as exc:
+        raise ValueError(f"Model manifest {manifest_path()} is not valid JSON") from exc
+    manifest.setdefault("active", None)
+    manifest.setdefault("versions", [])
+    return manifest
+
+
+def _write_manifest(manifest: dict[str, Any]) -> None:
+    path = manifest_path()
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = path.with_name(f"{path.name}.{os.getpid()}.tmp")
+    tmp_path.write_text(json.dumps(manifest, indent=2), encoding="utf-8")
+    # os.replace is atomic, so watchers never observe a half-written manifest.
+    os.replace(tmp_path, path)
+
+
+@contextmanager
+def _manifest_lock() -> Iterator[None]:
+    # Manifest updates are read-modify-writes, so concurrent publishers in other processes
+    # would drop each other's versions. Uses the training lock's exclusive-create file, but
+    # waits for it: the critical section is only a manifest read and write.
+    path = registry_dir() / MANIFEST_LOCK_NAME
+    deadline = time.monotonic() + MANIFEST_LOCK_TIMEOUT_SECONDS
+    while not _create_lock_file(path, MANIFEST_LOCK_STALE_SECONDS):
+        if time.monotonic() >= deadline:
+            raise TimeoutError(f"Timed out waiting for the model manifest lock {path}")
+        time.sleep(0.05)
+    try:
+        yield
+    finally:
+        path.unlink(missing_ok=True)
+
+
+def active_version() -> str | None:
+    return read_manifest()["active"]
+
+
+def artifact_path(version: str) -> Path:
+    return registry_dir() / version / ARTIFACT_NAME
+
+
+def resolve_artifact() -> tuple[Path, str | None]:
+    # The registry's active version wins; MODEL_PATH is the fallback for single-file setups.
+    version = active_version()
+    if version is not None:
+        return artifact_path(version), version
+    return Path(settings.model_path), None
+
+
+def publish(source: str | Path, activate: bool = True, note: str = "") -> str:
+    source_path = Path(source)
+    version = artifact_version(source_path)
+    target_dir = registry_dir() / version
+    if not (target_dir / ARTIFACT_NAME).exists():
+        staging_dir = registry_dir() / f".{version}.{os.getpid()}.staging"
+        staging_dir.mkdir(parents=True, exist_ok=True)
+        shutil.copy2(source_path, staging_dir / ARTIFACT_NAME)
+        metrics_source = source_path.with_suffix(".metrics.json")
+        if metrics_source.exists():
+            shutil.copy2(metrics_source, staging_dir / METRICS_NAME)
+        write_compiled_layout(staging_dir / ARTIFACT_NAME, version)
+        try:
+            staging_dir.rename(target_dir)
+        except OSError:
+            # Another process published the same artifact first.
+            shutil.rmtree(staging_dir, ignore_errors=True)
+
+    metrics: dict[str, Any] = {}
+    metrics_file = target_dir / METRICS_NAME
+    if metrics_file.exists():
+        metrics = json.loads(metrics_file.read_text(encoding="utf-8")).get("metrics", {})
+    with _manifest_lock():
+        manifest = read_manifest()
+        if not any(entry["version"] == version for entry in manifest["versions"]):
+            manifest["versions"].append(
+                {
+                    "version": version,
+                    "published_at": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+                    "metrics": metrics,
+                    "note": note,
+                }
+            )
+        if activate:
+            manifest["active"] = version
+        _write_manifest(manifest)
+    return version
+
+
+def activate(version: str) -> None:
+    with _manifest_lock():
+        manifest = read_manifest()
+        if not any(entry["version"] == version for entry in manifest["versions"]):
+            raise KeyError(version)
+        if not artifact_path(version).exists():
+            raise FileNotFoundError(f"Artifact for model version {version} is missing")
+        manifest["active"] = version
+        _write_manifest(manifest)
+
+
+def _create_lock_file(path: Path, stale_seconds: float) -> bool:
+    # Exclusive create is atomic across processes; a lock older than `stale_seconds` is
+    # assumed to belong to a process that died holding it.
+    path.parent.mkdir(parents=True, exist_ok=True)
+    try:
+        if time.time() - path.stat().st_mtime > stale_seconds:
+            path.unlink(missing_ok=True)
+    except FileNotFoundError:
+        pass
+    try:
+        fd = os.open(path, os.O_CREAT | os.O_EXCL | os.O_WRONLY)
+    except FileExistsError:
+        return False
+    with os.fdopen(fd, "w") as handle:
+        handle.write(str(os.getpid()))
+    return True
+
+
+def acquire_training_lock() -> bool:
+    # Exclusive-create lock file so only one worker process trains a missing model.
+    return _create_lock_file(registry_dir() / TRAINING_LOCK_NAME, TRAINING_LOCK_STALE_SECONDS)
+
+
+def release_training_lock() -> None:
+    (registry_dir() / TRAINING_LOCK_NAME).unlink(missing_ok=True)
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Manage the versioned model registry.")
+    commands = parser.add_subparsers(dest="command", required=True)
+    publish_parser = commands.add_parser("publish", help="Copy an artifact into the registry")
+    publish_parser.add_argument("path")
+    publish_parser.add_argument("--no-activate", action="store_true")
+    publish_parser.add_argument("--note", default="")
+    activate_parser = commands.add_parser("activate", help="Make a published version active")
+    activate_parser.add_argument("version")
+    commands.add_parser("list", help="Show published versions")
+    args = parser.parse_args()
+
+    if args.command == "publish":
+        version = publish(args.path, activate=not args.no_activate, note=args.note)
+        print(f"Published {version}{'' if args.no_activate else ' (active)'}")
+    elif args.command == "activate":
+        try:
+            activate(args.version)
+        except KeyError:
+            print(f"Unknown model version {args.version}")
+            return 1
+        print(f"Activated {args.version}")
+    else:
+        manifest = read_manifest()
+        for entry in manifest["versions"]:
+            marker = "*" if entry["version"] == manifest["active"] else " "
+            rmse = entry.get("metrics", {}).get("rmse")
+            rmse_text = f"rmse {rmse:,.0f}" if rmse is not None else ""
+            print(f"{marker} {entry['version']}  {entry['published_at']}  {rmse_text}  {entry.get('note', '')}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
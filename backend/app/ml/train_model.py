@@ -1,14 +1,29 @@
+import argparse
+import hashlib
+import json
+import platform
+import time
 from pathlib import Path
+from typing import Any
 
 import joblib
+import numpy as np
 import pandas as pd
+import sklearn
+from joblib import Parallel, delayed
+from sklearn.base import clone
 from sklearn.compose import ColumnTransformer
+from sklearn.ensemble import HistGradientBoostingRegressor, RandomForestRegressor
 from sklearn.metrics import mean_absolute_error, mean_squared_error, r2_score
-from sklearn.model_selection import train_test_split
+from sklearn.model_selection import KFold, ParameterGrid, train_test_split
 from sklearn.pipeline import Pipeline
 from sklearn.preprocessing import OneHotEncoder, StandardScaler
 from sklearn.tree import DecisionTreeRegressor
 
+from .compiled import CompiledPipeline
+from .dataset import build_training_frame
+from .registry import write_compiled_layout
+
 FEATURES = [
     "Area",
     "Item",
@@ -19,6 +34,27 @@ FEATURES = [
 ]
 TARGET = "hg/ha_yield"
 BASE_DIR = Path(__file__).resolve().parent
+NUMERIC_FEATURES = ["Year", "average_rain_fall_mm_per_year", "pesticides_tonnes", "avg_temp"]
+CATEGORICAL_FEATURES = ["Area", "Item"]
+RANDOM_STATE = 0
+LATENCY_SAMPLE_ROWS = 200
+
+# Candidate families for --search. Every family is cross-validated over its grid; the
+# best few per family are refit and timed through the serving path.
+SEARCH_SPACE: dict[str, tuple[Any, dict[str, list[Any]]]] = {
+    "decision_tree": (
+        DecisionTreeRegressor(random_state=RANDOM_STATE),
+        {"max_depth": [None, 12, 16, 24], "min_samples_leaf": [1, 2, 4, 8]},
+    ),
+    "random_forest": (
+        RandomForestRegressor(n_estimators=100, random_state=RANDOM_STATE, n_jobs=1),
+        {"max_depth": [None, 16], "min_samples_leaf": [1, 2]},
+    ),
+    "hist_gradient_boosting": (
+        HistGradientBoostingRegressor(random_state=RANDOM_STATE, early_stopping=False),
+        {"max_iter": [300, 800], "max_leaf_nodes": [31, 127], "learning_rate": [0.1]},
+    ),
+}
 
 
 def _load_training_data(csv_path: Path) -> pd.DataFrame:
@@ -28,51 +64,300 @@ def _load_training_data(csv_path: Path) -> pd.DataFrame:
     return df
 
 
-def train_model(data_path: str | Path | None = None, model_path: str | Path | None = None) -> dict:
-    csv_path = Path(data_path) if data_path else BASE_DIR / "data" / "yield_df.csv"
-    out_model_path = Path(model_path) if model_path else BASE_DIR / "model.joblib"
+def _build_preprocessor(sparse_threshold: float = 0.3) -> ColumnTransformer:
+    return ColumnTransformer(
+        transformers=[
+            ("scale", StandardScaler(), NUMERIC_FEATURES),
+            ("ohe", OneHotEncoder(drop="first", handle_unknown="ignore"), CATEGORICAL_FEATURES),
+        ],
+        remainder="drop",
+        sparse_threshold=sparse_threshold,
+    )
 
-    df = _load_training_data(csv_path)
-    x = df[FEATURES]
-    y = df[TARGET]
 
-    x_train, x_test, y_train, y_test = train_test_split(
-        x, y, test_size=0.2, random_state=0, shuffle=True
-    )
+def _regression_metrics(y_true, y_pred) -> dict[str, float]:
+    return {
+        "mae": float(mean_absolute_error(y_true, y_pred)),
+        "rmse": float(mean_squared_error(y_true, y_pred) ** 0.5),
+        "r2": float(r2_score(y_true, y_pred)),
+    }
 
-    numeric_features = ["Year", "average_rain_fall_mm_per_year", "pesticides_tonnes", "avg_temp"]
-    categorical_features = ["Area", "Item"]
 
-    preprocessor = ColumnTransformer(
-        transformers=[
-            ("scale", StandardScaler(), numeric_features),
-            ("ohe", OneHotEncoder(drop="first", handle_unknown="ignore"), categorical_features),
-        ],
-        remainder="drop",
+def _file_sha256(path: Path) -> str:
+    return hashlib.sha256(path.read_bytes()).hexdigest()
+
+
+def metrics_path_for(model_path: str | Path) -> Path:
+    return Path(model_path).with_suffix(".metrics.json")
+
+
+def _serving_latency_ms(pipeline: Pipeline, x_sample: pd.DataFrame) -> dict[str, Any]:
+    # Times single-row predictions the way /predict runs them: through the compiled
+    # evaluator when the pipeline supports it, otherwise through sklearn on a DataFrame.
+    try:
+        compiled = CompiledPipeline.from_pipeline(pipeline)
+    except (AttributeError, TypeError, ValueError):
+        compiled = None
+
+    samples: list[float] = []
+    if compiled is not None:
+        rows = x_sample.to_dict(orient="records")
+        for row in rows:
+            start = time.perf_counter()
+            compiled.predict_one(row)
+            samples.append(time.perf_counter() - start)
+    else:
+        for index in range(len(x_sample)):
+            frame = x_sample.iloc[index : index + 1]
+            start = time.perf_counter()
+            pipeline.predict(frame)
+            samples.append(time.perf_counter() - start)
+
+    samples.sort()
+    return {
+        "engine": "compiled" if compiled is not None else "sklearn",
+        "p50_ms": samples[len(samples) // 2] * 1e3,
+        "p99_ms": samples[min(len(samples) - 1, int(len(samples) * 0.99))] * 1e3,
+    }
+
+
+def _score_fold(estimator, params: dict, x: np.ndarray, y: np.ndarray, train_idx, test_idx) -> dict:
+    model = clone(estimator).set_params(**params)
+    start = time.perf_counter()
+    model.fit(x[train_idx], y[train_idx])
+    fit_seconds = time.perf_counter() - start
+    return {**_regression_metrics(y[test_idx], model.predict(x[test_idx])), "fit_seconds": fit_seconds}
+
+
+def _refit(estimator, params: dict, x: np.ndarray, y: np.ndarray):
+    model = clone(estimator).set_params(**params)
+    start = time.perf_counter()
+    model.fit(x, y)
+    return model, time.perf_counter() - start
+
+
+def _search(
+    x_train: pd.DataFrame,
+    x_test: pd.DataFrame,
+    y_train: pd.Series,
+    y_test: pd.Series,
+    n_jobs: int,
+    cv_folds: int,
+    finalists_per_family: int,
+    max_latency_ms: float | None,
+) -> tuple[Pipeline, dict[str, Any]]:
+    timings: dict[str, float] = {}
+
+    # Encode once and share the dense matrices with every candidate and fold (joblib
+    # memory-maps them into worker processes). The preprocessor is fitted on the whole
+    # training split, so CV folds see its category list and scaling statistics; neither
+    # changes how a tree splits, so the scores are unaffected in practice.
+    start = time.perf_counter()
+    preprocessor = _build_preprocessor(sparse_threshold=0.0)
+    x_train_matrix = np.ascontiguousarray(preprocessor.fit_transform(x_train), dtype=np.float32)
+    x_test_matrix = np.ascontiguousarray(preprocessor.transform(x_test), dtype=np.float32)
+    y_train_values = y_train.to_numpy(dtype=np.float64)
+    timings["preprocess_seconds"] = time.perf_counter() - start
+
+    candidates = [
+        (family, estimator, params)
+        for family, (estimator, grid) in SEARCH_SPACE.items()
+        for params in ParameterGrid(grid)
+    ]
+    folds = list(KFold(n_splits=cv_folds, shuffle=True, random_state=RANDOM_STATE).split(x_train_matrix))
+
+    start = time.perf_counter()
+    fold_scores = Parallel(n_jobs=n_jobs)(
+        delayed(_score_fold)(estimator, params, x_train_matrix, y_train_values, train_idx, test_idx)
+        for _, estimator, params in candidates
+        for train_idx, test_idx in folds
     )
+    timings["search_seconds"] = time.perf_counter() - start
+
+    leaderboard: list[dict[str, Any]] = []
+    for index, (family, estimator, params) in enumerate(candidates):
+        scores = fold_scores[index * len(folds) : (index + 1) * len(folds)]
+        leaderboard.append(
+            {
+                "family": family,
+                "params": params,
+                "cv_rmse": float(np.mean([score["rmse"] for score in scores])),
+                "cv_rmse_std": float(np.std([score["rmse"] for score in scores])),
+                "cv_mae": float(np.mean([score["mae"] for score in scores])),
+                "cv_r2": float(np.mean([score["r2"] for score in scores])),
+                "fit_seconds": float(np.mean([score["fit_seconds"] for score in scores])),
+                "_estimator": estimator,
+            }
+        )
+    leaderboard.sort(key=lambda entry: entry["cv_rmse"])
 
-    pipeline = Pipeline(
-        steps=[
-            ("preprocessor", preprocessor),
-            ("model", DecisionTreeRegressor(random_state=0)),
-        ]
+    finalists: list[dict[str, Any]] = []
+    for family in SEARCH_SPACE:
+        finalists.extend([entry for entry in leaderboard if entry["family"] == family][:finalists_per_family])
+
+    start = time.perf_counter()
+    refits = Parallel(n_jobs=n_jobs)(
+        delayed(_refit)(entry["_estimator"], entry["params"], x_train_matrix, y_train_values)
+        for entry in finalists
     )
+    timings["refit_seconds"] = time.perf_counter() - start
+
+    # Latency is measured sequentially in this process so candidates are comparable.
+    x_sample = x_test.iloc[:LATENCY_SAMPLE_ROWS]
+    pipelines: list[Pipeline] = []
+    for entry, (model, fit_seconds) in zip(finalists, refits):
+        pipeline = Pipeline(steps=[("preprocessor", preprocessor), ("model", model)])
+        pipelines.append(pipeline)
+        entry["holdout"] = _regression_metrics(y_test, model.predict(x_test_matrix))
+        entry["refit_seconds"] = fit_seconds
+        entry["latency"] = _serving_latency_ms(pipeline, x_sample)
 
-    pipeline.fit(x_train, y_train)
-    preds = pipeline.predict(x_test)
+    eligible = [
+        index
+        for index, entry in enumerate(finalists)
+        if max_latency_ms is None or entry["latency"]["p50_ms"] <= max_latency_ms
+    ]
+    if not eligible:
+        raise ValueError(f"No candidate meets the {max_latency_ms} ms p50 latency budget")
+    selected = min(eligible, key=lambda index: finalists[index]["cv_rmse"])
 
-    metrics = {
-        "mae": float(mean_absolute_error(y_test, preds)),
-        "rmse": float(mean_squared_error(y_test, preds) ** 0.5),
-        "r2": float(r2_score(y_test, preds)),
+    for entry in leaderboard:
+        entry.pop("_estimator", None)
+    report = {
+        "mode": "search",
+        "cv_folds": cv_folds,
+        "n_jobs": n_jobs,
+        "max_latency_ms": max_latency_ms,
+        "candidates_evaluated": len(candidates),
+        "selected": {
+            "family": finalists[selected]["family"],
+            "params": finalists[selected]["params"],
+            "cv_rmse": finalists[selected]["cv_rmse"],
+            "latency": finalists[selected]["latency"],
+        },
+        "metrics": finalists[selected]["holdout"],
+        "finalists": finalists,
+        "leaderboard": leaderboard,
+        "timings": timings,
     }
+    return pipelines[selected], report
+
+
+def train_model(
+    data_path: str | Path | None = None,
+    model_path: str | Path | None = None,
+    search: bool = False,
+    n_jobs: int = -1,
+    cv_folds: int = 5,
+    finalists_per_family: int = 2,
+    max_latency_ms: float | None = None,
+    from_raw: bool = False,
+    raw_dir: str | Path | None = None,
+) -> dict:
+    out_model_path = Path(model_path) if model_path else BASE_DIR / "model.joblib"
+    started = time.perf_counter()
+
+    # from_raw joins yield/rainfall/temp/pesticides CSVs (cached by source hash) instead
+    # of reading the pre-joined yield_df.csv.
+    if from_raw:
+        data_source = Path(raw_dir) if raw_dir else BASE_DIR / "data"
+        df, data_sha256 = build_training_frame(data_source)
+    else:
+        data_source = Path(data_path) if data_path else BASE_DIR / "data" / "yield_df.csv"
+        df = _load_training_data(data_source)
+        data_sha256 = _file_sha256(data_source)
+    data_seconds = time.perf_counter() - started
+    x = df[FEATURES]
+    y = df[TARGET]
+
+    x_train, x_test, y_train, y_test = train_test_split(
+        x, y, test_size=0.2, random_state=RANDOM_STATE, shuffle=True
+    )
+
+    if search:
+        pipeline, report = _search(
+            x_train, x_test, y_train, y_test, n_jobs, cv_folds, finalists_per_family, max_latency_ms
+        )
+    else:
+        pipeline = Pipeline(
+            steps=[
+                ("preprocessor", _build_preprocessor()),
+                ("model", DecisionTreeRegressor(random_state=RANDOM_STATE)),
+            ]
+        )
+        fit_started = time.perf_counter()
+        pipeline.fit(x_train, y_train)
+        fit_seconds = time.perf_counter() - fit_started
+        report = {
+            "mode": "default",
+            "selected": {"family": "decision_tree", "params": {}},
+            "metrics": _regression_metrics(y_test, pipeline.predict(x_test)),
+            "timings": {"fit_seconds": fit_seconds},
+        }
+
+    report["timings"]["data_seconds"] = data_seconds
+    report["timings"]["total_seconds"] = time.perf_counter() - started
+    report.update(
+        {
+            "trained_at": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+            "data_source": "raw" if from_raw else "csv",
+            "data_path": str(data_source),
+            "data_sha256": data_sha256,
+            "train_rows": len(x_train),
+            "test_rows": len(x_test),
+            "random_state": RANDOM_STATE,
+            "versions": {
+                "python": platform.python_version(),
+                "sklearn": sklearn.__version__,
+                "numpy": np.__version__,
+                "pandas": pd.__version__,
+            },
+        }
+    )
 
     out_model_path.parent.mkdir(parents=True, exist_ok=True)
     joblib.dump(pipeline, out_model_path)
-    return metrics
+    metrics_path_for(out_model_path).write_text(json.dumps(report, indent=2, default=str), encoding="utf-8")
+    write_compiled_layout(out_model_path)
+    return report["metrics"]
+
+
+def _print_search_summary(report: dict) -> None:
+    print(f"{'family':<24}{'params':<64}{'cv rmse':>10}{'test rmse':>11}{'p50 ms':>9}")
+    for entry in report["finalists"]:
+        params = json.dumps(entry["params"], default=str)
+        print(
+            f"{entry['family']:<24}{params:<64}{entry['cv_rmse']:>10.0f}"
+            f"{entry['holdout']['rmse']:>11.0f}{entry['latency']['p50_ms']:>9.3f}"
+        )
+    print(f"selected: {report['selected']['family']} {json.dumps(report['selected']['params'], default=str)}")
 
 
 if __name__ == "__main__":
-    training_metrics = train_model()
+    parser = argparse.ArgumentParser(description="Train the crop yield model.")
+    parser.add_argument("--data", default=None, help="Training CSV (default: app/ml/data/yield_df.csv)")
+    parser.add_argument("--from-raw", action="store_true", help="Join the raw FAO CSVs instead of yield_df.csv")
+    parser.add_argument("--raw-dir", default=None, help="Directory with the raw FAO CSVs (default: app/ml/data)")
+    parser.add_argument("--out", default=None, help="Model artifact path (default: app/ml/model.joblib)")
+    parser.add_argument("--search", action="store_true", help="Cross-validated search over candidate models")
+    parser.add_argument("--n-jobs", type=int, default=-1, help="Parallel workers for --search (-1 = all cores)")
+    parser.add_argument("--cv", type=int, default=5, help="Cross-validation folds for --search")
+    parser.add_argument("--finalists", type=int, default=2, help="Best candidates per family to refit and time")
+    parser.add_argument("--max-latency-ms", type=float, default=None, help="Only select models under this p50")
+    args = parser.parse_args()
+
+    training_metrics = train_model(
+        args.data,
+        args.out,
+        search=args.search,
+        n_jobs=args.n_jobs,
+        cv_folds=args.cv,
+        finalists_per_family=args.finalists,
+        max_latency_ms=args.max_latency_ms,
+        from_raw=args.from_raw,
+        raw_dir=args.raw_dir,
+    )
     print("Model trained successfully")
+    if args.search:
+        _print_search_summary(json.loads(metrics_path_for(args.out or BASE_DIR / "model.joblib").read_text()))
     print(training_metrics)
@@ -1,16 +1,17 @@
-from datetime import datetime
-from typing import Literal
+from datetime import datetime, timezone
+from typing import Any, Literal
 
-from pydantic import BaseModel, Field, field_validator
+from pydantic import BaseModel, ConfigDict, Field, field_validator, model_validator
 
 
 class PredictionInput(BaseModel):
     area: str = Field(..., min_length=2, max_length=100, description="Country/Region")
     item: str = Field(..., min_length=2, max_length=100, description="Crop item")
     year: int = Field(..., ge=1990, le=2100)
-    average_rain_fall_mm_per_year: float = Field(..., ge=0, le=10000)
-    pesticides_tonnes: float = Field(..., ge=0, le=1000000)
-    avg_temp: float = Field(..., ge=-30, le=60)
+    # Omitted climate fields are filled from the historical reference data for the area.
+    average_rain_fall_mm_per_year: float | None = Field(default=None, ge=0, le=10000)
+    pesticides_tonnes: float | None = Field(default=None, ge=0, le=1000000)
+    avg_temp: float | None = Field(default=None, ge=-30, le=60)
     farm_area_hectares: float = Field(default=1.0, gt=0, le=100000)
 
     @field_validator("area", "item", mode="before")
@@ -24,19 +25,184 @@ class PredictionInput(BaseModel):
         return clean
 
 
-class PredictionResponse(BaseModel):
+class BatchPredictionInput(BaseModel):
+    items: list[PredictionInput] = Field(..., min_length=1, max_length=5000)
+
+
+class YieldInterval(BaseModel):
+    p10: float
+    p50: float
+    p90: float
+
+
+class FilledValue(BaseModel):
+    value: float
+    year: int
+
+
+class ReferenceData(BaseModel):
+    known_area: bool
+    known_item: bool
+    observed_yield_t_ha: float | None = None
+    observed_year: int | None = None
+    filled: dict[str, FilledValue] = Field(default_factory=dict)
+
+
+def _field_bounds(name: str) -> tuple[float, float]:
+    lower, upper = float("-inf"), float("inf")
+    for constraint in PredictionInput.model_fields[name].metadata:
+        lower = getattr(constraint, "ge", lower)
+        upper = getattr(constraint, "le", upper)
+    return lower, upper
+
+
+class SweepRange(BaseModel):
+    model_config = ConfigDict(extra="forbid")
+
+    start: float
+    stop: float
+    steps: int = Field(default=10, ge=1, le=1000)
+
+    @model_validator(mode="after")
+    def check_order(self) -> "SweepRange":
+        if self.stop < self.start:
+            raise ValueError("stop must not be below start")
+        return self
+
+
+class YearRange(BaseModel):
+    model_config = ConfigDict(extra="forbid")
+
+    start: int = Field(..., ge=1990, le=2100)
+    stop: int = Field(..., ge=1990, le=2100)
+    step: int = Field(default=1, ge=1, le=110)
+
+    @model_validator(mode="after")
+    def check_order(self) -> "YearRange":
+        if self.stop < self.start:
+            raise ValueError("stop must not be below start")
+        return self
+
+
+class PredictionSweepInput(BaseModel):
+    # A misspelled range name must fail rather than silently sweep nothing.
+    model_config = ConfigDict(extra="forbid")
+
+    base: PredictionInput
+    rainfall: SweepRange | None = None
+    temperature: SweepRange | None = None
+    pesticides: SweepRange | None = None
+    year: YearRange | None = None
+
+    @model_validator(mode="after")
+    def check_bounds(self) -> "PredictionSweepInput":
+        # Swept values must stay inside the limits PredictionInput enforces for one point.
+        for name, field in (
+            ("rainfall", "average_rain_fall_mm_per_year"),
+            ("temperature", "avg_temp"),
+            ("pesticides", "pesticides_tonnes"),
+        ):
+            sweep = getattr(self, name)
+            lower, upper = _field_bounds(field)
+            if sweep is not None and (sweep.start < lower or sweep.stop > upper):
+                raise ValueError(f"{name} range must lie within [{lower:g}, {upper:g}]")
+        return self
+
+
+class SweepAxes(BaseModel):
+    year: list[int]
+    average_rain_fall_mm_per_year: list[float]
+    avg_temp: list[float]
+    pesticides_tonnes: list[float]
+
+
+class PredictionSweepResponse(BaseModel):
+    count: int
+    model_version: str | None
+    axes: SweepAxes
+    # Points are flattened in row-major order over (year, rainfall, temperature, pesticides).
+    shape: list[int]
+    predicted_yield_t_ha: list[float]
+    risk_level: list[Literal["Low", "Medium", "High"]]
+    reference: ReferenceData | None = None
+
+
+class PredictionContext(BaseModel):
     predicted_yield_hg_ha: float
     predicted_yield_t_ha: float
+    yield_interval_t_ha: YieldInterval | None = None
     risk_level: Literal["Low", "Medium", "High"]
     warnings: list[str]
     expected_production_tons: float
     food_security_level: Literal["Secure", "Watch", "Critical"]
     food_security_notes: list[str]
     planting_schedule: dict[str, str | list[str]]
+    model_version: str | None = None
+    reference: ReferenceData | None = None
+
+
+class PredictionResponse(PredictionContext):
+    advisory: str
+    prediction_id: str | None = None
+    advisory_status: Literal["ready", "pending", "failed"] = "ready"
+
+
+class AdvisoryStatusResponse(BaseModel):
+    prediction_id: str
+    status: Literal["ready", "pending", "failed"]
+    advisory: str
+
+
+class BatchPredictionResponse(BaseModel):
+    count: int
+    persisted: bool
+    results: list[PredictionContext]
+
+
+class ImportedPrediction(BaseModel):
+    # One line of an /import/predictions archive in the /export layout; `id` is ignored
+    # because rows get new ids on insert.
+    model_config = ConfigDict(allow_inf_nan=False)
+
+    area: str = Field(..., min_length=1, max_length=100)
+    item: str = Field(..., min_length=1, max_length=100)
+    year: int
+    average_rain_fall_mm_per_year: float
+    pesticides_tonnes: float
+    avg_temp: float
+    farm_area_hectares: float
+    predicted_yield_hg_ha: float
+    predicted_yield_t_ha: float
+    risk_level: Literal["Low", "Medium", "High"]
+    warnings: list[str] = Field(default_factory=list)
+    expected_production_tons: float = 0.0
+    food_security_level: Literal["Secure", "Watch", "Critical"] = "Watch"
+    food_security_notes: list[str] = Field(default_factory=list)
+    planting_schedule: dict[str, str | list[str]] = Field(default_factory=dict)
     advisory: str
+    advisory_status: Literal["ready", "pending", "failed"] = "ready"
+    created_at: datetime
+    model_version: str | None = None
+
+    @field_validator("created_at", mode="before")
+    @classmethod
+    def parse_created_at(cls, value: Any) -> datetime:
+        # ISO 8601 text only; numbers would otherwise pass as Unix timestamps.
+        if not isinstance(value, str):
+            raise ValueError("Expected an ISO 8601 timestamp")
+        try:
+            parsed = datetime.fromisoformat(value)
+        except ValueError as exc:
+            raise ValueError("Expected an ISO 8601 timestamp") from exc
+        return parsed if parsed.tzinfo else parsed.replace(tzinfo=timezone.utc)
+
+
+class BulkImportResponse(BaseModel):
+    imported: int
 
 
 class HistoryItem(BaseModel):
+    id: str | None = None
     area: str
     item: str
     year: int
@@ -44,9 +210,75 @@ class HistoryItem(BaseModel):
     predicted_yield_t_ha: float
     risk_level: Literal["Low", "Medium", "High"]
     created_at: datetime
+    model_version: str | None = None
+
+
+class HistoryPage(BaseModel):
+    items: list[HistoryItem]
+    next_cursor: str | None
+
+
+class RiskDistribution(BaseModel):
+    Low: int
+    Medium: int
+    High: int
+
+
+class AnalyticsGroup(BaseModel):
+    key: str
+    prediction_count: int
+    mean_yield_t_ha: float
+    p10_yield_t_ha: float | None
+    p50_yield_t_ha: float | None
+    p90_yield_t_ha: float | None
+    total_production_tons: float
+    risk_levels: RiskDistribution
+
+
+class AnalyticsBucket(BaseModel):
+    bucket: str
+    prediction_count: int
+    mean_yield_t_ha: float
+    total_production_tons: float
+    risk_levels: RiskDistribution
+
+
+class CacheStats(BaseModel):
+    size: int
+    max_size: int
+    hits: int
+    misses: int
+    evictions: int
+    invalidations: int
+
+
+class CategoryList(BaseModel):
+    count: int
+    values: list[str]
 
 
 class HealthResponse(BaseModel):
     status: str
     model_loaded: bool
     db_ready: bool
+    reference_data_ready: bool = False
+    model_version: str | None = None
+    prediction_cache: CacheStats | None = None
+
+
+class ModelVersionInfo(BaseModel):
+    version: str
+    published_at: str
+    metrics: dict[str, float] = Field(default_factory=dict)
+    note: str = ""
+
+
+class ModelRegistryResponse(BaseModel):
+    active_version: str | None
+    loaded_version: str | None
+    versions: list[ModelVersionInfo]
+
+
+class ModelReloadResponse(BaseModel):
+    previous_version: str | None
+    model_version: str
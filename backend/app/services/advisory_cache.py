@@ -0,0 +1,94 @@
+import hashlib
+import logging
+import sqlite3
+import time
+from pathlib import Path
+from threading import Lock
+
+from ..sqlite_writer import connect
+
+logger = logging.getLogger(__name__)
+
+
+def prompt_key(*parts: str) -> str:
+    digest = hashlib.sha256()
+    for part in parts:
+        digest.update(part.encode("utf-8"))
+        digest.update(b"\0")
+    return digest.hexdigest()
+
+
+class AdvisoryCache:
+    def __init__(self, db_path: str, ttl_seconds: int, max_entries: int) -> None:
+        self.db_path = db_path
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max(0, max_entries)
+        self._conn: sqlite3.Connection | None = None
+        self._lock = Lock()
+
+    @property
+    def enabled(self) -> bool:
+        return self.max_entries > 0
+
+    def _connection(self) -> sqlite3.Connection:
+        if self._conn is None:
+            path = Path(self.db_path)
+            path.parent.mkdir(parents=True, exist_ok=True)
+            # Same pragmas as the predictions database: WAL lets every worker process read
+            # while one writes, and busy_timeout waits out their write locks.
+            conn = connect(path, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode = WAL")
+            conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS advisory_cache (
+                    prompt_hash TEXT PRIMARY KEY,
+                    advisory TEXT NOT NULL,
+                    created_at REAL NOT NULL
+                )
+                """
+            )
+            conn.execute(
+                "CREATE INDEX IF NOT EXISTS idx_advisory_cache_created_at ON advisory_cache (created_at)"
+            )
+            conn.commit()
+            self._conn = conn
+        return self._conn
+
+    def get(self, key: str) -> str | None:
+        if not self.enabled:
+            return None
+        try:
+            with self._lock:
+                row = self._connection().execute(
+                    "SELECT advisory, created_at FROM advisory_cache WHERE prompt_hash = ?", (key,)
+                ).fetchone()
+        except sqlite3.Error as exc:
+            logger.warning("Advisory cache read failed: %s", exc)
+            return None
+        if row is None or row[1] + self.ttl_seconds < time.time():
+            return None
+        return row[0]
+
+    def set(self, key: str, advisory: str) -> None:
+        if not self.enabled:
+            return
+        now = time.time()
+        try:
+            with self._lock:
+                conn = self._connection()
+                with conn:
+                    conn.execute(
+                        "INSERT OR REPLACE INTO advisory_cache (prompt_hash, advisory, created_at) VALUES (?, ?, ?)",
+                        (key, advisory, now),
+                    )
+                    conn.execute("DELETE FROM advisory_cache WHERE created_at < ?", (now - self.ttl_seconds,))
+                    conn.execute(
+                        """
+                        DELETE FROM advisory_cache WHERE prompt_hash IN (
+                            SELECT prompt_hash FROM advisory_cache ORDER BY created_at DESC LIMIT -1 OFFSET ?
+                        )
+                        """,
+                        (self.max_entries,),
+                    )
+        except sqlite3.Error as exc:
+            logger.warning("Advisory cache write failed: %s", exc)
@@ -0,0 +1,88 @@
+import asyncio
+import logging
+from dataclasses import dataclass
+
+from ..database import update_advisory
+from ..schemas import PredictionInput
+from .llm_service import generate_advisory
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass(frozen=True)
+class AdvisoryJob:
+    prediction_id: str
+    payload: PredictionInput
+    context: dict
+    locale: str | None = None
+
+
+class AdvisoryJobQueue:
+    def __init__(self, workers: int, max_pending: int) -> None:
+        self.workers = workers
+        self.max_pending = max_pending
+        self._queue: asyncio.Queue[AdvisoryJob] | None = None
+        self._tasks: list[asyncio.Task] = []
+
+    def start(self) -> None:
+        if self._tasks:
+            return
+        self._queue = asyncio.Queue(maxsize=self.max_pending)
+        self._tasks = [
+            asyncio.create_task(self._worker(self._queue), name=f"advisory-worker-{index}")
+            for index in range(self.workers)
+        ]
+
+    async def stop(self) -> None:
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+        # Jobs never picked up would leave their rows pending forever; fail them so
+        # clients polling /advisory stop waiting.
+        queue, self._queue = self._queue, None
+        while queue is not None and not queue.empty():
+            job = queue.get_nowait()
+            await asyncio.to_thread(update_advisory, job.prediction_id, "", "failed")
+
+    def submit(self, job: AdvisoryJob) -> bool:
+        if self._queue is None:
+            return False
+        try:
+            self._queue.put_nowait(job)
+        except asyncio.QueueFull:
+            return False
+        return True
+
+    async def _worker(self, queue: asyncio.Queue[AdvisoryJob]) -> None:
+        while True:
+            job = await queue.get()
+            try:
+                await self._run(job)
+            finally:
+                queue.task_done()
+
+    async def _run(self, job: AdvisoryJob) -> None:
+        context = job.context
+        try:
+            advisory = await generate_advisory(
+                job.payload,
+                context["predicted_yield_t_ha"],
+                context["risk_level"],
+                context["planting_schedule"],
+                context["food_security_level"],
+                context.get("grain_rankings"),
+                job.locale,
+            )
+        except asyncio.CancelledError:
+            # Shutdown interrupted the job; its row must not stay pending.
+            await asyncio.to_thread(update_advisory, job.prediction_id, "", "failed")
+            raise
+        except Exception as exc:
+            logger.exception("Advisory job %s failed: %s", job.prediction_id, exc)
+            await asyncio.to_thread(update_advisory, job.prediction_id, "", "failed")
+            return
+
+        updated = await asyncio.to_thread(update_advisory, job.prediction_id, advisory, "ready")
+        if not updated:
+            logger.warning("Advisory for prediction %s could not be stored", job.prediction_id)
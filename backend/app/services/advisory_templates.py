@@ -0,0 +1,245 @@
+import json
+import string
+from collections.abc import Mapping, Sequence
+from functools import lru_cache
+from pathlib import Path
+from typing import Any
+
+from ..config import get_settings
+from ..schemas import PredictionInput
+
+settings = get_settings()
+BUNDLED_TEMPLATES_PATH = Path(__file__).with_name("advisory_templates.json")
+FALLBACK_DEFAULTS = ("recommended_window", "irrigation_plan", "first_action", "second_action")
+GRAIN_PARTS = ("recommendation", "switch_line")
+# Compiled fallback texts are cached per locale and rule outcome; bounded because a custom
+# rule table can produce many planting texts.
+COMPILED_CACHE_SIZE = 4096
+# Request-specific fields each kind of template may use.
+FALLBACK_FIELDS = ("item", "area", "yield_t_ha", "rainfall", "avg_temp", "pesticides")
+GRAIN_FIELDS = (
+    "item", "rainfall", "avg_temp", "pesticides", "yield_t_ha",
+    "top_grain", "top_yield_t_ha", "gain_t_ha", "gain_pct", "rank_lines",
+)
+RANK_FIELDS = ("rank", "grain", "yield_t_ha")
+
+_formatter = string.Formatter()
+_CONVERSIONS = (None, "s", "r", "a")
+
+
+def _escape(text: str) -> str:
+    return text.replace("{", "{{").replace("}", "}}")
+
+
+def compile_template(
+    template: str,
+    fields: Sequence[str],
+    static: Mapping[str, str] | None = None,
+    parts: Mapping[str, str] | None = None,
+) -> str:
+    # Bakes the values fixed by a rule outcome into the template as literal text and
+    # expands `parts` sub-templates in place. What is left is a str.format string over
+    # `fields` only, so a request pays for formatting its own numbers.
+    static = static or {}
+    parts = parts or {}
+    compiled: list[str] = []
+    for literal, name, spec, conversion in _formatter.parse(template):
+        compiled.append(_escape(literal))
+        if name is None:
+            continue
+        field = f"{{{name}{'!' + conversion if conversion else ''}{':' + spec if spec else ''}}}"
+        if name in parts:
+            compiled.append(compile_template(parts[name], fields, static, parts))
+        elif name in static:
+            compiled.append(_escape(static[name]))
+        elif not name.isidentifier() or conversion not in _CONVERSIONS or "{" in spec:
+            raise ValueError(f"Unsupported template field '{field}'")
+        elif name not in fields:
+            raise ValueError(f"Unknown template field '{name}'; expected one of {', '.join(fields)}")
+        else:
+            compiled.append(field)
+    return "".join(compiled)
+
+
+def _rainfall_band(rainfall_mm: float) -> int:
+    if rainfall_mm < 500:
+        return 0
+    if rainfall_mm < 1000:
+        return 1
+    return 2
+
+
+def _temperature_band(avg_temp_c: float) -> int:
+    if avg_temp_c < 18:
+        return 0
+    if avg_temp_c <= 30:
+        return 1
+    return 2
+
+
+class _LocaleTemplates:
+    def __init__(self, name: str, spec: Mapping[str, Any]) -> None:
+        self.name = name
+        self.fallback = "\n".join(spec["fallback"])
+        self.fallback_defaults = {field: spec["fallback_defaults"][field] for field in FALLBACK_DEFAULTS}
+        self.phrases: dict[str, str] = dict(spec.get("phrases", {}))
+        self.rank_line = compile_template(spec["rank_line"], RANK_FIELDS)
+        self.compiled: dict[tuple, str] = {}
+
+        rainfall_bands, temperature_bands = spec["rainfall_bands"], spec["temperature_bands"]
+        if len(rainfall_bands) != 3 or len(temperature_bands) != 3:
+            raise ValueError("rainfall_bands and temperature_bands need three entries each")
+        grains = "\n".join(spec["grains"])
+        variants = {True: spec["grain_improve"], False: spec["grain_keep"]}
+        # Every combination is known up front: 3 rainfall bands x 3 temperature bands x
+        # whether another grain beats the entered one.
+        self.grains = {
+            (rainfall, temperature, improve): compile_template(
+                grains,
+                GRAIN_FIELDS,
+                {"rainfall_band": rainfall_bands[rainfall], "temperature_band": temperature_bands[temperature]},
+                {part: variants[improve][part] for part in GRAIN_PARTS},
+            )
+            for rainfall in range(3)
+            for temperature in range(3)
+            for improve in (True, False)
+        }
+
+    def compile_fallback(self, key: tuple[str | None, ...]) -> str:
+        risk_level, food_security_level, *schedule = key
+        phrases = self.phrases
+        static = {
+            "risk_level": phrases.get(risk_level, risk_level),
+            "food_security_level": phrases.get(food_security_level, food_security_level),
+        }
+        for field, text in zip(FALLBACK_DEFAULTS, schedule):
+            static[field] = self.fallback_defaults[field] if text is None else phrases.get(text, text)
+        compiled = compile_template(self.fallback, FALLBACK_FIELDS, static)
+        if len(self.compiled) < COMPILED_CACHE_SIZE:
+            self.compiled[key] = compiled
+        return compiled
+
+    def validate(self) -> None:
+        try:
+            # Format specs are only checked when a value is rendered.
+            fallback = dict.fromkeys(FALLBACK_FIELDS, 1.0) | {"item": "Maize", "area": "Kenya"}
+            self.compile_fallback(("Low", "Secure", None, None, None, None)).format_map(fallback)
+            grains = dict.fromkeys(GRAIN_FIELDS, 1.0) | {"item": "Maize", "top_grain": "Wheat", "rank_lines": ""}
+            for template in self.grains.values():
+                template.format_map(grains)
+            self.rank_line.format_map({"rank": 1, "grain": "Maize", "yield_t_ha": 1.0})
+        except ValueError as exc:
+            raise ValueError(f"Advisory templates for locale '{self.name}' are invalid: {exc!r}") from exc
+        self.compiled.clear()
+
+
+class AdvisoryTemplates:
+    # Renders the rule-based advisory and grain suggestion from localized templates. Each
+    # rule outcome (risk level, food security level and planting texts) is compiled once
+    # into a format string, so rendering is a dict lookup plus one format_map call.
+    def __init__(self, table: Mapping[str, Any], default_locale: str = "") -> None:
+        self._locales = {name.lower(): _LocaleTemplates(name, spec) for name, spec in table["locales"].items()}
+        for templates in self._locales.values():
+            templates.validate()
+        self.locales = sorted(self._locales)
+        self.default_locale = self.resolve_locale(default_locale or table.get("default_locale") or "en")
+
+    @classmethod
+    def from_file(cls, path: str | Path, default_locale: str = "") -> "AdvisoryTemplates":
+        try:
+            table = json.loads(Path(path).read_text(encoding="utf-8"))
+        except (OSError, ValueError) as exc:
+            raise ValueError(f"Advisory templates {path} could not be read: {exc}") from exc
+        try:
+            return cls(table, default_locale)
+        except KeyError as exc:
+            raise ValueError(f"Advisory templates {path} are missing {exc}") from exc
+
+    def resolve_locale(self, locale: str | None) -> str:
+        # Exact tag first, then its language, so "fr-CA" uses "fr" templates.
+        if not locale:
+            return self.default_locale
+        tag = locale.strip().lower().replace("_", "-")
+        for candidate in (tag, tag.split("-", 1)[0]):
+            if candidate in self._locales:
+                return candidate
+        raise ValueError(f"Unsupported advisory locale '{locale}'; available: {', '.join(self.locales)}")
+
+    def _templates(self, locale: str | None) -> _LocaleTemplates:
+        templates = self._locales.get(locale) if locale else None
+        return templates or self._locales[self.resolve_locale(locale)]
+
+    def fallback(
+        self,
+        payload: PredictionInput,
+        predicted_yield_t_ha: float,
+        risk_level: str,
+        planting_schedule: Mapping[str, str | Sequence[str]],
+        food_security_level: str,
+        locale: str | None = None,
+    ) -> str:
+        templates = self._templates(locale)
+        actions = planting_schedule.get("actions") or ()
+        key = (
+            risk_level,
+            food_security_level,
+            planting_schedule.get("recommended_window"),
+            planting_schedule.get("irrigation_plan"),
+            actions[0] if actions else None,
+            actions[1] if len(actions) > 1 else None,
+        )
+        template = templates.compiled.get(key) or templates.compile_fallback(key)
+        return template.format_map(
+            {
+                "item": payload.item,
+                "area": payload.area,
+                "yield_t_ha": predicted_yield_t_ha,
+                "rainfall": payload.average_rain_fall_mm_per_year,
+                "avg_temp": payload.avg_temp,
+                "pesticides": payload.pesticides_tonnes,
+            }
+        )
+
+    def grain_suggestions(
+        self,
+        payload: PredictionInput,
+        predicted_yield_t_ha: float,
+        rankings: Sequence[tuple[str, float]],
+        locale: str | None = None,
+    ) -> str:
+        if not rankings:
+            return ""
+        templates = self._templates(locale)
+        top_grain, top_yield = rankings[0]
+        gain = top_yield - predicted_yield_t_ha
+        improve = top_grain.lower() != payload.item.lower() and gain > 0
+        rank_line = templates.rank_line.format_map
+        template = templates.grains[
+            (_rainfall_band(payload.average_rain_fall_mm_per_year), _temperature_band(payload.avg_temp), improve)
+        ]
+        return template.format_map(
+            {
+                "item": payload.item,
+                "rainfall": payload.average_rain_fall_mm_per_year,
+                "avg_temp": payload.avg_temp,
+                "pesticides": payload.pesticides_tonnes,
+                "yield_t_ha": predicted_yield_t_ha,
+                "top_grain": top_grain,
+                "top_yield_t_ha": top_yield,
+                "gain_t_ha": gain,
+                "gain_pct": (gain / predicted_yield_t_ha * 100.0) if predicted_yield_t_ha > 0 else 0.0,
+                "rank_lines": "\n".join(
+                    [
+                        rank_line({"rank": rank, "grain": grain, "yield_t_ha": value})
+                        for rank, (grain, value) in enumerate(rankings[:3], start=1)
+                    ]
+                ),
+            }
+        )
+
+
+@lru_cache(maxsize=1)
+def get_advisory_templates() -> AdvisoryTemplates:
+    return AdvisoryTemplates.from_file(
+        settings.advisory_templates_path or BUNDLED_TEMPLATES_PATH, settings.advisory_locale
+    )
@@ -1,33 +1,25 @@
+from collections.abc import Sequence
+
 from ..schemas import PredictionInput
+from .rule_engine import Columns, get_rule_engine, payload_row
 
 
 def assess_food_security(
-    payload: PredictionInput, predicted_yield_t_ha: float, risk_level: str
+    payload: PredictionInput,
+    predicted_yield_t_ha: float,
+    risk_level: str,
+    pessimistic_yield_t_ha: float | None = None,
 ) -> tuple[str, float, list[str]]:
-    expected_production_tons = predicted_yield_t_ha * payload.farm_area_hectares
-
-    baseline_by_crop_t_ha = {
-        "maize": 4.0,
-        "rice": 4.5,
-        "wheat": 3.8,
-        "soybeans": 2.8,
-        "potatoes": 20.0,
-    }
-    baseline = baseline_by_crop_t_ha.get(payload.item.lower(), 3.5)
-    adequacy_ratio = predicted_yield_t_ha / baseline if baseline > 0 else 0
+    # With a prediction interval, the Critical/Watch decision uses its lower bound.
+    return get_rule_engine().food_security_one(
+        payload_row(payload), predicted_yield_t_ha, risk_level, pessimistic_yield_t_ha
+    )
 
-    notes: list[str] = []
-    if risk_level == "High" or adequacy_ratio < 0.6:
-        level = "Critical"
-        notes.append("Projected output is vulnerable; local food supply risk is elevated.")
-        notes.append("Prioritize water, pest, and crop-diversification contingency measures.")
-    elif risk_level == "Medium" or adequacy_ratio < 0.85:
-        level = "Watch"
-        notes.append("Projected output needs close monitoring to avoid seasonal shortages.")
-        notes.append("Apply timely interventions in irrigation, pest control, and planting window.")
-    else:
-        level = "Secure"
-        notes.append("Projected output supports stable contribution to local food availability.")
-        notes.append("Maintain current practices and continue preventive monitoring.")
 
-    return level, float(expected_production_tons), notes
+def assess_food_security_many(
+    columns: Columns,
+    predicted_yield_t_ha: Sequence[float],
+    risk_levels: Sequence[str],
+    pessimistic_yield_t_ha: Sequence[float] | None = None,
+) -> tuple[list[str], list[float], list[list[str]]]:
+    return get_rule_engine().food_security(columns, predicted_yield_t_ha, risk_levels, pessimistic_yield_t_ha)
@@ -0,0 +1,215 @@
+import asyncio
+import time
+from collections.abc import AsyncIterator, Awaitable, Callable
+from contextlib import aclosing
+from dataclasses import dataclass, field
+
+from ..metrics import LLM_FAILURES, LLM_HEDGES, LLM_SECONDS, LLM_SKIPPED
+
+
+class LLMUnavailable(RuntimeError):
+    pass
+
+
+class CircuitBreaker:
+    # Opens after `failure_threshold` consecutive failures. Once `reset_seconds` have
+    # passed, a single trial call is let through; its outcome closes or re-opens it.
+    def __init__(self, failure_threshold: int, reset_seconds: float) -> None:
+        self.failure_threshold = failure_threshold
+        self.reset_seconds = reset_seconds
+        self.failures = 0
+        self.opened_at: float | None = None
+        self._trial_running = False
+
+    @property
+    def state(self) -> str:
+        if self.opened_at is None:
+            return "closed"
+        if time.monotonic() - self.opened_at >= self.reset_seconds:
+            return "half_open"
+        return "open"
+
+    def allow(self) -> bool:
+        state = self.state
+        if state == "closed":
+            return True
+        if state == "open" or self._trial_running:
+            return False
+        self._trial_running = True
+        return True
+
+    def release(self) -> None:
+        # The call was abandoned (hedge lost, client gone); it says nothing about the provider.
+        self._trial_running = False
+
+    def record_success(self) -> None:
+        self.failures = 0
+        self.opened_at = None
+        self._trial_running = False
+
+    def record_failure(self) -> None:
+        self.failures += 1
+        if self._trial_running or self.failures >= self.failure_threshold:
+            self.opened_at = time.monotonic()
+        self._trial_running = False
+
+
+@dataclass
+class Provider:
+    name: str
+    complete: Callable[[str], Awaitable[str]]
+    stream: Callable[[str], AsyncIterator[str]]
+    max_concurrency: int
+    breaker: CircuitBreaker
+    _semaphore: asyncio.Semaphore | None = field(default=None, repr=False)
+
+    @property
+    def semaphore(self) -> asyncio.Semaphore:
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self.max_concurrency)
+        return self._semaphore
+
+
+class LLMRouter:
+    # Providers are tried in order. A provider is skipped while its circuit is open or
+    # while all of its concurrency slots are taken (the last provider instead queues for a
+    # slot within the request's latency budget), and a failure moves on to the next one.
+    # With hedge_delay > 0 the next provider also starts when the current one has not
+    # answered within that delay; the first answer wins.
+    def __init__(self, providers: list[Provider], budget_seconds: float, hedge_delay_seconds: float = 0.0) -> None:
+        self.providers = providers
+        self.budget_seconds = budget_seconds
+        self.hedge_delay_seconds = hedge_delay_seconds
+
+    async def _acquire(self, provider: Provider, deadline: float, queue: bool) -> None:
+        if time.monotonic() >= deadline:
+            raise LLMUnavailable(f"{provider.name} skipped; latency budget exhausted")
+        if not provider.breaker.allow():
+            LLM_SKIPPED.inc(provider=provider.name, reason="circuit_open")
+            raise LLMUnavailable(f"{provider.name} circuit is open")
+        if provider.semaphore.locked() and not queue:
+            provider.breaker.release()
+            LLM_SKIPPED.inc(provider=provider.name, reason="saturated")
+            raise LLMUnavailable(f"{provider.name} has no free slot")
+        try:
+            async with asyncio.timeout(deadline - time.monotonic()):
+                await provider.semaphore.acquire()
+        except TimeoutError as exc:
+            provider.breaker.release()
+            LLM_SKIPPED.inc(provider=provider.name, reason="saturated")
+            raise LLMUnavailable(f"{provider.name} has no free slot within the latency budget") from exc
+        except asyncio.CancelledError:
+            provider.breaker.release()
+            raise
+
+    def _failed(self, provider: Provider, mode: str, exc: Exception) -> LLMUnavailable:
+        provider.breaker.record_failure()
+        LLM_FAILURES.inc(provider=provider.name, mode=mode)
+        reason = "timed out within the latency budget" if isinstance(exc, TimeoutError) else str(exc)
+        return LLMUnavailable(f"{provider.name}: {reason}")
+
+    async def _attempt(self, provider: Provider, prompt: str, deadline: float, queue: bool) -> tuple[str, str]:
+        await self._acquire(provider, deadline, queue)
+        started = time.perf_counter()
+        try:
+            async with asyncio.timeout(deadline - time.monotonic()):
+                text = await provider.complete(prompt)
+        except asyncio.CancelledError:
+            provider.breaker.release()
+            raise
+        except Exception as exc:
+            raise self._failed(provider, "complete", exc) from exc
+        finally:
+            provider.semaphore.release()
+            LLM_SECONDS.observe(time.perf_counter() - started, provider=provider.name, mode="complete")
+        provider.breaker.record_success()
+        return provider.name, text
+
+    async def complete(self, prompt: str) -> tuple[str, str]:
+        # Returns (provider name, text) so callers can attribute the answer to whichever
+        # provider won, which is not necessarily the primary.
+        if not self.providers:
+            raise LLMUnavailable("No LLM provider is configured")
+        deadline = time.monotonic() + self.budget_seconds
+        waiting = list(self.providers)
+        running: set[asyncio.Task] = set()
+        errors: list[str] = []
+
+        def start_next() -> None:
+            provider = waiting.pop(0)
+            attempt = self._attempt(provider, prompt, deadline, queue=not waiting)
+            running.add(asyncio.create_task(attempt, name=f"llm-{provider.name}"))
+
+        try:
+            start_next()
+            while running:
+                hedge = (
+                    bool(waiting)
+                    and self.hedge_delay_seconds > 0
+                    and time.monotonic() + self.hedge_delay_seconds < deadline
+                )
+                # Each attempt enforces the deadline itself (and is counted as a provider
+                # failure when it overruns), so waiting without a timeout stays bounded.
+                done, running = await asyncio.wait(
+                    running,
+                    timeout=self.hedge_delay_seconds if hedge else None,
+                    return_when=asyncio.FIRST_COMPLETED,
+                )
+                for task in done:
+                    try:
+                        return task.result()
+                    except LLMUnavailable as exc:
+                        errors.append(str(exc))
+                if waiting and (done or hedge):
+                    if not done:
+                        LLM_HEDGES.inc(provider=waiting[0].name)
+                    start_next()
+        finally:
+            for task in running:
+                task.cancel()
+            if running:
+                await asyncio.gather(*running, return_exceptions=True)
+        raise LLMUnavailable("; ".join(errors))
+
+    async def stream(self, prompt: str) -> AsyncIterator[tuple[str, str]]:
+        # Yields (provider name, token). Streams fail over only until the first token
+        # arrives and are never hedged, since two token streams cannot be merged. The
+        # budget covers the first token.
+        if not self.providers:
+            raise LLMUnavailable("No LLM provider is configured")
+        deadline = time.monotonic() + self.budget_seconds
+        errors: list[str] = []
+        for position, provider in enumerate(self.providers, start=1):
+            try:
+                await self._acquire(provider, deadline, queue=position == len(self.providers))
+            except LLMUnavailable as exc:
+                errors.append(str(exc))
+                continue
+            started = time.perf_counter()
+            streaming = False
+            try:
+                async with aclosing(provider.stream(prompt)) as tokens:
+                    try:
+                        async with asyncio.timeout(deadline - time.monotonic()):
+                            first = await anext(tokens)
+                    except StopAsyncIteration:
+                        raise ValueError("Empty streamed response") from None
+                    streaming = True
+                    yield provider.name, first
+                    async for token in tokens:
+                        yield provider.name, token
+            except (GeneratorExit, asyncio.CancelledError):
+                provider.breaker.release()
+                raise
+            except Exception as exc:
+                failure = self._failed(provider, "stream", exc)
+                if streaming:
+                    raise failure from exc
+                errors.append(str(failure))
+                continue
+            finally:
+                provider.semaphore.release()
+                LLM_SECONDS.observe(time.perf_counter() - started, provider=provider.name, mode="stream")
+            provider.breaker.record_success()
+            return
+        raise LLMUnavailable("; ".join(errors))
@@ -1,16 +1,31 @@
+import asyncio
+import json
 import logging
+from collections.abc import AsyncIterator
 from functools import lru_cache
-from typing import Any
-
-import httpx
+from typing import TYPE_CHECKING, Any
 
 from ..config import get_settings
-from ..ml.predict import predict_yield
+from ..metrics import ADVISORY_FALLBACKS, STAGE_SECONDS
+from ..ml.predict import LoadedModel, known_items, predict_yields
 from ..schemas import PredictionInput
+from .advisory_cache import AdvisoryCache, prompt_key
+from .advisory_templates import get_advisory_templates
+from .llm_router import CircuitBreaker, LLMRouter, Provider
+
+if TYPE_CHECKING:
+    import httpx
 
 logger = logging.getLogger(__name__)
 settings = get_settings()
-GRAIN_CANDIDATES = ("Maize", "Rice, paddy", "Sorghum", "Wheat", "Soybeans")
+advisory_cache = AdvisoryCache(
+    settings.advisory_cache_path,
+    settings.advisory_cache_ttl_seconds,
+    settings.advisory_cache_max_entries,
+)
+_inflight: dict[str, asyncio.Future] = {}
+_http_client: "httpx.AsyncClient | None" = None
+_router: LLMRouter | None = None
 
 PROMPT_TEMPLATE = """You are an agricultural expert. Based on the following data:
 Area: {area}
@@ -37,67 +52,44 @@ Include at least 6 actionable bullet points total.
 """
 
 
-def _rainfall_band(rainfall_mm: float) -> str:
-    if rainfall_mm < 500:
-        return "low rainfall"
-    if rainfall_mm < 1000:
-        return "moderate rainfall"
-    return "high rainfall"
+def _grain_candidates(model: LoadedModel | None = None) -> list[str]:
+    configured = [value.strip() for value in settings.grain_candidates.split(";") if value.strip()]
+    if configured == ["*"]:
+        return known_items(model)
+    return list(dict.fromkeys(configured))
 
 
-def _temperature_band(avg_temp_c: float) -> str:
-    if avg_temp_c < 18:
-        return "cool temperature"
-    if avg_temp_c <= 30:
-        return "moderate-to-warm temperature"
-    return "high temperature"
+def score_with_grain_candidates(
+    payload: PredictionInput, model: LoadedModel | None = None
+) -> tuple[float, list[tuple[str, float]]]:
+    grains = _grain_candidates(model)
+    others = [grain for grain in grains if grain.lower() != payload.item.lower()]
+    # The entered crop and every candidate are scored together in one model call.
+    predictions = predict_yields(
+        [payload, *(payload.model_copy(update={"item": grain}) for grain in others)], model
+    )
 
+    predicted_yield_hg_ha = predictions[0]
+    rankings = [(grain, value / 10000.0) for grain, value in zip(others, predictions[1:])]
+    if len(others) < len(grains):
+        rankings.append((payload.item, predicted_yield_hg_ha / 10000.0))
+    rankings.sort(key=lambda value: value[1], reverse=True)
+    return predicted_yield_hg_ha, rankings
 
-def _build_grain_suggestions(payload: PredictionInput, predicted_yield_t_ha: float) -> str:
-    rankings: list[tuple[str, float]] = []
 
-    for grain in GRAIN_CANDIDATES:
+def _build_grain_suggestions(
+    payload: PredictionInput,
+    predicted_yield_t_ha: float,
+    rankings: list[tuple[str, float]] | None = None,
+    locale: str | None = None,
+) -> str:
+    if rankings is None:
         try:
-            candidate_payload = payload.model_copy(update={"item": grain})
-            predicted_hg_ha = predict_yield(candidate_payload)
-            rankings.append((grain, float(predicted_hg_ha) / 10000.0))
+            _, rankings = score_with_grain_candidates(payload)
         except Exception as exc:
-            logger.debug("Unable to score candidate grain %s: %s", grain, exc)
-
-    if not rankings:
-        return ""
-
-    rankings.sort(key=lambda value: value[1], reverse=True)
-    top_grain, top_yield = rankings[0]
-    current_grain = payload.item
-    gain = top_yield - predicted_yield_t_ha
-    pct_gain = (gain / predicted_yield_t_ha * 100.0) if predicted_yield_t_ha > 0 else 0.0
-
-    top_rank_lines = [f"- {index}. {grain}: {yield_t_ha:.2f} t/ha" for index, (grain, yield_t_ha) in enumerate(rankings[:3], start=1)]
-
-    recommendation = (
-        f"- Best grain for current conditions is {top_grain} with estimated yield {top_yield:.2f} t/ha."
-        if top_grain.lower() != current_grain.lower() and gain > 0
-        else f"- Your selected grain {current_grain} is already near the top for the given condition ({predicted_yield_t_ha:.2f} t/ha)."
-    )
-
-    switch_line = (
-        f"- Switching from {current_grain} to {top_grain} may add about {gain:.2f} t/ha ({pct_gain:.1f}% improvement)."
-        if top_grain.lower() != current_grain.lower() and gain > 0
-        else f"- Keep optimizing {current_grain} with the same condition profile to protect yield stability."
-    )
-
-    return (
-        "Grain Suggestion (Point-wise):\n"
-        f"- Entered grain: {current_grain}.\n"
-        f"- Condition summary: {_rainfall_band(payload.average_rain_fall_mm_per_year)} ({payload.average_rain_fall_mm_per_year} mm/year), "
-        f"{_temperature_band(payload.avg_temp)} ({payload.avg_temp} C), pesticides {payload.pesticides_tonnes} tonnes.\n"
-        f"- Estimated yield for entered grain: {predicted_yield_t_ha:.2f} t/ha.\n"
-        f"{recommendation}\n"
-        f"{switch_line}\n"
-        "- Top grain options for the same condition:\n"
-        f"{'\n'.join(top_rank_lines)}"
-    )
+            logger.debug("Unable to score candidate grains: %s", exc)
+            rankings = []
+    return get_advisory_templates().grain_suggestions(payload, predicted_yield_t_ha, rankings, locale)
 
 
 def _fallback_advice(
@@ -106,43 +98,67 @@ def _fallback_advice(
     risk_level: str,
     planting_schedule: dict[str, str | list[str]],
     food_security_level: str,
+    locale: str | None = None,
 ) -> str:
-    actions = planting_schedule.get("actions", [])
-    first_action = actions[0] if actions else "Review field conditions weekly and update operations accordingly."
-    second_action = actions[1] if len(actions) > 1 else "Coordinate irrigation and nutrient timing with forecast rainfall."
-
-    return (
-        "Executive Summary:\n"
-        f"- Predicted yield for {payload.item} in {payload.area} is {predicted_yield_t_ha:.2f} t/ha.\n"
-        f"- Current production risk is {risk_level}; food security status is {food_security_level}.\n\n"
-        "Key Risks:\n"
-        f"- Rainfall profile ({payload.average_rain_fall_mm_per_year} mm/year) and temperature ({payload.avg_temp} C) may affect yield stability.\n"
-        f"- Pesticide intensity ({payload.pesticides_tonnes} tonnes) should be aligned with integrated pest management.\n\n"
-        "Recommended Actions (next 2-4 weeks):\n"
-        f"- {planting_schedule.get('recommended_window', 'Follow local planting calendar and update by weekly forecast.')}\n"
-        f"- {planting_schedule.get('irrigation_plan', 'Maintain stage-wise irrigation discipline.')}\n"
-        f"- {first_action}\n"
-        f"- {second_action}\n\n"
-        "Nutrient and Crop Strategy:\n"
-        "- Apply nutrient doses in split applications and verify with local soil-test guidance.\n"
-        "- Keep a backup seed plan with a short-duration alternative crop for adverse weather scenarios.\n\n"
-        "Food Security and Contingency Plan:\n"
-        "- Track expected output against household or local demand and review every 2 weeks.\n"
-        "- If risk rises, prioritize water access, pest surveillance, and diversified planting blocks."
+    return get_advisory_templates().fallback(
+        payload, predicted_yield_t_ha, risk_level, planting_schedule, food_security_level, locale
     )
 
 
-def _ollama_response(prompt: str) -> str:
+def _get_http_client() -> "httpx.AsyncClient":
+    global _http_client
+    if _http_client is None or _http_client.is_closed:
+        # Imported on first use so deployments with LLM_PROVIDER=none never load httpx.
+        import httpx
+
+        _http_client = httpx.AsyncClient(
+            timeout=settings.ollama_timeout_seconds,
+            limits=httpx.Limits(
+                max_connections=settings.llm_max_connections,
+                max_keepalive_connections=settings.llm_max_connections,
+                keepalive_expiry=60,
+            ),
+        )
+    return _http_client
+
+
+async def close_http_client() -> None:
+    global _http_client, _router
+    # Router semaphores belong to the event loop that is shutting down.
+    _router = None
+    if _http_client is not None:
+        await _http_client.aclose()
+        _http_client = None
+
+
+async def _ollama_response(prompt: str) -> str:
     url = f"{settings.ollama_base_url.rstrip('/')}/api/generate"
     payload = {"model": settings.ollama_model, "prompt": prompt, "stream": False}
-    with httpx.Client(timeout=settings.ollama_timeout_seconds) as client:
-        response = client.post(url, json=payload)
+    response = await _get_http_client().post(url, json=payload)
+    response.raise_for_status()
+    data = response.json()
+    text = data.get("response", "").strip()
+    if not text:
+        raise ValueError("Empty response from Ollama")
+    return text
+
+
+async def _ollama_stream(prompt: str) -> AsyncIterator[str]:
+    url = f"{settings.ollama_base_url.rstrip('/')}/api/generate"
+    payload = {"model": settings.ollama_model, "prompt": prompt, "stream": True}
+    async with _get_http_client().stream("POST", url, json=payload) as response:
         response.raise_for_status()
-        data = response.json()
-        text = data.get("response", "").strip()
-        if not text:
-            raise ValueError("Empty response from Ollama")
-        return text
+        async for line in response.aiter_lines():
+            if not line.strip():
+                continue
+            data = json.loads(line)
+            if data.get("error"):
+                raise ValueError(f"Ollama stream failed: {data['error']}")
+            token = data.get("response", "")
+            if token:
+                yield token
+            if data.get("done"):
+                break
 
 
 def _llm_content_to_text(content: Any) -> str:
@@ -187,21 +203,121 @@ def _groq_client():
     )
 
 
-def _groq_response(prompt: str) -> str:
+async def _groq_response(prompt: str) -> str:
     client = _groq_client()
-    response = client.invoke(prompt)
+    response = await client.ainvoke(prompt)
     text = _llm_content_to_text(getattr(response, "content", ""))
     if not text:
         raise ValueError("Empty response from Groq")
     return text
 
 
-def _llm_response(prompt: str) -> str:
-    if settings.llm_provider == "groq":
-        return _groq_response(prompt)
-    if settings.llm_provider == "ollama":
-        return _ollama_response(prompt)
-    raise ValueError(f"Unsupported llm_provider: {settings.llm_provider}")
+async def _groq_stream(prompt: str) -> AsyncIterator[str]:
+    client = _groq_client()
+    async for chunk in client.astream(prompt):
+        content = getattr(chunk, "content", "")
+        token = content if isinstance(content, str) else _llm_content_to_text(content)
+        if token:
+            yield token
+
+
+PROVIDERS = {
+    "groq": (_groq_response, _groq_stream),
+    "ollama": (_ollama_response, _ollama_stream),
+}
+
+
+def _get_router() -> LLMRouter:
+    global _router
+    if _router is None:
+        names = list(dict.fromkeys(name for name in (settings.llm_provider, settings.llm_secondary_provider) if name))
+        for name in names:
+            if name not in PROVIDERS and name != "none":
+                logger.warning("Unsupported LLM provider %r is ignored", name)
+        _router = LLMRouter(
+            [
+                Provider(
+                    name,
+                    *PROVIDERS[name],
+                    max_concurrency=settings.llm_max_concurrency,
+                    breaker=CircuitBreaker(settings.llm_breaker_failures, settings.llm_breaker_reset_seconds),
+                )
+                for name in names
+                if name in PROVIDERS
+            ],
+            budget_seconds=settings.llm_latency_budget_seconds,
+            hedge_delay_seconds=settings.llm_hedge_delay_seconds,
+        )
+    return _router
+
+
+def llm_enabled() -> bool:
+    return bool(_get_router().providers)
+
+
+def _provider_model(provider: str) -> str:
+    if provider == "groq":
+        return settings.groq_model
+    if provider == "ollama":
+        return settings.ollama_model
+    return ""
+
+
+def _provider_chain() -> str:
+    return "+".join(provider.name for provider in _get_router().providers)
+
+
+def _answer_key(provider: str, prompt: str) -> str:
+    return prompt_key(provider, _provider_model(provider), prompt)
+
+
+def _cached_answer(prompt: str) -> str | None:
+    # Answers are cached under the provider that produced them; any provider in the chain
+    # may serve a hit, checked in chain order.
+    for provider in _get_router().providers:
+        cached = advisory_cache.get(_answer_key(provider.name, prompt))
+        if cached is not None:
+            return cached
+    return None
+
+
+async def _cached_llm_response(prompt: str) -> str:
+    cached = await asyncio.to_thread(_cached_answer, prompt)
+    if cached is not None:
+        return cached
+
+    # The winner is unknown until the router answers, so concurrent identical prompts are
+    # coalesced on the whole provider chain.
+    key = prompt_key(_provider_chain(), prompt)
+    pending = _inflight.get(key)
+    if pending is not None:
+        # Another request is already asking the provider for this exact prompt.
+        try:
+            return await asyncio.shield(pending)
+        except asyncio.CancelledError:
+            if not pending.cancelled():
+                raise
+
+    future = asyncio.get_running_loop().create_future()
+    _inflight[key] = future
+    try:
+        provider, advisory = await _get_router().complete(prompt)
+    except asyncio.CancelledError:
+        future.cancel()
+        raise
+    except Exception as exc:
+        future.set_exception(exc)
+        # Mark the exception as retrieved in case no other request was waiting on it.
+        future.exception()
+        raise
+    else:
+        future.set_result(advisory)
+    finally:
+        if _inflight.get(key) is future:
+            del _inflight[key]
+
+    await asyncio.to_thread(advisory_cache.set, _answer_key(provider, prompt), advisory)
+    return advisory
 
 
 def _build_advisory_prompt(
@@ -225,14 +341,26 @@ def _build_advisory_prompt(
     )
 
 
-def generate_advisory(
+async def generate_advisory(
     payload: PredictionInput,
     predicted_yield_t_ha: float,
     risk_level: str,
     planting_schedule: dict[str, str | list[str]],
     food_security_level: str,
+    grain_rankings: list[tuple[str, float]] | None = None,
+    locale: str | None = None,
+    use_llm: bool = True,
 ) -> str:
-    grain_suggestions = _build_grain_suggestions(payload, predicted_yield_t_ha)
+    with STAGE_SECONDS.time(stage="grain_suggestions"):
+        grain_suggestions = _build_grain_suggestions(payload, predicted_yield_t_ha, grain_rankings, locale)
+    if not use_llm or not llm_enabled():
+        # LLM-off: the rule-based text is the advisory itself, not a fallback.
+        with STAGE_SECONDS.time(stage="template"):
+            advisory = _fallback_advice(
+                payload, predicted_yield_t_ha, risk_level, planting_schedule, food_security_level, locale
+            )
+        return f"{advisory}\n\n{grain_suggestions}" if grain_suggestions else advisory
+
     prompt = _build_advisory_prompt(
         payload,
         predicted_yield_t_ha,
@@ -242,12 +370,88 @@ def generate_advisory(
     )
 
     try:
-        advisory = _llm_response(prompt)
+        advisory = await _cached_llm_response(prompt)
         return f"{advisory}\n\n{grain_suggestions}" if grain_suggestions else advisory
     except Exception as exc:
         logger.warning("LLM advisory unavailable; using fallback advice: %s", exc)
 
-    fallback_advisory = _fallback_advice(
-        payload, predicted_yield_t_ha, risk_level, planting_schedule, food_security_level
-    )
+    # Every provider in the chain failed, so the fallback is attributed to the chain.
+    ADVISORY_FALLBACKS.inc(provider=_provider_chain())
+    with STAGE_SECONDS.time(stage="fallback"):
+        fallback_advisory = _fallback_advice(
+            payload, predicted_yield_t_ha, risk_level, planting_schedule, food_security_level, locale
+        )
     return f"{fallback_advisory}\n\n{grain_suggestions}" if grain_suggestions else fallback_advisory
+
+
+async def _stream_llm_advisory(
+    payload: PredictionInput,
+    predicted_yield_t_ha: float,
+    risk_level: str,
+    planting_schedule: dict[str, str | list[str]],
+    food_security_level: str,
+    locale: str | None,
+) -> AsyncIterator[tuple[str, str]]:
+    prompt = _build_advisory_prompt(
+        payload,
+        predicted_yield_t_ha,
+        risk_level,
+        planting_schedule,
+        food_security_level,
+    )
+    cached = await asyncio.to_thread(_cached_answer, prompt)
+    if cached is not None:
+        yield "token", cached
+        return
+
+    # The provider that started streaming, so a stream that breaks mid-way is attributed
+    # to it rather than to the whole chain.
+    provider = _provider_chain()
+    tokens: list[str] = []
+    try:
+        async for provider, token in _get_router().stream(prompt):
+            if not tokens and not token.strip():
+                continue
+            tokens.append(token)
+            yield "token", token
+        advisory = "".join(tokens).strip()
+        if not advisory:
+            raise ValueError("Empty streamed response from LLM")
+        await asyncio.to_thread(advisory_cache.set, _answer_key(provider, prompt), advisory)
+    except Exception as exc:
+        logger.warning("LLM advisory stream unavailable; using fallback advice: %s", exc)
+        ADVISORY_FALLBACKS.inc(provider=provider)
+        with STAGE_SECONDS.time(stage="fallback"):
+            fallback_advisory = _fallback_advice(
+                payload, predicted_yield_t_ha, risk_level, planting_schedule, food_security_level, locale
+            )
+        yield "fallback", fallback_advisory
+
+
+# Yields ("token" | "fallback" | "grains", text); a "fallback" event replaces any streamed tokens.
+async def stream_advisory(
+    payload: PredictionInput,
+    predicted_yield_t_ha: float,
+    risk_level: str,
+    planting_schedule: dict[str, str | list[str]],
+    food_security_level: str,
+    grain_rankings: list[tuple[str, float]] | None = None,
+    locale: str | None = None,
+) -> AsyncIterator[tuple[str, str]]:
+    if llm_enabled():
+        async for event in _stream_llm_advisory(
+            payload, predicted_yield_t_ha, risk_level, planting_schedule, food_security_level, locale
+        ):
+            yield event
+    else:
+        # LLM-off: the rule-based advisory arrives as one event, as it does after a failure.
+        with STAGE_SECONDS.time(stage="template"):
+            advisory = _fallback_advice(
+                payload, predicted_yield_t_ha, risk_level, planting_schedule, food_security_level, locale
+            )
+        yield "fallback", advisory
+
+    with STAGE_SECONDS.time(stage="grain_suggestions"):
+        grain_suggestions = _build_grain_suggestions(payload, predicted_yield_t_ha, grain_rankings, locale)
+    if grain_suggestions:
+        yield "grains", grain_suggestions
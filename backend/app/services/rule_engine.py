@@ -0,0 +1,354 @@
+import json
+from collections.abc import Mapping, Sequence
+from functools import lru_cache
+from itertools import product
+from pathlib import Path
+from typing import Any
+
+import numpy as np
+
+from ..config import get_settings
+from ..schemas import PredictionInput
+
+settings = get_settings()
+BUNDLED_RULES_PATH = Path(__file__).with_name("rules.json")
+CONDITIONS = ("below", "above", "at_least", "outside")
+# Resolved thresholds are cached per (area, item); bounded because both come from requests.
+RESOLVED_CACHE_SIZE = 4096
+
+Columns = Mapping[str, Any]
+
+
+def payload_columns(payloads: Sequence[PredictionInput]) -> dict[str, list]:
+    return {
+        "Area": [payload.area for payload in payloads],
+        "Item": [payload.item for payload in payloads],
+        "Year": [payload.year for payload in payloads],
+        "average_rain_fall_mm_per_year": [payload.average_rain_fall_mm_per_year for payload in payloads],
+        "pesticides_tonnes": [payload.pesticides_tonnes for payload in payloads],
+        "avg_temp": [payload.avg_temp for payload in payloads],
+        "farm_area_hectares": [payload.farm_area_hectares for payload in payloads],
+    }
+
+
+def payload_row(payload: PredictionInput) -> dict[str, Any]:
+    return {
+        "Area": payload.area,
+        "Item": payload.item,
+        "Year": payload.year,
+        "average_rain_fall_mm_per_year": payload.average_rain_fall_mm_per_year,
+        "pesticides_tonnes": payload.pesticides_tonnes,
+        "avg_temp": payload.avg_temp,
+        "farm_area_hectares": payload.farm_area_hectares,
+    }
+
+
+def _referenced_thresholds(spec: Mapping[str, Any]) -> list[str]:
+    for condition in CONDITIONS:
+        if condition in spec:
+            value = spec[condition]
+            return list(value) if condition == "outside" else [value]
+    raise ValueError(f"Rule {spec} has no condition; expected one of {', '.join(CONDITIONS)}")
+
+
+def _matches(spec: Mapping[str, Any], values: np.ndarray, limits: Mapping[str, Any]) -> np.ndarray:
+    if "below" in spec:
+        return values < limits[spec["below"]]
+    if "above" in spec:
+        return values > limits[spec["above"]]
+    if "at_least" in spec:
+        return values >= limits[spec["at_least"]]
+    low, high = spec["outside"]
+    return (values < limits[low]) | (values > limits[high])
+
+
+def _first_band(bands: Sequence[Mapping[str, Any]], values: np.ndarray, limits: Mapping[str, Any]) -> np.ndarray:
+    # Index of the first matching band per row, like an if/elif chain; len(bands) if none matches.
+    selected = np.full(values.shape, len(bands), dtype=np.intp)
+    for index in range(len(bands) - 1, -1, -1):
+        selected[_matches(bands[index], values, limits)] = index
+    return selected
+
+
+def _first_band_one(bands: Sequence[Mapping[str, Any]], value: float, limits: Mapping[str, float]) -> int:
+    for index, band in enumerate(bands):
+        if _matches(band, value, limits):
+            return index
+    return len(bands)
+
+
+def _lower_keys(mapping: Mapping[str, Mapping[str, float]]) -> dict[str, dict[str, float]]:
+    return {key.lower(): {name: float(value) for name, value in values.items()} for key, values in mapping.items()}
+
+
+class RuleEngine:
+    # Evaluates the risk, planting and food security rule table over column arrays, one
+    # numpy operation per rule rather than per row. Every rule outcome is a small integer
+    # code, and the texts for each code are assembled once when the table is loaded.
+    def __init__(self, table: Mapping[str, Any]) -> None:
+        thresholds = table["thresholds"]
+        self._defaults = {name: float(value) for name, value in thresholds["default"].items()}
+        self._names = list(self._defaults)
+        self._crops = _lower_keys(thresholds.get("crops", {}))
+        self._regions = _lower_keys(thresholds.get("regions", {}))
+        self._region_crops = _lower_keys(thresholds.get("region_crops", {}))
+        self._resolved: dict[tuple[str, str], tuple[np.ndarray, dict[str, float]]] = {}
+
+        self._risk_factors = table["risk"]["factors"]
+        self._risk_levels = table["risk"]["levels"]
+        self._risk_level_names = np.array(
+            [level["level"] for level in self._risk_levels] + [table["risk"]["default_level"]], dtype=object
+        )
+        self._risk_scores = [
+            np.array([band["score"] for band in factor["bands"]] + [0], dtype=np.float64)
+            for factor in self._risk_factors
+        ]
+        self._risk_score_values = [scores.tolist() for scores in self._risk_scores]
+        self._risk_strides = np.cumprod([1] + [len(factor["bands"]) + 1 for factor in self._risk_factors])[:-1].tolist()
+        self._risk_warnings = [
+            tuple(
+                factor["bands"][band]["warning"]
+                for factor, band in zip(self._risk_factors, bands)
+                if band < len(factor["bands"])
+            )
+            for bands in self._outcomes([len(factor["bands"]) + 1 for factor in self._risk_factors])
+        ]
+
+        planting = table["planting"]
+        self._window = planting["window"]
+        self._actions = planting["actions"]
+        windows = [*self._window["bands"], self._window["default"]]
+        self._schedules = [
+            (
+                windows[window]["recommended_window"],
+                windows[window]["irrigation_plan"],
+                (
+                    *(action["action"] for bit, action in enumerate(self._actions) if code & (1 << bit)),
+                    *planting.get("standing_actions", []),
+                ),
+            )
+            for window in range(len(windows))
+            for code in range(1 << len(self._actions))
+        ]
+
+        food = table["food_security"]
+        self._security_levels = food["levels"]
+        self._security_level_names = np.array(
+            [level["level"] for level in self._security_levels] + [food["default"]["level"]], dtype=object
+        )
+        self._security_notes = [tuple(level["notes"]) for level in [*self._security_levels, food["default"]]]
+        self._pessimistic_note = food.get("pessimistic_note", "")
+        self._validate()
+
+        # The batch methods hand out one list/dict per rule outcome, shared by every row with
+        # that outcome, so results must be treated as read-only. Single-row methods copy.
+        self._shared_warnings = [list(warnings) for warnings in self._risk_warnings]
+        self._shared_schedules = [
+            {"recommended_window": recommended, "irrigation_plan": irrigation, "actions": list(actions)}
+            for recommended, irrigation, actions in self._schedules
+        ]
+        self._shared_notes = [list(notes) for notes in self._security_notes]
+
+    @staticmethod
+    def _outcomes(sizes: Sequence[int]) -> list[tuple[int, ...]]:
+        # Outcome codes in mixed radix, first factor fastest, matching _risk_strides.
+        return [tuple(reversed(combo)) for combo in product(*(range(size) for size in reversed(sizes)))]
+
+    def _validate(self) -> None:
+        referenced = [
+            name for factor in self._risk_factors for band in factor["bands"] for name in _referenced_thresholds(band)
+        ]
+        referenced += [level["min_score"] for level in self._risk_levels]
+        referenced += [name for band in self._window["bands"] for name in _referenced_thresholds(band)]
+        referenced += [name for action in self._actions for name in _referenced_thresholds(action)]
+        referenced += [level["adequacy_below"] for level in self._security_levels]
+        referenced.append("baseline_t_ha")
+        for overrides in (self._crops, self._regions, self._region_crops):
+            referenced += [name for values in overrides.values() for name in values]
+        unknown = sorted(set(referenced) - set(self._defaults))
+        if unknown:
+            raise ValueError(f"Rule table references undefined thresholds: {', '.join(unknown)}")
+
+    @classmethod
+    def from_file(cls, path: str | Path) -> "RuleEngine":
+        try:
+            table = json.loads(Path(path).read_text(encoding="utf-8"))
+        except (OSError, ValueError) as exc:
+            raise ValueError(f"Rule table {path} could not be read: {exc}") from exc
+        return cls(table)
+
+    def _resolve(self, area: str, item: str) -> tuple[np.ndarray, dict[str, float]]:
+        # Defaults, then crop, region and region+crop overrides, most specific last.
+        key = (area, item)
+        resolved = self._resolved.get(key)
+        if resolved is None:
+            merged = dict(self._defaults)
+            area_key, item_key = area.lower(), item.lower()
+            for overrides in (
+                self._crops.get(item_key),
+                self._regions.get(area_key),
+                self._region_crops.get(f"{area_key}|{item_key}"),
+            ):
+                if overrides:
+                    merged.update(overrides)
+            resolved = (np.array([merged[name] for name in self._names], dtype=np.float64), merged)
+            if len(self._resolved) < RESOLVED_CACHE_SIZE:
+                self._resolved[key] = resolved
+        return resolved
+
+    def limits(self, columns: Columns) -> dict[str, Any]:
+        # Thresholds per row as arrays, or as plain floats when every row shares one area/item.
+        areas, items = columns["Area"], columns["Item"]
+        n_rows = len(columns["avg_temp"])
+        if isinstance(areas, str):
+            areas = [areas] * n_rows
+        if isinstance(items, str):
+            items = [items] * n_rows
+        keys = list(zip(areas, items))
+        index = {key: position for position, key in enumerate(dict.fromkeys(keys))}
+        if not index:
+            return dict(self._defaults)
+        if len(index) == 1:
+            return self._resolve(*keys[0])[1]
+        codes = np.fromiter(map(index.__getitem__, keys), dtype=np.intp, count=n_rows)
+        per_row = np.stack([self._resolve(area, item)[0] for area, item in index])[codes]
+        return {name: per_row[:, position] for position, name in enumerate(self._names)}
+
+    @staticmethod
+    def _values(columns: Columns, field: str) -> np.ndarray:
+        return np.asarray(columns[field], dtype=np.float64)
+
+    def _risk_codes(self, columns: Columns, limits: Mapping[str, Any]) -> tuple[np.ndarray, np.ndarray]:
+        score = np.zeros(len(columns["avg_temp"]), dtype=np.float64)
+        outcome = np.zeros(score.shape, dtype=np.intp)
+        for factor, scores, stride in zip(self._risk_factors, self._risk_scores, self._risk_strides):
+            band = _first_band(factor["bands"], self._values(columns, factor["field"]), limits)
+            score += scores[band]
+            outcome += band * stride
+        level = np.full(score.shape, len(self._risk_levels), dtype=np.intp)
+        for index in range(len(self._risk_levels) - 1, -1, -1):
+            level[score >= limits[self._risk_levels[index]["min_score"]]] = index
+        return level, outcome
+
+    def risk_levels(self, columns: Columns) -> np.ndarray:
+        level, _ = self._risk_codes(columns, self.limits(columns))
+        return self._risk_level_names[level]
+
+    def risk(self, columns: Columns) -> tuple[list[str], list[list[str]]]:
+        level, outcome = self._risk_codes(columns, self.limits(columns))
+        warnings = self._shared_warnings
+        return self._risk_level_names[level].tolist(), [warnings[code] for code in outcome.tolist()]
+
+    def planting(self, columns: Columns) -> list[dict[str, str | list[str]]]:
+        limits = self.limits(columns)
+        window = _first_band(self._window["bands"], self._values(columns, self._window["field"]), limits)
+        code = window << len(self._actions)
+        for bit, action in enumerate(self._actions):
+            code |= _matches(action, self._values(columns, action["field"]), limits).astype(np.intp) << bit
+        return list(map(self._shared_schedules.__getitem__, code.tolist()))
+
+    def _security_codes(self, ratio: np.ndarray, risk: np.ndarray, limits: Mapping[str, Any]) -> np.ndarray:
+        level = np.full(ratio.shape, len(self._security_levels), dtype=np.intp)
+        for index in range(len(self._security_levels) - 1, -1, -1):
+            spec = self._security_levels[index]
+            matched = ratio < limits[spec["adequacy_below"]]
+            for risk_level in spec["risk_levels"]:
+                matched |= risk == risk_level
+            level[matched] = index
+        return level
+
+    def food_security(
+        self,
+        columns: Columns,
+        predicted_t_ha: Sequence[float] | np.ndarray,
+        risk_levels: Sequence[str] | np.ndarray,
+        pessimistic_t_ha: Sequence[float] | np.ndarray | None = None,
+    ) -> tuple[list[str], list[float], list[list[str]]]:
+        limits = self.limits(columns)
+        predicted = np.asarray(predicted_t_ha, dtype=np.float64)
+        risk = np.asarray(risk_levels, dtype=object)
+        production = predicted * self._values(columns, "farm_area_hectares")
+        baseline = np.asarray(limits["baseline_t_ha"], dtype=np.float64)
+        safe_baseline = np.where(baseline > 0, baseline, 1.0)
+
+        point_level = self._security_codes(np.where(baseline > 0, predicted / safe_baseline, 0.0), risk, limits)
+        if pessimistic_t_ha is None:
+            return (
+                self._security_level_names[point_level].tolist(),
+                production.tolist(),
+                list(map(self._shared_notes.__getitem__, point_level.tolist())),
+            )
+
+        # With a prediction interval the decision uses its lower bound; rows without one (NaN)
+        # keep the point estimate.
+        decision = np.fmin(predicted, np.asarray(pessimistic_t_ha, dtype=np.float64))
+        level = self._security_codes(np.where(baseline > 0, decision / safe_baseline, 0.0), risk, limits)
+        notes = list(map(self._shared_notes.__getitem__, level.tolist()))
+        for row in np.flatnonzero(level != point_level).tolist():
+            notes[row] = [
+                *notes[row],
+                self._pessimistic_note.format(decision_t_ha=decision[row], expected_t_ha=predicted[row]),
+            ]
+        return self._security_level_names[level].tolist(), production.tolist(), notes
+
+    # Single-row variants: the same rules over plain floats, since numpy's per-call overhead
+    # dominates when there is only one row.
+    def row_limits(self, row: Mapping[str, Any]) -> dict[str, float]:
+        return self._resolve(row["Area"], row["Item"])[1]
+
+    def risk_one(self, row: Mapping[str, Any]) -> tuple[str, list[str]]:
+        limits = self.row_limits(row)
+        score = 0.0
+        outcome = 0
+        for factor, scores, stride in zip(self._risk_factors, self._risk_score_values, self._risk_strides):
+            band = _first_band_one(factor["bands"], float(row[factor["field"]]), limits)
+            score += scores[band]
+            outcome += band * stride
+        level = next(
+            (index for index, spec in enumerate(self._risk_levels) if score >= limits[spec["min_score"]]),
+            len(self._risk_levels),
+        )
+        return self._risk_level_names[level], list(self._risk_warnings[outcome])
+
+    def planting_one(self, row: Mapping[str, Any]) -> dict[str, str | list[str]]:
+        limits = self.row_limits(row)
+        code = _first_band_one(self._window["bands"], float(row[self._window["field"]]), limits)
+        code <<= len(self._actions)
+        for bit, action in enumerate(self._actions):
+            if _matches(action, float(row[action["field"]]), limits):
+                code |= 1 << bit
+        recommended, irrigation, actions = self._schedules[code]
+        return {"recommended_window": recommended, "irrigation_plan": irrigation, "actions": list(actions)}
+
+    def _security_code_one(self, ratio: float, risk_level: str, limits: Mapping[str, float]) -> int:
+        for index, spec in enumerate(self._security_levels):
+            if risk_level in spec["risk_levels"] or ratio < limits[spec["adequacy_below"]]:
+                return index
+        return len(self._security_levels)
+
+    def food_security_one(
+        self,
+        row: Mapping[str, Any],
+        predicted_t_ha: float,
+        risk_level: str,
+        pessimistic_t_ha: float | None = None,
+    ) -> tuple[str, float, list[str]]:
+        limits = self.row_limits(row)
+        production = predicted_t_ha * float(row["farm_area_hectares"])
+        baseline = limits["baseline_t_ha"]
+        ratio = predicted_t_ha / baseline if baseline > 0 else 0.0
+        point_level = self._security_code_one(ratio, risk_level, limits)
+        if pessimistic_t_ha is None:
+            return self._security_level_names[point_level], production, list(self._security_notes[point_level])
+
+        decision = min(predicted_t_ha, pessimistic_t_ha)
+        level = self._security_code_one(decision / baseline if baseline > 0 else 0.0, risk_level, limits)
+        notes = list(self._security_notes[level])
+        if level != point_level:
+            notes.append(self._pessimistic_note.format(decision_t_ha=decision, expected_t_ha=predicted_t_ha))
+        return self._security_level_names[level], production, notes
+
+
+@lru_cache(maxsize=1)
+def get_rule_engine() -> RuleEngine:
+    return RuleEngine.from_file(settings.rules_path or BUNDLED_RULES_PATH)
@@ -0,0 +1,65 @@
+import numpy as np
+
+from ..schemas import PredictionInput, PredictionSweepInput
+from .rule_engine import get_rule_engine
+
+# Grid axes in the order points are flattened; the last axis varies fastest.
+SWEEP_AXES = ("Year", "average_rain_fall_mm_per_year", "avg_temp", "pesticides_tonnes")
+
+# Request ranges and the PredictionInput field each one sweeps.
+SWEPT_FIELDS = {
+    "rainfall": "average_rain_fall_mm_per_year",
+    "temperature": "avg_temp",
+    "pesticides": "pesticides_tonnes",
+}
+
+
+def swept_fields(payload: PredictionSweepInput) -> set[str]:
+    return {field for name, field in SWEPT_FIELDS.items() if getattr(payload, name) is not None}
+
+
+def _axis(sweep, default: float) -> np.ndarray:
+    if sweep is None:
+        return np.array([default], dtype=np.float64)
+    return np.linspace(sweep.start, sweep.stop, sweep.steps)
+
+
+def sweep_axes(payload: PredictionSweepInput) -> dict[str, np.ndarray]:
+    base = payload.base
+    if payload.year is None:
+        years = np.array([base.year], dtype=np.int64)
+    else:
+        years = np.arange(payload.year.start, payload.year.stop + 1, payload.year.step, dtype=np.int64)
+    return {
+        "Year": years,
+        "average_rain_fall_mm_per_year": _axis(payload.rainfall, base.average_rain_fall_mm_per_year),
+        "avg_temp": _axis(payload.temperature, base.avg_temp),
+        "pesticides_tonnes": _axis(payload.pesticides, base.pesticides_tonnes),
+    }
+
+
+def grid_shape(axes: dict[str, np.ndarray]) -> tuple[int, ...]:
+    return tuple(len(axes[name]) for name in SWEEP_AXES)
+
+
+def expand_grid(base: PredictionInput, axes: dict[str, np.ndarray]) -> dict[str, np.ndarray | list[str]]:
+    # Feature columns for every grid point, ready for one vectorized model call.
+    grids = np.meshgrid(*(axes[name] for name in SWEEP_AXES), indexing="ij")
+    columns: dict[str, np.ndarray | list[str]] = {
+        name: grid.ravel() for name, grid in zip(SWEEP_AXES, grids)
+    }
+    count = grids[0].size
+    columns["Area"] = [base.area] * count
+    columns["Item"] = [base.item] * count
+    return columns
+
+
+def sweep_risk_levels(base: PredictionInput, axes: dict[str, np.ndarray]) -> list[str]:
+    # The risk rules ignore the year, so they run once per climate combination and the
+    # result is repeated along the year axis.
+    climate = np.meshgrid(*(axes[name] for name in SWEEP_AXES[1:]), indexing="ij")
+    columns = {name: grid.ravel() for name, grid in zip(SWEEP_AXES[1:], climate)}
+    columns["Area"] = base.area
+    columns["Item"] = base.item
+    levels = get_rule_engine().risk_levels(columns).reshape(climate[0].shape)
+    return np.broadcast_to(levels, grid_shape(axes)).ravel().tolist()
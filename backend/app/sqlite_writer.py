@@ -0,0 +1,136 @@
+import logging
+import queue
+import sqlite3
+import time
+from collections.abc import Callable
+from concurrent.futures import Future
+from pathlib import Path
+from threading import Lock, Thread
+from typing import Any
+
+logger = logging.getLogger(__name__)
+
+WriteFn = Callable[[sqlite3.Connection], Any]
+_STOP = object()
+
+
+def connect(db_path: Path, synchronous: str = "NORMAL", **kwargs: Any) -> sqlite3.Connection:
+    conn = sqlite3.connect(db_path, timeout=10, **kwargs)
+    conn.row_factory = sqlite3.Row
+    conn.execute("PRAGMA busy_timeout = 10000")
+    conn.execute(f"PRAGMA synchronous = {synchronous}")
+    return conn
+
+
+# A single writer thread group-commits queued jobs: it collects up to batch_size jobs or
+# waits batch_interval_ms after the first one, then runs them in one transaction. Each
+# job gets its own savepoint so one failing job does not roll back the rest of the batch.
+class SQLiteWriter:
+    def __init__(
+        self,
+        db_path: Path,
+        batch_size: int = 64,
+        batch_interval_ms: float = 1.0,
+        synchronous: str = "NORMAL",
+    ) -> None:
+        self.db_path = db_path
+        self.batch_size = max(1, batch_size)
+        self.batch_interval = max(0.0, batch_interval_ms) / 1000.0
+        self.synchronous = synchronous
+        self._jobs: queue.Queue = queue.Queue()
+        self._thread: Thread | None = None
+        self._closed = False
+        self._state_lock = Lock()
+
+    def start(self) -> None:
+        with self._state_lock:
+            if self._thread is not None:
+                return
+            conn = connect(self.db_path, self.synchronous, isolation_level=None, check_same_thread=False)
+            self._closed = False
+            self._thread = Thread(target=self._run, args=(conn,), name="sqlite-writer", daemon=True)
+            self._thread.start()
+
+    def close(self, timeout: float = 10.0) -> None:
+        with self._state_lock:
+            if self._thread is None:
+                return
+            self._closed = True
+            self._jobs.put(_STOP)
+            thread = self._thread
+            self._thread = None
+        thread.join(timeout)
+
+    def submit(self, fn: WriteFn) -> Future:
+        future: Future = Future()
+        with self._state_lock:
+            if self._closed or self._thread is None:
+                future.set_exception(sqlite3.OperationalError("SQLite writer is not running"))
+                return future
+            self._jobs.put((fn, future))
+        return future
+
+    def _next_batch(self) -> tuple[list[tuple[WriteFn, Future]], bool]:
+        first = self._jobs.get()
+        if first is _STOP:
+            return [], True
+
+        batch = [first]
+        deadline = time.monotonic() + self.batch_interval
+        while len(batch) < self.batch_size:
+            remaining = deadline - time.monotonic()
+            try:
+                job = self._jobs.get(timeout=remaining) if remaining > 0 else self._jobs.get_nowait()
+            except queue.Empty:
+                break
+            if job is _STOP:
+                return batch, True
+            batch.append(job)
+        return batch, False
+
+    def _run(self, conn: sqlite3.Connection) -> None:
+        try:
+            stop = False
+            while not stop:
+                batch, stop = self._next_batch()
+                if batch:
+                    self._commit(conn, batch)
+        finally:
+            conn.close()
+
+    def _commit(self, conn: sqlite3.Connection, batch: list[tuple[WriteFn, Future]]) -> None:
+        # Callers cancel a job when they stop waiting for it; it must not commit after
+        # they have reported the write as failed.
+        batch = [(fn, future) for fn, future in batch if future.set_running_or_notify_cancel()]
+        if not batch:
+            return
+        outcomes: list[tuple[Future, Any, BaseException | None]] = []
+        try:
+            conn.execute("BEGIN IMMEDIATE")
+            for fn, future in batch:
+                conn.execute("SAVEPOINT write_job")
+                try:
+                    result = fn(conn)
+                except Exception as exc:
+                    conn.execute("ROLLBACK TO write_job")
+                    outcomes.append((future, None, exc))
+                else:
+                    outcomes.append((future, result, None))
+                conn.execute("RELEASE write_job")
+            conn.execute("COMMIT")
+        except sqlite3.Error as exc:
+            logger.error("SQLite batch of %d writes failed: %s", len(batch), exc)
+            if conn.in_transaction:
+                try:
+                    conn.execute("ROLLBACK")
+                except sqlite3.Error:
+                    pass
+            for _, future in batch:
+                future.set_exception(exc)
+            return
+
+        for future, result, error in outcomes:
+            if error is None:
+                future.set_result(result)
+            else:
+                future.set_exception(error)
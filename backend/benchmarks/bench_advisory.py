@@ -0,0 +1,89 @@
+"""Coverage check and throughput of the template advisory served when the LLM is off.
+
+Run from the backend directory:
+
+    python -m benchmarks.bench_advisory [--rows 20000]
+
+Set ``ADVISORY_TEMPLATES_PATH`` or ``RULES_PATH`` to check custom tables.
+
+Random payloads straddle every threshold in the rule table, so each risk, planting and
+food security outcome is rendered in every locale. Reports the per-call time of the
+fallback text, of the grain suggestion and of ``generate_advisory(use_llm=False)``,
+which is the whole advisory step of ``/predict?llm=false``. Exits with a non-zero status
+if any outcome fails to render in any locale.
+"""
+
+import argparse
+import asyncio
+import random
+import sys
+import time
+
+from app.services.advisory_templates import get_advisory_templates
+from app.services.food_security_service import assess_food_security
+from app.services.llm_service import generate_advisory
+from app.services.planning_service import build_planting_schedule
+from app.services.risk_service import analyze_risk
+from benchmarks.bench_rules import ITEMS, _payloads
+
+
+def _report(label: str, seconds: float, rows: int) -> None:
+    print(f"{label:>22}: {seconds * 1e6 / rows:7.2f} us/call   {rows / seconds:12,.0f} calls/s")
+
+
+async def _generate(cases: list[tuple], locale: str) -> float:
+    start = time.perf_counter()
+    for payload, predicted, risk_level, schedule, food_level, rankings in cases:
+        await generate_advisory(payload, predicted, risk_level, schedule, food_level, rankings, locale, use_llm=False)
+    return time.perf_counter() - start
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, default=20000)
+    args = parser.parse_args()
+
+    rng = random.Random(1)
+    cases = []
+    for payload in _payloads(args.rows):
+        predicted = rng.choice([0.0, 2.0, 3.0, 3.4, 12.0, rng.uniform(0, 25)])
+        risk_level, _ = analyze_risk(payload)
+        food_level, _, _ = assess_food_security(payload, predicted, risk_level)
+        rankings = sorted(
+            ((item, rng.uniform(0, 12)) for item in rng.sample(ITEMS, rng.randint(1, 5))),
+            key=lambda ranking: ranking[1],
+            reverse=True,
+        )
+        cases.append((payload, predicted, risk_level, build_planting_schedule(payload), food_level, rankings))
+
+    templates = get_advisory_templates()
+    failures = 0
+    for locale in templates.locales:
+        for payload, predicted, risk_level, schedule, food_level, rankings in cases:
+            try:
+                templates.fallback(payload, predicted, risk_level, schedule, food_level, locale)
+                templates.grain_suggestions(payload, predicted, rankings, locale)
+            except ValueError as exc:
+                failures += 1
+                if failures <= 5:
+                    print(f"{locale}: {payload.area}/{payload.item} failed to render: {exc}")
+    print(f"rows: {args.rows}, locales: {', '.join(templates.locales)}, {failures} render failures")
+
+    for locale in templates.locales:
+        print(f"[{locale}]")
+        start = time.perf_counter()
+        for payload, predicted, risk_level, schedule, food_level, _ in cases:
+            templates.fallback(payload, predicted, risk_level, schedule, food_level, locale)
+        _report("fallback", time.perf_counter() - start, args.rows)
+
+        start = time.perf_counter()
+        for payload, predicted, _, _, _, rankings in cases:
+            templates.grain_suggestions(payload, predicted, rankings, locale)
+        _report("grain suggestions", time.perf_counter() - start, args.rows)
+
+        _report("generate_advisory", asyncio.run(_generate(cases, locale)), args.rows)
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,57 @@
+"""Export throughput and peak memory over a large predictions_v2 table.
+
+Run from the backend directory:
+
+    python -m benchmarks.bench_export [--rows 1000000] [--format ndjson] [--db /tmp/history.db]
+
+Rows are generated by ``bench_history`` (so both benchmarks can share a ``--db``).
+The export is drained to /dev/null; peak RSS should stay flat as ``--rows`` grows.
+"""
+
+import argparse
+import resource
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+from benchmarks.bench_history import _fill
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    parser.add_argument("--format", choices=("ndjson", "csv", "parquet"), default="ndjson")
+    parser.add_argument("--db", default=None)
+    args = parser.parse_args()
+
+    db_path = Path(args.db) if args.db else Path(tempfile.mkdtemp()) / "export.db"
+
+    from app import archive, database
+
+    database.settings.sqlite_db_path = str(db_path)
+    database.init_db()
+    if not database.db_is_ready():
+        print(f"could not open {db_path}")
+        return 1
+    _fill(db_path, args.rows)
+
+    baseline_kb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    start = time.perf_counter()
+    exported_bytes = 0
+    with open("/dev/null", "wb") as sink:
+        for chunk in archive.export_predictions(args.format):
+            exported_bytes += len(chunk)
+            sink.write(chunk)
+    elapsed = time.perf_counter() - start
+    peak_kb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    database.close_db()
+
+    print(f"{args.rows:,} rows as {args.format}: {exported_bytes / 1e6:,.1f} MB in {elapsed:.2f}s")
+    print(f"throughput: {args.rows / elapsed:,.0f} rows/s")
+    print(f"peak RSS: {peak_kb / 1024:,.1f} MB (+{(peak_kb - baseline_kb) / 1024:,.1f} MB during export)")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
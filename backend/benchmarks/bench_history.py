@@ -0,0 +1,120 @@
+"""History query latency over a large predictions_v2 table.
+
+Run from the backend directory:
+
+    python -m benchmarks.bench_history [--rows 2000000] [--db /tmp/history.db]
+
+The table is filled once with synthetic rows (reused on later runs with the same
+``--db``), then each history query shape is timed and its query plan printed.
+"""
+
+import argparse
+import random
+import sqlite3
+import statistics
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+
+AREAS = [f"Area {index:03d}" for index in range(100)]
+ITEMS = ["Maize", "Rice, paddy", "Sorghum", "Wheat", "Soybeans", "Potatoes", "Cassava", "Yams"]
+RISKS = ["Low", "Medium", "High"]
+
+
+def _fill(db_path: Path, rows: int) -> None:
+    conn = sqlite3.connect(db_path)
+    existing = conn.execute("SELECT COUNT(*) FROM predictions_v2").fetchone()[0]
+    if existing >= rows:
+        conn.close()
+        return
+
+    from app.database import INSERT_PREDICTION_SQL
+
+    rng = random.Random(0)
+    start = datetime(2024, 1, 1, tzinfo=timezone.utc)
+    chunk = 50_000
+    for offset in range(existing, rows, chunk):
+        batch = []
+        for index in range(offset, min(rows, offset + chunk)):
+            created_at = (start + timedelta(seconds=index * 7)).isoformat(timespec="microseconds")
+            batch.append(
+                (
+                    rng.choice(AREAS), rng.choice(ITEMS), rng.randint(1990, 2030),
+                    1000.0, 100.0, 25.0, 1.0, 30000.0, 3.0, rng.choice(RISKS),
+                    "[]", 3.0, "Watch", "[]", "{}", "", "ready", created_at, None,
+                )
+            )
+        with conn:
+            conn.executemany(INSERT_PREDICTION_SQL, batch)
+        print(f"  inserted {min(rows, offset + chunk):,} rows", end="\r")
+    conn.execute("ANALYZE")
+    conn.close()
+    print()
+
+
+def _time(fn, repeats: int) -> tuple[float, float]:
+    samples = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        fn()
+        samples.append(time.perf_counter() - start)
+    samples.sort()
+    return statistics.median(samples) * 1e3, samples[int(len(samples) * 0.99) - 1] * 1e3
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, default=2_000_000)
+    parser.add_argument("--db", default=None)
+    parser.add_argument("--repeats", type=int, default=200)
+    args = parser.parse_args()
+
+    db_path = Path(args.db) if args.db else Path(tempfile.mkdtemp()) / "history.db"
+
+    from app import database
+
+    database.settings.sqlite_db_path = str(db_path)
+    database.init_db()
+    if not database.db_is_ready():
+        print(f"could not open {db_path}")
+        return 1
+    _fill(db_path, args.rows)
+
+    _, cursor = database.get_predictions_page(limit=50)
+    deep_cursor = database.encode_history_cursor(
+        (datetime(2024, 1, 1, tzinfo=timezone.utc) + timedelta(seconds=args.rows * 3)).isoformat(
+            timespec="microseconds"
+        ),
+        args.rows // 2,
+    )
+    cases = {
+        "latest page": {},
+        "second page": {"cursor": cursor},
+        "deep page (middle of table)": {"cursor": deep_cursor},
+        "area filter": {"area": AREAS[7]},
+        "area + item filter": {"area": AREAS[7], "item": "Wheat"},
+        "risk_level filter": {"risk_level": "High"},
+        "year range 2000-2005": {"year_min": 2000, "year_max": 2005},
+        "area + risk + years": {"area": AREAS[7], "risk_level": "High", "year_min": 2010, "year_max": 2020},
+    }
+
+    conn = sqlite3.connect(db_path)
+    print(f"{args.rows:,} rows in {db_path}")
+    for label, filters in cases.items():
+        p50, p99 = _time(lambda: database.get_predictions_page(limit=50, **filters), args.repeats)
+        print(f"{label:<30} p50 {p50:7.3f} ms   p99 {p99:7.3f} ms")
+    plan = conn.execute(
+        "EXPLAIN QUERY PLAN SELECT id FROM predictions_v2 WHERE area = ? AND (created_at, id) < (?, ?) "
+        "ORDER BY created_at DESC, id DESC LIMIT 51",
+        (AREAS[7], "9999", 0),
+    ).fetchall()
+    print("plan (area + cursor):", "; ".join(row[-1] for row in plan))
+    conn.close()
+    database.close_db()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
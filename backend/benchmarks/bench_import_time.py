@@ -0,0 +1,142 @@
+"""Import-time budgets for the API and a check that inference stays off the training stack.
+
+Run from the backend directory:
+
+    python -m benchmarks.bench_import_time [--model app/ml/model.joblib] [--runs 7]
+
+Each run starts a fresh interpreter with ``python -X importtime -c "import app.main"``
+and the median cumulative import time of each budgeted module is compared with
+``BUDGETS_MS``. A second interpreter then imports the app, loads the model from its
+compiled layout, scores a row and looks its area up in the reference index; none of
+``INFERENCE_FORBIDDEN`` may be imported by then. Exits with a non-zero status if a budget is exceeded or a module leaks in.
+"""
+
+import argparse
+import json
+import os
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+from pathlib import Path
+
+# Cumulative milliseconds, including everything the module imports. fastapi (and the
+# pydantic models behind its OpenAPI support) dominates and is outside our control.
+BUDGETS_MS = {
+    "app.main": 750.0,
+    "fastapi": 500.0,
+    "app.ml.predict": 150.0,
+    "app.services.llm_service": 25.0,
+    "app.archive": 10.0,
+}
+# Training-only and optional-provider modules that pure inference must not load.
+INFERENCE_FORBIDDEN = ("sklearn", "pandas", "scipy", "joblib", "pyarrow", "httpx", "langchain_groq")
+
+INFERENCE_SCRIPT = """
+import json, sys
+import app.main
+from app.ml.predict import active_model, predict_yields
+from app.ml.reference import get_reference_index
+from app.schemas import PredictionInput
+
+loaded = active_model()
+row = PredictionInput(
+    area="India", item="Maize", year=2013,
+    average_rain_fall_mm_per_year=1083, pesticides_tonnes=121.0, avg_temp=26.0,
+)
+predict_yields([row], loaded)
+get_reference_index().climate(row.area, row.year)
+print(json.dumps({
+    "compiled": loaded.compiled is not None,
+    "loaded": sorted(name for name in %r if name in sys.modules),
+}))
+"""
+
+
+def _cumulative_ms(stderr: str) -> dict[str, float]:
+    # Lines look like "import time:  self [us] | cumulative | module", nested by indent.
+    times: dict[str, float] = {}
+    for line in stderr.splitlines():
+        if not line.startswith("import time:"):
+            continue
+        parts = line[len("import time:") :].split("|")
+        if len(parts) != 3 or not parts[1].strip().isdigit():
+            continue
+        times[parts[2].strip()] = int(parts[1]) / 1000
+    return times
+
+
+def _environment(workdir: Path, model_path: Path) -> dict[str, str]:
+    env = dict(os.environ)
+    env.update(
+        {
+            "MODEL_PATH": str(model_path),
+            "MODEL_REGISTRY_DIR": str(workdir / "registry"),
+            "MODEL_MMAP": "true",
+            "SQLITE_DB_PATH": str(workdir / "agri.db"),
+            "ADVISORY_CACHE_PATH": str(workdir / "advisory_cache.db"),
+            "LLM_PROVIDER": "none",
+        }
+    )
+    return env
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--model", default="app/ml/model.joblib")
+    parser.add_argument("--runs", type=int, default=7)
+    args = parser.parse_args()
+
+    workdir = Path(tempfile.mkdtemp())
+    model_path = workdir / "model.joblib"
+    shutil.copy2(args.model, model_path)
+    from app.ml.registry import write_compiled_layout
+
+    # Serving workers load the layout train_model and registry publish write up front.
+    write_compiled_layout(model_path)
+    env = _environment(workdir, model_path)
+
+    samples: dict[str, list[float]] = {name: [] for name in BUDGETS_MS}
+    for _ in range(args.runs):
+        result = subprocess.run(
+            [sys.executable, "-X", "importtime", "-c", "import app.main"],
+            env=env,
+            capture_output=True,
+            text=True,
+            check=True,
+        )
+        times = _cumulative_ms(result.stderr)
+        for name in BUDGETS_MS:
+            samples[name].append(times.get(name, 0.0))
+
+    failed = False
+    print(f"median cumulative import time over {args.runs} fresh interpreters")
+    for name, budget in BUDGETS_MS.items():
+        median = statistics.median(samples[name])
+        status = "ok" if median <= budget else "OVER BUDGET"
+        failed |= median > budget
+        print(f"  {name:28s} {median:8.1f} ms   budget {budget:6.0f} ms   {status}")
+
+    result = subprocess.run(
+        [sys.executable, "-c", INFERENCE_SCRIPT % (INFERENCE_FORBIDDEN,)],
+        env=env,
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    report = json.loads(result.stdout.strip().splitlines()[-1])
+    if not report["compiled"]:
+        print("model could not be compiled; the sklearn fallback path was used")
+        failed = True
+    elif report["loaded"]:
+        print(f"inference imported training/provider modules: {', '.join(report['loaded'])}")
+        failed = True
+    else:
+        print(f"inference from the compiled layout imported none of: {', '.join(INFERENCE_FORBIDDEN)}")
+    shutil.rmtree(workdir, ignore_errors=True)
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,123 @@
+"""Parity check and per-call latency benchmark for the compiled inference path.
+
+Run from the backend directory:
+
+    python -m benchmarks.bench_inference [--model app/ml/model.joblib] [--calls 2000]
+
+Exits with a non-zero status if the compiled evaluator disagrees with
+``Pipeline.predict`` on any row of ``yield_df.csv``. The check is exact, except for
+forests that predict with ``n_jobs > 1``: those sum their trees in job-completion order,
+so they are compared within float tolerance. For tree ensembles the p10/p50/p90
+intervals are also checked against quantiles of each sklearn estimator's predictions.
+"""
+
+import argparse
+import statistics
+import sys
+import time
+import warnings
+from pathlib import Path
+
+import joblib
+import numpy as np
+import pandas as pd
+
+from app.ml.compiled import CompiledPipeline
+from app.ml.predict import INTERVAL_QUANTILES
+from app.ml.train_model import BASE_DIR, FEATURES, _load_training_data
+
+
+def _percentiles(samples: list[float]) -> dict[str, float]:
+    ordered = sorted(samples)
+    return {
+        "p50_us": statistics.median(ordered) * 1e6,
+        "p99_us": ordered[min(len(ordered) - 1, int(len(ordered) * 0.99))] * 1e6,
+    }
+
+
+def _count_mismatches(pipeline, actual: np.ndarray, expected: np.ndarray) -> int:
+    if getattr(pipeline.named_steps["model"], "n_jobs", None) in (None, 1):
+        return int(np.count_nonzero(actual != expected))
+    return int(np.count_nonzero(~np.isclose(actual, expected, rtol=1e-12, atol=0.0)))
+
+
+def check_parity(pipeline, compiled: CompiledPipeline, frame: pd.DataFrame) -> int:
+    expected = pipeline.predict(frame)
+    columns = {column: frame[column].tolist() for column in FEATURES}
+    batched = compiled.predict_many(columns)
+    mismatches = _count_mismatches(pipeline, batched, expected)
+
+    records = frame.to_dict("records")
+    single = np.array([compiled.predict_one(record) for record in records])
+    mismatches += _count_mismatches(pipeline, single, expected)
+    print(f"parity: {len(records)} rows, {mismatches} mismatches (batched + single-row)")
+    return mismatches
+
+
+def bench_single_row(pipeline, compiled: CompiledPipeline, frame: pd.DataFrame, calls: int) -> None:
+    records = frame.sample(n=calls, replace=True, random_state=0).to_dict("records")
+
+    sklearn_samples: list[float] = []
+    for record in records:
+        start = time.perf_counter()
+        pipeline.predict(pd.DataFrame([record]))
+        sklearn_samples.append(time.perf_counter() - start)
+
+    compiled_samples: list[float] = []
+    for record in records:
+        start = time.perf_counter()
+        compiled.predict_one(record)
+        compiled_samples.append(time.perf_counter() - start)
+
+    for label, samples in (("sklearn", sklearn_samples), ("compiled", compiled_samples)):
+        stats = _percentiles(samples)
+        print(f"{label:>9}: p50 {stats['p50_us']:9.1f} us   p99 {stats['p99_us']:9.1f} us")
+
+
+def check_intervals(pipeline, compiled: CompiledPipeline, frame: pd.DataFrame, calls: int) -> int:
+    estimators = getattr(pipeline.named_steps["model"], "estimators_", None)
+    if not estimators:
+        print("intervals: single tree, no ensemble spread to report")
+        return 0
+    matrix = pipeline.named_steps["preprocessor"].transform(frame)
+    per_tree = np.stack([estimator.predict(matrix) for estimator in estimators], axis=1)
+    expected = np.quantile(per_tree, INTERVAL_QUANTILES, axis=1).T
+    columns = {column: frame[column].tolist() for column in FEATURES}
+    means, quantiles = compiled.predict_quantiles(columns, INTERVAL_QUANTILES)
+    mismatches = int(np.count_nonzero(quantiles != expected))
+    mismatches += _count_mismatches(pipeline, means, pipeline.predict(frame))
+    print(f"intervals: {len(frame)} rows x {len(estimators)} trees, {mismatches} mismatches")
+
+    records = frame.sample(n=calls, replace=True, random_state=0).to_dict("records")
+    samples: list[float] = []
+    for record in records:
+        single = {column: [record[column]] for column in FEATURES}
+        start = time.perf_counter()
+        compiled.predict_quantiles(single, INTERVAL_QUANTILES)
+        samples.append(time.perf_counter() - start)
+    stats = _percentiles(samples)
+    print(f"intervals: p50 {stats['p50_us']:9.1f} us   p99 {stats['p99_us']:9.1f} us per row")
+    return mismatches
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--model", default="app/ml/model.joblib")
+    parser.add_argument("--data", default=str(BASE_DIR / "data" / "yield_df.csv"))
+    parser.add_argument("--calls", type=int, default=2000)
+    args = parser.parse_args()
+
+    pipeline = joblib.load(Path(args.model))
+    compiled = CompiledPipeline.from_pipeline(pipeline)
+    frame = _load_training_data(Path(args.data))[FEATURES]
+
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore", UserWarning)
+        mismatches = check_parity(pipeline, compiled, frame)
+        bench_single_row(pipeline, compiled, frame, args.calls)
+        mismatches += check_intervals(pipeline, compiled, frame, args.calls)
+    return 1 if mismatches else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
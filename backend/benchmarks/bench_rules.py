@@ -0,0 +1,92 @@
+"""Agreement check and throughput of the rule engine: per-row calls vs one batch call.
+
+Run from the backend directory:
+
+    python -m benchmarks.bench_rules [--rows 20000]
+
+Set ``RULES_PATH`` to check a custom rule table instead of the bundled one.
+
+Random payloads straddle every threshold in the rule table. Each one is evaluated
+through the single-row services (as ``/predict`` does) and through the vectorized
+``*_many`` services (as ``/predict/batch`` does). Exits with a non-zero status if the
+two disagree on any row.
+"""
+
+import argparse
+import random
+import sys
+import time
+
+from app.schemas import PredictionInput
+from app.services.food_security_service import assess_food_security, assess_food_security_many
+from app.services.planning_service import build_planting_schedule, build_planting_schedules
+from app.services.risk_service import analyze_risk, analyze_risk_many
+from app.services.rule_engine import payload_columns
+
+AREAS = ["India", "Kenya", "Brazil", "Australia"]
+ITEMS = ["Maize", "Rice", "Wheat", "Potatoes", "Soybeans", "Sorghum", "Rice, paddy", "Cassava"]
+
+
+def _payloads(count: int, seed: int = 0) -> list[PredictionInput]:
+    rng = random.Random(seed)
+    # Values on and around the default thresholds, plus uniform draws across the valid range.
+    rainfall = [0, 499.9, 500, 699.9, 700, 799.9, 800, 999.9, 1000]
+    temperature = [11.9, 12, 13.9, 14, 34, 34.1, 35, 35.1]
+    pesticides = [0, 1.99, 2, 2.01]
+    return [
+        PredictionInput(
+            area=rng.choice(AREAS),
+            item=rng.choice(ITEMS),
+            year=rng.randint(1990, 2030),
+            average_rain_fall_mm_per_year=rng.choice([*rainfall, rng.uniform(0, 4000)]),
+            pesticides_tonnes=rng.choice([*pesticides, rng.uniform(0, 500)]),
+            avg_temp=rng.choice([*temperature, rng.uniform(-10, 45)]),
+            farm_area_hectares=rng.uniform(0.1, 100),
+        )
+        for _ in range(count)
+    ]
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, default=20000)
+    args = parser.parse_args()
+
+    payloads = _payloads(args.rows)
+    rng = random.Random(1)
+    yields = [rng.choice([0.0, 2.0, 3.0, 3.4, 12.0, rng.uniform(0, 25)]) for _ in payloads]
+    lower = [value * rng.uniform(0.3, 1.1) for value in yields]
+
+    start = time.perf_counter()
+    single = []
+    for payload, predicted, bound in zip(payloads, yields, lower):
+        risk_level, warnings = analyze_risk(payload)
+        single.append(
+            (
+                risk_level,
+                warnings,
+                build_planting_schedule(payload),
+                assess_food_security(payload, predicted, risk_level, bound),
+            )
+        )
+    single_seconds = time.perf_counter() - start
+
+    start = time.perf_counter()
+    columns = payload_columns(payloads)
+    risk_levels, warnings = analyze_risk_many(columns)
+    schedules = build_planting_schedules(columns)
+    food_levels, production, notes = assess_food_security_many(columns, yields, risk_levels, lower)
+    batch_seconds = time.perf_counter() - start
+
+    mismatches = sum(
+        expected != (risk_levels[row], warnings[row], schedules[row], (food_levels[row], production[row], notes[row]))
+        for row, expected in enumerate(single)
+    )
+    print(f"rows: {args.rows}, {mismatches} mismatches between single-row and batch evaluation")
+    print(f"single-row: {single_seconds * 1e6 / args.rows:7.2f} us/row   {args.rows / single_seconds:12,.0f} rows/s")
+    print(f"     batch: {batch_seconds * 1e6 / args.rows:7.2f} us/row   {args.rows / batch_seconds:12,.0f} rows/s")
+    return 1 if mismatches else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
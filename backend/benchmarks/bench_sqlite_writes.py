@@ -0,0 +1,115 @@
+"""Sustained SQLite insert throughput with concurrent /history readers.
+
+Run from the backend directory:
+
+    python -m benchmarks.bench_sqlite_writes [--writers 16] [--readers 4] [--seconds 10]
+
+Writers call ``save_prediction`` in a loop (as concurrent /predict requests do)
+while readers call ``get_recent_predictions``. The database is created in a
+temporary directory unless ``--db`` is given.
+"""
+
+import argparse
+import os
+import statistics
+import sys
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+
+def _sample_record(index: int) -> dict:
+    return {
+        "area": "India",
+        "item": "Maize",
+        "year": 1990 + index % 30,
+        "average_rain_fall_mm_per_year": 1083.0,
+        "pesticides_tonnes": 45000.0,
+        "avg_temp": 26.0,
+        "farm_area_hectares": 1.0,
+        "predicted_yield_hg_ha": 25401.0,
+        "predicted_yield_t_ha": 2.5401,
+        "risk_level": "Low",
+        "warnings": [],
+        "expected_production_tons": 2.5401,
+        "food_security_level": "Watch",
+        "food_security_notes": ["Projected output needs close monitoring."],
+        "planting_schedule": {"recommended_window": "Normal calendar", "actions": []},
+        "advisory": "Benchmark advisory " * 40,
+    }
+
+
+def _percentile(samples: list[float], fraction: float) -> float:
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * fraction))] if ordered else 0.0
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--writers", type=int, default=16)
+    parser.add_argument("--readers", type=int, default=4)
+    parser.add_argument("--seconds", type=float, default=10.0)
+    parser.add_argument("--db", default=None)
+    args = parser.parse_args()
+
+    db_path = Path(args.db) if args.db else Path(tempfile.mkdtemp()) / "bench.db"
+    os.environ["SQLITE_DB_PATH"] = str(db_path)
+
+    from app import database
+
+    database.settings.sqlite_db_path = str(db_path)
+    database.init_db()
+    if not database.db_is_ready():
+        print(f"could not open {db_path}")
+        return 1
+
+    stop = threading.Event()
+    write_latencies: list[list[float]] = [[] for _ in range(args.writers)]
+    read_latencies: list[list[float]] = [[] for _ in range(args.readers)]
+    failures = [0]
+
+    def writer(slot: int) -> None:
+        index = 0
+        while not stop.is_set():
+            start = time.perf_counter()
+            if database.save_prediction(_sample_record(index)) is None:
+                failures[0] += 1
+            write_latencies[slot].append(time.perf_counter() - start)
+            index += 1
+
+    def reader(slot: int) -> None:
+        while not stop.is_set():
+            start = time.perf_counter()
+            database.get_recent_predictions(limit=20)
+            read_latencies[slot].append(time.perf_counter() - start)
+
+    threads = [threading.Thread(target=writer, args=(slot,)) for slot in range(args.writers)]
+    threads += [threading.Thread(target=reader, args=(slot,)) for slot in range(args.readers)]
+    for thread in threads:
+        thread.start()
+    time.sleep(args.seconds)
+    stop.set()
+    for thread in threads:
+        thread.join()
+    database.close_db()
+
+    writes = [value for values in write_latencies for value in values]
+    reads = [value for values in read_latencies for value in values]
+    print(f"database: {db_path}")
+    print(f"inserts: {len(writes)} in {args.seconds:.1f}s -> {len(writes) / args.seconds:,.0f}/s ({failures[0]} failed)")
+    if writes:
+        print(
+            f"insert latency: p50 {statistics.median(writes) * 1e3:.2f} ms  "
+            f"p99 {_percentile(writes, 0.99) * 1e3:.2f} ms"
+        )
+    if reads:
+        print(
+            f"history reads: {len(reads) / args.seconds:,.0f}/s  "
+            f"p50 {statistics.median(reads) * 1e3:.2f} ms  p99 {_percentile(reads, 0.99) * 1e3:.2f} ms"
+        )
+    return 1 if failures[0] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,106 @@
+"""Physical memory of N model-serving worker processes, with and without mmap.
+
+Run from the backend directory (Linux only, reads /proc/self/smaps_rollup):
+
+    python -m benchmarks.bench_worker_memory [--model app/ml/model.joblib] [--workers 16]
+
+Each worker loads the model the way the API does and scores rows from
+``yield_df.csv``, as gunicorn workers would. The benchmark then reports the
+proportional set size (PSS) each worker adds for the model. PSS splits shared pages
+between the processes mapping them, so the sum is the real memory bill of the pool.
+"""
+
+import argparse
+import multiprocessing
+import os
+import shutil
+import sys
+import tempfile
+from pathlib import Path
+
+
+def _memory_kb() -> dict[str, int]:
+    values: dict[str, int] = {}
+    with open("/proc/self/smaps_rollup", encoding="utf-8") as handle:
+        for line in handle:
+            parts = line.split()
+            if len(parts) >= 2 and parts[0] in {"Rss:", "Pss:"}:
+                values[parts[0].rstrip(":").lower()] = int(parts[1])
+    return values
+
+
+def _worker(model_path: str, registry_dir: str, mmap: bool, ready, release, results) -> None:
+    os.environ["MODEL_PATH"] = model_path
+    os.environ["MODEL_REGISTRY_DIR"] = registry_dir
+    os.environ["MODEL_MMAP"] = "true" if mmap else "false"
+
+    import pandas as pd
+
+    from app.ml import predict
+    from app.ml.train_model import BASE_DIR, FEATURES, _load_training_data
+
+    frame = _load_training_data(BASE_DIR / "data" / "yield_df.csv")[FEATURES].iloc[:2000]
+    columns = {column: frame[column].tolist() for column in FEATURES}
+    before = _memory_kb()
+    loaded = predict.active_model()
+    if loaded.compiled is not None:
+        loaded.compiled.predict_many(columns)
+    else:
+        loaded.pipeline.predict(pd.DataFrame(columns))
+    # Measure only once every worker has loaded, so shared pages are split across all of them.
+    ready.wait()
+    after = _memory_kb()
+    results.put({key: after[key] - before[key] for key in after})
+    release.wait()
+
+
+def _run(model_path: str, registry_dir: str, workers: int, mmap: bool) -> list[dict[str, int]]:
+    context = multiprocessing.get_context("spawn")
+    ready = context.Barrier(workers + 1)
+    release = context.Event()
+    results = context.Queue()
+    processes = [
+        context.Process(target=_worker, args=(model_path, registry_dir, mmap, ready, release, results))
+        for _ in range(workers)
+    ]
+    for process in processes:
+        process.start()
+    ready.wait()
+    samples = [results.get() for _ in range(workers)]
+    release.set()
+    for process in processes:
+        process.join()
+    return samples
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--model", default="app/ml/model.joblib")
+    parser.add_argument("--workers", type=int, default=16)
+    args = parser.parse_args()
+
+    if not Path("/proc/self/smaps_rollup").exists():
+        print("/proc/self/smaps_rollup is not available on this platform")
+        return 1
+
+    workdir = Path(tempfile.mkdtemp())
+    model_path = workdir / "model.joblib"
+    shutil.copy2(args.model, model_path)
+    registry_dir = str(workdir / "registry")
+    from app.ml.registry import write_compiled_layout
+
+    # The layout is written up front, as train_model and registry publish do.
+    write_compiled_layout(model_path)
+    print(f"model: {args.model} ({model_path.stat().st_size / 1e6:,.1f} MB), {args.workers} workers")
+    for mmap in (False, True):
+        samples = _run(str(model_path), registry_dir, args.workers, mmap)
+        pss = sum(sample["pss"] for sample in samples) / 1024
+        rss = sum(sample["rss"] for sample in samples) / len(samples) / 1024
+        label = "mmap layout " if mmap else "joblib.load "
+        print(f"{label} model PSS total {pss:8.1f} MB   per worker {pss / len(samples):7.1f} MB   RSS per worker {rss:7.1f} MB")
+    shutil.rmtree(workdir, ignore_errors=True)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
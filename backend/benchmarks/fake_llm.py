@@ -0,0 +1,96 @@
+"""Local stand-in for the Ollama generate API with configurable latency and failures.
+
+Run from the backend directory:
+
+    python -m benchmarks.fake_llm [--port 11435] [--latency 0.5] [--jitter 0.1] [--error-rate 0]
+
+Point the API at it with ``LLM_PROVIDER=ollama`` and
+``OLLAMA_BASE_URL=http://127.0.0.1:11435``. ``POST /api/generate`` waits
+``latency`` seconds (plus or minus up to ``jitter``) and then answers with a canned
+advisory, either as one JSON object or, with ``"stream": true``, as NDJSON chunks the
+way Ollama streams. A share of requests given by ``--error-rate`` fail with HTTP 500
+after the same delay. ``load_test`` starts it automatically.
+"""
+
+import argparse
+import asyncio
+import json
+import random
+
+ADVISORY = (
+    "1) Executive Summary\n- Conditions are within the expected range for the season.\n"
+    "2) Key Risks\n- Rainfall variability.\n"
+    "3) Recommended Actions (next 2-4 weeks)\n- Scout fields weekly.\n- Stage irrigation.\n"
+    "4) Nutrient and Crop Strategy\n- Split nitrogen applications.\n"
+    "5) Food Security and Contingency Plan\n- Keep a short-duration backup crop.\n"
+)
+STREAM_CHUNKS = 8
+
+
+async def _read_body(receive) -> bytes:
+    body = b""
+    while True:
+        message = await receive()
+        body += message.get("body", b"")
+        if not message.get("more_body"):
+            return body
+
+
+async def _send(send, status: int, body: bytes, content_type: bytes = b"application/json") -> None:
+    await send({"type": "http.response.start", "status": status, "headers": [(b"content-type", content_type)]})
+    await send({"type": "http.response.body", "body": body})
+
+
+def create_app(latency: float, jitter: float, error_rate: float, seed: int = 0):
+    rng = random.Random(seed)
+
+    async def app(scope, receive, send) -> None:
+        if scope["path"] != "/api/generate" or scope["method"] != "POST":
+            await _send(send, 404, b'{"error": "not found"}')
+            return
+
+        request = json.loads(await _read_body(receive) or b"{}")
+        await asyncio.sleep(max(0.0, latency + rng.uniform(-jitter, jitter)))
+        if rng.random() < error_rate:
+            await _send(send, 500, b'{"error": "injected failure"}')
+            return
+        if not request.get("stream"):
+            body = json.dumps({"model": request.get("model", ""), "response": ADVISORY, "done": True})
+            await _send(send, 200, body.encode())
+            return
+
+        await send({"type": "http.response.start", "status": 200, "headers": [(b"content-type", b"application/x-ndjson")]})
+        step = -(-len(ADVISORY) // STREAM_CHUNKS)
+        for start in range(0, len(ADVISORY), step):
+            line = json.dumps({"response": ADVISORY[start : start + step], "done": False}) + "\n"
+            await send({"type": "http.response.body", "body": line.encode(), "more_body": True})
+        done = json.dumps({"response": "", "done": True}) + "\n"
+        await send({"type": "http.response.body", "body": done.encode(), "more_body": False})
+
+    return app
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=11435)
+    parser.add_argument("--latency", type=float, default=0.5, help="Seconds before each response")
+    parser.add_argument("--jitter", type=float, default=0.0, help="Uniform +/- seconds added to the latency")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Share of requests answered with HTTP 500")
+    args = parser.parse_args()
+
+    import uvicorn
+
+    uvicorn.run(
+        create_app(args.latency, args.jitter, args.error_rate),
+        host=args.host,
+        port=args.port,
+        log_level="warning",
+        access_log=False,
+        lifespan="off",
+        backlog=4096,
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,387 @@
+"""Load test of the API under gunicorn, with a fake LLM, reported as comparable JSON.
+
+Run from the backend directory:
+
+    python -m benchmarks.load_test [--model app/ml/model.joblib] [--workers 2]
+        [--concurrency 32] [--duration 10] [--llm-latency 0.5]
+        [--scenarios predict,predict_llm,history,functions]
+        [--out load_test.json] [--baseline previous.json] [--max-regression 10]
+
+The API runs as ``gunicorn -c gunicorn_conf.py app.main:app`` on a free local port.
+It uses a copy of the model and a throwaway SQLite database, and the advisory cache is
+disabled. Worker count and everything else come from the config file, as in
+production. Scenarios:
+
+- ``predict``: ``POST /predict`` with ``LLM_PROVIDER=none``, so every advisory is the
+  fallback text. This covers the model, rules and SQLite path.
+- ``predict_llm``: ``POST /predict`` against ``benchmarks.fake_llm``, an Ollama
+  stand-in answering after ``--llm-latency`` seconds.
+- ``history``: ``GET /history`` over the rows the predict scenarios wrote.
+- ``functions``: ``predict_yield`` and ``generate_advisory`` called in this process
+  (LLM off), without HTTP or gunicorn.
+
+Each HTTP scenario keeps ``--concurrency`` requests in flight for ``--duration``
+seconds after a short warm-up. Payloads are random, so the prediction cache rarely
+hits. The report holds throughput, p50/p95/p99 latency and the error count per
+scenario, plus the git commit and settings. It is written to ``--out``. With
+``--baseline`` the two runs are compared, and the script exits non-zero when
+throughput drops, or p99 rises, by more than ``--max-regression`` percent. It also
+exits non-zero on request errors.
+
+The load generator is a single asyncio process. Keep an eye on its CPU when the
+API is faster than the client can drive it.
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import platform
+import random
+import shutil
+import socket
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from pathlib import Path
+
+BACKEND_DIR = Path(__file__).resolve().parents[1]
+SCENARIOS = ("predict", "predict_llm", "history", "functions")
+AREAS = ["India", "Kenya", "Brazil", "Australia", "Mexico", "Pakistan", "Indonesia", "Nigeria"]
+ITEMS = ["Maize", "Rice, paddy", "Wheat", "Potatoes", "Sorghum", "Soybeans", "Cassava"]
+WARMUP_SECONDS = 2.0
+STARTUP_TIMEOUT_SECONDS = 60.0
+
+
+def _payload(rng: random.Random) -> dict:
+    return {
+        "area": rng.choice(AREAS),
+        "item": rng.choice(ITEMS),
+        "year": rng.randint(1995, 2030),
+        "average_rain_fall_mm_per_year": round(rng.uniform(200, 2500), 1),
+        "pesticides_tonnes": round(rng.uniform(0, 50000), 1),
+        "avg_temp": round(rng.uniform(5, 35), 2),
+        "farm_area_hectares": round(rng.uniform(0.5, 50), 1),
+    }
+
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def _summary(latencies: list[float], errors: int, elapsed: float) -> dict:
+    ordered = sorted(latencies)
+
+    def percentile(share: float) -> float:
+        if not ordered:
+            return 0.0
+        return ordered[min(len(ordered) - 1, int(share * len(ordered)))] * 1000
+
+    return {
+        "requests": len(ordered),
+        "errors": errors,
+        "seconds": round(elapsed, 3),
+        "throughput_rps": round(len(ordered) / elapsed, 2) if elapsed else 0.0,
+        "latency_ms": {
+            "mean": round(statistics.fmean(ordered) * 1000, 3) if ordered else 0.0,
+            "p50": round(percentile(0.50), 3),
+            "p95": round(percentile(0.95), 3),
+            "p99": round(percentile(0.99), 3),
+            "max": round(ordered[-1] * 1000, 3) if ordered else 0.0,
+        },
+    }
+
+
+async def _drive(base_url: str, request_factory, concurrency: int, duration: float) -> dict:
+    import httpx
+
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+    latencies: list[float] = []
+    failures: list[bool] = []
+
+    async def user(client, rng: random.Random, deadline: float, record: bool) -> None:
+        while time.perf_counter() < deadline:
+            method, path, body = request_factory(rng)
+            started = time.perf_counter()
+            try:
+                response = await client.request(method, path, json=body)
+                failed = response.status_code >= 400
+            except httpx.HTTPError:
+                failed = True
+            if record:
+                latencies.append(time.perf_counter() - started)
+                failures.append(failed)
+
+    async with httpx.AsyncClient(base_url=base_url, limits=limits, timeout=120) as client:
+        # Warm-up requests run at the same concurrency but are not recorded.
+        deadline = time.perf_counter() + WARMUP_SECONDS
+        await asyncio.gather(*(user(client, random.Random(seed), deadline, False) for seed in range(concurrency)))
+        started = time.perf_counter()
+        deadline = started + duration
+        await asyncio.gather(
+            *(user(client, random.Random(concurrency + seed), deadline, True) for seed in range(concurrency))
+        )
+        return _summary(latencies, sum(failures), time.perf_counter() - started)
+
+
+def _predict_request(rng: random.Random) -> tuple[str, str, dict]:
+    return "POST", "/predict", _payload(rng)
+
+
+def _history_request(rng: random.Random) -> tuple[str, str, None]:
+    return "GET", f"/history?limit=20&area={rng.choice(AREAS)}", None
+
+
+def _wait_until_ready(base_url: str, process: subprocess.Popen, log_path: Path) -> None:
+    import httpx
+
+    deadline = time.monotonic() + STARTUP_TIMEOUT_SECONDS
+    while time.monotonic() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError(f"Server exited during startup; see {log_path}")
+        try:
+            if httpx.get(f"{base_url}/health", timeout=1).json().get("model_loaded"):
+                return
+        except (httpx.HTTPError, ValueError):
+            pass
+        time.sleep(0.2)
+    raise RuntimeError(f"Server did not become ready within {STARTUP_TIMEOUT_SECONDS:.0f}s; see {log_path}")
+
+
+@contextmanager
+def _process(command: list[str], env: dict[str, str], log_path: Path):
+    with open(log_path, "ab") as log:
+        process = subprocess.Popen(command, cwd=BACKEND_DIR, env=env, stdout=log, stderr=subprocess.STDOUT)
+    try:
+        yield process
+    finally:
+        process.terminate()
+        try:
+            process.wait(timeout=30)
+        except subprocess.TimeoutExpired:
+            process.kill()
+            process.wait()
+
+
+@contextmanager
+def _api_server(env: dict[str, str], workdir: Path, name: str):
+    port = _free_port()
+    log_path = workdir / f"gunicorn-{name}.log"
+    command = [
+        sys.executable, "-m", "gunicorn", "-c", "gunicorn_conf.py",
+        "--bind", f"127.0.0.1:{port}", "app.main:app",
+    ]
+    with _process(command, env, log_path) as process:
+        base_url = f"http://127.0.0.1:{port}"
+        _wait_until_ready(base_url, process, log_path)
+        yield base_url
+
+
+def _server_env(args: argparse.Namespace, workdir: Path, model_path: Path) -> dict[str, str]:
+    env = dict(os.environ)
+    env.update(
+        MODEL_PATH=str(model_path),
+        MODEL_REGISTRY_DIR=str(workdir / "registry"),
+        SQLITE_DB_PATH=str(workdir / "agrismart.db"),
+        ADVISORY_CACHE_PATH=str(workdir / "advisory_cache.db"),
+        ADVISORY_CACHE_MAX_ENTRIES="0",
+        TRAIN_ON_STARTUP="false",
+        MODEL_WATCH_INTERVAL_SECONDS="0",
+        LOG_LEVEL="WARNING",
+        GUNICORN_WORKERS=str(args.workers),
+        LLM_PROVIDER="none",
+    )
+    return env
+
+
+def _run_functions(duration: float) -> dict:
+    # Runs in this process with the settings from _server_env (LLM off).
+    import logging
+
+    # Every call logs that the LLM is unavailable; that is the point of this scenario.
+    logging.disable(logging.WARNING)
+    from app.ml.predict import active_model, predict_yield
+    from app.schemas import PredictionInput
+    from app.services.food_security_service import assess_food_security
+    from app.services.llm_service import generate_advisory, score_with_grain_candidates
+    from app.services.planning_service import build_planting_schedule
+    from app.services.risk_service import analyze_risk
+
+    active_model()
+    rng = random.Random(0)
+    payloads = [PredictionInput(**_payload(rng)) for _ in range(1000)]
+    # Advisory inputs are prepared up front so only generate_advisory itself is timed.
+    advisory_args = []
+    for payload in payloads:
+        predicted_hg_ha, rankings = score_with_grain_candidates(payload)
+        risk_level, _ = analyze_risk(payload)
+        schedule = build_planting_schedule(payload)
+        food_level, _, _ = assess_food_security(payload, predicted_hg_ha / 10000.0, risk_level)
+        advisory_args.append((payload, predicted_hg_ha / 10000.0, risk_level, schedule, food_level, rankings))
+
+    latencies = []
+    deadline = time.perf_counter() + duration
+    while time.perf_counter() < deadline:
+        payload = payloads[len(latencies) % len(payloads)]
+        started = time.perf_counter()
+        predict_yield(payload)
+        latencies.append(time.perf_counter() - started)
+    results = {"predict_yield": _summary(latencies, 0, sum(latencies))}
+
+    async def advisories() -> list[float]:
+        timings = []
+        deadline = time.perf_counter() + duration
+        while time.perf_counter() < deadline:
+            arguments = advisory_args[len(timings) % len(advisory_args)]
+            started = time.perf_counter()
+            await generate_advisory(*arguments)
+            timings.append(time.perf_counter() - started)
+        return timings
+
+    latencies = asyncio.run(advisories())
+    results["generate_advisory"] = _summary(latencies, 0, sum(latencies))
+    return results
+
+
+def _git_commit() -> str | None:
+    try:
+        result = subprocess.run(
+            ["git", "describe", "--always", "--dirty"], cwd=BACKEND_DIR, capture_output=True, text=True, check=True
+        )
+    except (OSError, subprocess.CalledProcessError):
+        return None
+    return result.stdout.strip() or None
+
+
+def _flatten(report: dict) -> dict[str, dict]:
+    flat = {}
+    for name, result in report["scenarios"].items():
+        if "latency_ms" in result:
+            flat[name] = result
+        else:
+            flat.update({f"{name}.{key}": value for key, value in result.items()})
+    return flat
+
+
+def _compare(report: dict, baseline: dict, max_regression: float | None) -> bool:
+    print(f"\ncompared with {baseline['meta'].get('commit') or 'baseline'}:")
+    regressed = False
+    previous = _flatten(baseline)
+    for name, result in _flatten(report).items():
+        before = previous.get(name)
+        if before is None:
+            continue
+        rps_change = (result["throughput_rps"] / before["throughput_rps"] - 1) * 100 if before["throughput_rps"] else 0.0
+        p99_change = (result["latency_ms"]["p99"] / before["latency_ms"]["p99"] - 1) * 100 if before["latency_ms"]["p99"] else 0.0
+        flag = ""
+        if max_regression is not None and (rps_change < -max_regression or p99_change > max_regression):
+            flag = "  REGRESSION"
+            regressed = True
+        print(f"  {name:28s} throughput {rps_change:+7.1f}%   p99 {p99_change:+7.1f}%{flag}")
+    return regressed
+
+
+def _print_result(name: str, result: dict) -> None:
+    latency = result["latency_ms"]
+    print(
+        f"  {name:28s} {result['throughput_rps']:10,.1f} req/s   p50 {latency['p50']:8.2f} ms   "
+        f"p95 {latency['p95']:8.2f} ms   p99 {latency['p99']:8.2f} ms   errors {result['errors']}"
+    )
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--model", default="app/ml/model.joblib")
+    parser.add_argument("--workers", type=int, default=int(os.getenv("GUNICORN_WORKERS", "2")))
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--duration", type=float, default=10.0, help="Measured seconds per scenario")
+    parser.add_argument("--llm-latency", type=float, default=0.5, help="Seconds the fake LLM takes to answer")
+    parser.add_argument("--llm-jitter", type=float, default=0.1)
+    parser.add_argument("--scenarios", default=",".join(SCENARIOS))
+    parser.add_argument("--out", default="load_test.json")
+    parser.add_argument("--baseline", default=None, help="Earlier report to compare against")
+    parser.add_argument("--max-regression", type=float, default=None, help="Allowed percent drop/rise vs --baseline")
+    args = parser.parse_args()
+
+    scenarios = [name.strip() for name in args.scenarios.split(",") if name.strip()]
+    unknown = set(scenarios) - set(SCENARIOS)
+    if unknown:
+        parser.error(f"unknown scenarios: {', '.join(sorted(unknown))}")
+
+    workdir = Path(tempfile.mkdtemp(prefix="agrismart-load-"))
+    model_path = workdir / "model.joblib"
+    shutil.copy2(args.model, model_path)
+    env = _server_env(args, workdir, model_path)
+    # Settings are read on first import, so this process sees the same configuration.
+    os.environ.update(env)
+    from app.ml.registry import write_compiled_layout
+
+    write_compiled_layout(model_path)
+
+    report = {
+        "meta": {
+            "commit": _git_commit(),
+            "created_at": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+            "python": platform.python_version(),
+            "cpu_count": os.cpu_count(),
+            "model": args.model,
+            "workers": args.workers,
+            "concurrency": args.concurrency,
+            "duration_seconds": args.duration,
+            "llm_latency_seconds": args.llm_latency,
+            "llm_jitter_seconds": args.llm_jitter,
+        },
+        "scenarios": {},
+    }
+    results = report["scenarios"]
+    print(f"workers {args.workers}, concurrency {args.concurrency}, {args.duration:g}s per scenario (logs in {workdir})")
+
+    try:
+        if {"predict", "history"} & set(scenarios):
+            with _api_server(env, workdir, "llm-off") as base_url:
+                for name, factory in (("predict", _predict_request), ("history", _history_request)):
+                    if name in scenarios:
+                        results[name] = asyncio.run(_drive(base_url, factory, args.concurrency, args.duration))
+                        _print_result(name, results[name])
+
+        if "predict_llm" in scenarios:
+            llm_port = _free_port()
+            fake_llm = [
+                sys.executable, "-m", "benchmarks.fake_llm", "--port", str(llm_port),
+                "--latency", str(args.llm_latency), "--jitter", str(args.llm_jitter),
+            ]
+            llm_env = {**env, "LLM_PROVIDER": "ollama", "OLLAMA_BASE_URL": f"http://127.0.0.1:{llm_port}"}
+            with _process(fake_llm, env, workdir / "fake-llm.log"):
+                with _api_server(llm_env, workdir, "fake-llm") as base_url:
+                    results["predict_llm"] = asyncio.run(
+                        _drive(base_url, _predict_request, args.concurrency, args.duration)
+                    )
+                    _print_result("predict_llm", results["predict_llm"])
+
+        if "functions" in scenarios:
+            results["functions"] = _run_functions(args.duration)
+            for name, result in results["functions"].items():
+                _print_result(f"functions.{name}", result)
+    except RuntimeError as exc:
+        print(exc)
+        return 1
+
+    Path(args.out).write_text(json.dumps(report, indent=2) + "\n", encoding="utf-8")
+    print(f"report written to {args.out}")
+
+    failed = any(result["errors"] for result in _flatten(report).values())
+    if args.baseline:
+        baseline = json.loads(Path(args.baseline).read_text(encoding="utf-8"))
+        failed = _compare(report, baseline, args.max_regression) or failed
+    shutil.rmtree(workdir, ignore_errors=True)
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,6 +1,12 @@
+import os
+
 bind = "0.0.0.0:8000"
-workers = 2
+# Tree models are memory-mapped (MODEL_MMAP=true), so extra workers share one copy of the
+# node arrays instead of each holding an unpickled pipeline.
+workers = int(os.getenv("GUNICORN_WORKERS", "2"))
 worker_class = "uvicorn.workers.UvicornWorker"
+# Preloading imports the app once in the master; models still load per worker in the lifespan.
+preload_app = os.getenv("GUNICORN_PRELOAD", "false").lower() in {"1", "true", "yes"}
 timeout = 60
 keepalive = 5
 graceful_timeout = 30